@@ -0,0 +1,54 @@
+"""Scalar vs batch face normalization timings
+
+    python -m benchmarks.bench_image_utils --count 500 --size 200
+"""
+import argparse
+import timeit
+
+import cv2
+import numpy as np
+
+from src.utils.image_utils import (
+    ClaheStage, EqualizeStage, FacePipeline, GammaStage,
+    normalize_batch, normalize_face, stack_faces
+)
+
+
+def _report(name: str, seconds: float, count: int):
+    print(f"{name:<34} {seconds * 1000:9.2f} ms   {seconds / count * 1e6:8.1f} us/face")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=500, help="Crops per batch")
+    parser.add_argument("--size", type=int, default=200, help="Output side length")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    faces = [rng.integers(0, 256, (int(side), int(side)), dtype=np.uint8)
+             for side in rng.integers(80, 300, args.count)]
+    target = (args.size, args.size)
+
+    def best(fn):
+        return min(timeit.repeat(fn, number=1, repeat=args.repeat))
+
+    batch = stack_faces(faces, target)
+    work = np.empty_like(batch)
+    out = np.empty(batch.shape, dtype=np.float32)
+
+    _report("normalize_face (scalar)", best(lambda: [normalize_face(f, target) for f in faces]), args.count)
+    _report("stack_faces + normalize_batch", best(
+        lambda: normalize_batch(stack_faces(faces, target, work), out)), args.count)
+    _report("normalize_batch (prestacked)", best(lambda: normalize_batch(batch, out)), args.count)
+
+    _report("equalizeHist + resize (scalar)", best(
+        lambda: [cv2.resize(cv2.equalizeHist(f), target) for f in faces]), args.count)
+    pipeline = FacePipeline([EqualizeStage()], target)
+    _report("FacePipeline[equalize]", best(lambda: pipeline.run(faces, copy=False)), args.count)
+    pipeline = FacePipeline([ClaheStage(), GammaStage(1.2)], target, normalize=True)
+    _report("FacePipeline[clahe, gamma, norm]", best(lambda: pipeline.run(faces, copy=False)), args.count)
+
+
+if __name__ == "__main__":
+    main()
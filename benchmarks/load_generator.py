@@ -0,0 +1,118 @@
+"""Load generator for the recognition API (src/api/server.py)
+
+Each client thread keeps one HTTP/1.1 connection open and posts images
+back to back; throughput and latency percentiles are printed at the end::
+
+    python -m src.api.server &
+    python -m benchmarks.load_generator --clients 8 --requests 50 --image face.jpg
+    python -m benchmarks.load_generator --clients 4 --batch 8 --crop
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+
+def synthetic_jpeg(size: int = 200) -> bytes:
+    import cv2
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 255, (size, size, 3), dtype=np.uint8)
+    ok, data = cv2.imencode(".jpg", image)
+    return data.tobytes()
+
+
+def multipart(images: List[bytes]):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for i, data in enumerate(images):
+        parts.append(
+            f"--{boundary}\r\n"
+            f"Content-Disposition: form-data; name=\"image{i}\"; filename=\"image{i}.jpg\"\r\n"
+            f"Content-Type: image/jpeg\r\n\r\n".encode() + data + b"\r\n"
+        )
+    body = b"".join(parts) + f"--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def run_client(host: str, port: int, path: str, body: bytes, content_type: str,
+               count: int, latencies: List[float], errors: List[str]):
+    conn = http.client.HTTPConnection(host, port, timeout=60)
+    for _ in range(count):
+        start = time.perf_counter()
+        try:
+            conn.request("POST", path, body=body, headers={"Content-Type": content_type})
+            response = conn.getresponse()
+            payload = response.read()
+            if response.status != 200:
+                errors.append(f"{response.status}: {payload[:200]!r}")
+                continue
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(str(e))
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=60)
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+    conn.close()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Load test the recognition API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--clients", type=int, default=4, help="Concurrent keep-alive connections")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per client")
+    parser.add_argument("--batch", type=int, default=1, help="Images per request (multipart when > 1)")
+    parser.add_argument("--image", default=None, help="JPEG to send (default: synthetic noise)")
+    parser.add_argument("--crop", action="store_true", help="Images are face crops, skip detection")
+    args = parser.parse_args(argv)
+
+    image = Path(args.image).read_bytes() if args.image else synthetic_jpeg()
+    if args.batch > 1:
+        body, content_type = multipart([image] * args.batch)
+    else:
+        body, content_type = image, "image/jpeg"
+    path = "/recognize?crop=1" if args.crop else "/recognize"
+
+    latencies: List[float] = []
+    errors: List[str] = []
+    threads = [
+        threading.Thread(target=run_client, args=(
+            args.host, args.port, path, body, content_type, args.requests, latencies, errors
+        ))
+        for _ in range(args.clients)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    done = len(latencies)
+    summary = {
+        "requests": done,
+        "errors": len(errors),
+        "images_per_s": round(done * args.batch / elapsed, 1),
+        "requests_per_s": round(done / elapsed, 1),
+    }
+    if latencies:
+        arr = np.asarray(latencies)
+        summary.update({f"p{p}_ms": round(float(np.percentile(arr, p)), 2) for p in (50, 90, 99)})
+    print(json.dumps(summary, indent=4))
+    if errors:
+        print(f"First error: {errors[0]}")
+
+    conn = http.client.HTTPConnection(args.host, args.port, timeout=10)
+    conn.request("GET", "/stats")
+    print(f"Server stats: {conn.getresponse().read().decode()}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Aggregate timing records from the JSON application log
+
+    python -m benchmarks.log_timings logs/app.jsonl logs/app.jsonl.1
+    python -m benchmarks.log_timings logs/api.jsonl --name training --json
+"""
+import argparse
+import json
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.core.log_setup import read_timings
+
+
+def summarize(timings: List[dict]) -> Dict[str, Dict[str, float]]:
+    """count/mean/p50/p90/p99/max milliseconds per timing name"""
+    by_name: Dict[str, List[float]] = {}
+    for timing in timings:
+        by_name.setdefault(timing["name"], []).append(float(timing["ms"]))
+    summary = {}
+    for name, values in sorted(by_name.items()):
+        arr = np.asarray(values)
+        summary[name] = {
+            "count": len(values),
+            "mean_ms": round(float(arr.mean()), 3),
+            **{f"p{p}_ms": round(float(np.percentile(arr, p)), 3) for p in (50, 90, 99)},
+            "max_ms": round(float(arr.max()), 3),
+        }
+    return summary
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Summarize timing records from JSON logs")
+    parser.add_argument("logs", nargs="+", help="JSON log files (rotated backups too)")
+    parser.add_argument("--name", default=None, help="Only timings whose name starts with this")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    timings = [t for path in args.logs for t in read_timings(path)]
+    if args.name:
+        timings = [t for t in timings if t["name"].startswith(args.name)]
+    summary = summarize(timings)
+    if args.json:
+        print(json.dumps(summary, indent=4))
+        return
+    print(f"{'name':<32} {'count':>7} {'mean':>10} {'p50':>10} {'p90':>10} {'p99':>10} {'max':>10}")
+    for name, row in summary.items():
+        print(f"{name:<32} {row['count']:>7} {row['mean_ms']:>10.2f} {row['p50_ms']:>10.2f} "
+              f"{row['p90_ms']:>10.2f} {row['p99_ms']:>10.2f} {row['max_ms']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Single-call vs multi-process LBPH training on synthetic faces
+
+    python -m benchmarks.train_parallel --sizes 10000,50000 --workers 1,2,4,8
+
+Faces are random 200x200 crops over ``--students`` labels. For each size
+the baseline ``recognizer.train`` is timed, then ``train_parallel`` for
+each worker count, then writing the merged model. Each face costs about
+40 KB of crop plus a 64 KB histogram in memory, so 200k faces need over
+20 GB; use --skip-serial to leave out the single-call baseline.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from src.utils.face_utils import FACE_SIZE, LBPH_PARAMS
+from src.utils.parallel_training import train_parallel
+
+
+def synthetic_faces(count: int, students: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    faces = [rng.integers(0, 256, FACE_SIZE, dtype=np.uint8) for _ in range(count)]
+    return faces, (np.arange(count) % students).astype(np.int32)
+
+
+def _report(name: str, seconds: float, count: int, baseline: float = None):
+    speedup = f"  x{baseline / seconds:5.2f}" if baseline else ""
+    print(f"{name:<28} {seconds:9.2f} s   {seconds / count * 1e3:7.3f} ms/face{speedup}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000", help="Comma-separated face counts")
+    parser.add_argument("--workers", default=None, help="Comma-separated process counts (default 1,2,4.. up to cores)")
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--skip-serial", action="store_true")
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    if args.workers:
+        worker_counts = [int(w) for w in args.workers.split(",")]
+    else:
+        worker_counts = [w for w in (1, 2, 4, 8, 16, 32, 64) if w < cores] + [cores]
+    print(f"{cores} cores, LBPH {LBPH_PARAMS}, faces {FACE_SIZE[0]}x{FACE_SIZE[1]}")
+
+    for size in (int(s) for s in args.sizes.split(",")):
+        faces, labels = synthetic_faces(size, args.students)
+        print(f"\n{size} faces, {args.students} students")
+        baseline = None
+        if not args.skip_serial:
+            recognizer = cv2.face.LBPHFaceRecognizer_create(**LBPH_PARAMS)
+            start = time.perf_counter()
+            recognizer.train(faces, labels)
+            baseline = time.perf_counter() - start
+            _report("recognizer.train", baseline, size)
+            del recognizer
+
+        merged = None
+        for workers in worker_counts:
+            start = time.perf_counter()
+            merged = train_parallel(faces, labels, LBPH_PARAMS, 100.0, workers, args.chunk_size)
+            _report(f"train_parallel x{workers}", time.perf_counter() - start, size, baseline)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            start = time.perf_counter()
+            merged.save(os.path.join(tmp, "classifier.xml"))
+            _report("merged model write", time.perf_counter() - start, size)
+        del faces, merged
+
+
+if __name__ == "__main__":
+    main()
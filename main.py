@@ -1,33 +1,34 @@
+from src.core.startup_trace import startup_trace
+
 import tkinter as tk
 import customtkinter as ctk
-from PIL import Image, ImageTk
 import logging
-from pathlib import Path
+import threading
 from typing import Dict, Any
 
 from src.core.base_window import BaseWindow
+from src.core.log_setup import setup_logging
 from src.core.theme_manager import ThemeManager
-from src.config.db_config import init_database
-from src.views.student import StudentView
-from src.views.recognition import RecognitionView
-from src.views.attendance import AttendanceView
-from src.views.training import TrainingView
-from src.views.reports import ReportsView
-from src.views.settings import SettingsView
-
-# Configure logging
-log_dir = Path(__file__).parent / "logs"
-log_dir.mkdir(exist_ok=True)
-log_file = log_dir / "app.log"
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_file),
-        logging.StreamHandler()
-    ]
-)
+from src.config.db_config import init_database, DatabaseConnection
+from src.config.config_manager import ConfigManager
+
+# Views are imported on first use so cv2/PIL are not loaded before first paint
+VIEWS = {
+    "students": ("src.views.student", "StudentView"),
+    "recognition": ("src.views.recognition", "RecognitionView"),
+    "attendance": ("src.views.attendance", "AttendanceView"),
+    "training": ("src.views.training", "TrainingView"),
+    "reports": ("src.views.reports", "ReportsView"),
+    "settings": ("src.views.settings", "SettingsView"),
+}
+
+# Heavy third-party modules pre-imported by the warmup thread
+WARMUP_MODULES = ["numpy", "cv2", "PIL.Image"]
+
+startup_trace.mark("core_imported")
+
+# Nothing below may run at import time: training workers are spawned, and
+# each one re-imports this module as __mp_main__
 
 class ModernFaceRecognition(BaseWindow):
     """Modern Face Recognition Attendance System"""
@@ -35,7 +36,13 @@ class ModernFaceRecognition(BaseWindow):
     def __init__(self):
         super().__init__(title="Modern Face Recognition System")
         self.theme = ThemeManager()
+        self.views: Dict[str, Any] = {}
+        self.view_frames: Dict[str, ctk.CTkFrame] = {}
+        self.current_view = None
         self.setup_ui()
+        startup_trace.mark("ui_built")
+        # after_idle fires once the first frame has been drawn
+        self.root.after_idle(self.on_first_paint)
         
     def setup_ui(self):
         """Setup the modern UI"""
@@ -73,15 +80,81 @@ class ModernFaceRecognition(BaseWindow):
                 **self.theme.get_style("button")
             )
             btn.pack(pady=5, padx=10, fill="x")
+
+    def on_first_paint(self):
+        """Start deferred initialization once the window is visible"""
+        startup_trace.mark("first_paint")
+        threading.Thread(target=self.warmup, name="warmup", daemon=True).start()
+
+    def warmup(self):
+        """Load heavy modules, assets and the DB in the background"""
+        try:
+            for module in WARMUP_MODULES:
+                startup_trace.timed_import(module)
+            for module, _ in VIEWS.values():
+                startup_trace.timed_import(module)
+
+            with startup_trace.span("asset_warmup"):
+                from src.utils import assets
+                assets.prewarm()
+
+            with startup_trace.span("event_bus"):
+                # Starting the bus replays attendance journaled before a crash
+                from src.core.event_bus import event_bus
+                event_bus().start()
+
+            with startup_trace.span("db_warmup"):
+                with DatabaseConnection() as cursor:
+                    cursor.execute("SELECT COUNT(*) FROM students")
+                    cursor.execute("SELECT COUNT(*) FROM attendance_daily")
+
+            startup_trace.mark("warm")
+        except Exception as e:
+            logging.warning(f"Background warmup failed: {e}")
+        finally:
+            startup_trace.write()
+
+    def _hide_current_view(self):
+        if self.current_view is None:
+            return
+        view = self.views.get(self.current_view)
+        if view is not None:
+            view.on_hide()
+        self.view_frames[self.current_view].pack_forget()
+        self.current_view = None
+
+    def show_view(self, key: str):
+        """Show a cached view, constructing it on first use"""
+        if key == self.current_view:
+            return
+        self._hide_current_view()
+
+        if key in self.view_frames:
+            self.view_frames[key].pack(fill="both", expand=True, padx=10, pady=10)
+            self.views[key].on_show()
+        else:
+            module_name, class_name = VIEWS[key]
+            with startup_trace.span(f"view:{key}"):
+                module = startup_trace.timed_import(module_name)
+                frame = ctk.CTkFrame(self.content, fg_color="transparent")
+                self.view_frames[key] = frame
+                try:
+                    self.views[key] = getattr(module, class_name)(frame)
+                except Exception:
+                    frame.destroy()
+                    del self.view_frames[key]
+                    raise
+        self.current_view = key
     
     def show_welcome_screen(self):
         """Show welcome screen in content area"""
-        # Clear existing content
-        for widget in self.content.winfo_children():
-            widget.destroy()
+        frame = ctk.CTkFrame(self.content, fg_color="transparent")
+        frame.pack(fill="both", expand=True)
+        self.view_frames["welcome"] = frame
+        self.current_view = "welcome"
             
         welcome = ctk.CTkLabel(
-            self.content,
+            frame,
             text="Face Recognition System",
             font=("Helvetica", 24, "bold")
         )
@@ -89,48 +162,55 @@ class ModernFaceRecognition(BaseWindow):
 
     def show_students(self):
         """Show student management view"""
-        for widget in self.content.winfo_children():
-            widget.destroy()
-        StudentView(self.content)
+        self.show_view("students")
 
     def show_face_recognition(self):
         """Show face recognition view"""
-        for widget in self.content.winfo_children():
-            widget.destroy()
-        RecognitionView(self.content)
+        self.show_view("recognition")
 
     def show_attendance(self):
         """Show attendance management view"""
-        for widget in self.content.winfo_children():
-            widget.destroy()
-        AttendanceView(self.content)
+        self.show_view("attendance")
 
     def show_training(self):
         """Show model training view"""
-        for widget in self.content.winfo_children():
-            widget.destroy()
-        TrainingView(self.content)
+        self.show_view("training")
 
     def show_reports(self):
         """Show reports view"""
-        for widget in self.content.winfo_children():
-            widget.destroy()
-        ReportsView(self.content)
+        self.show_view("reports")
 
     def show_settings(self):
         """Show settings view"""
-        for widget in self.content.winfo_children():
-            widget.destroy()
-        SettingsView(self.content)
+        self.show_view("settings")
 
 def main():
+    # Queued logging: rotating logs/app.jsonl plus the console. Only the GUI
+    # process owns the file; spawned workers must not rotate it too
+    setup_logging()
     try:
         # Initialize database
-        init_database()
+        with startup_trace.span("init_database"):
+            init_database()
+        
+        # Reload settings edited on disk without restarting
+        ConfigManager().start_watching()
+
+        # ATTENDANCE_PROFILE_SECONDS=N samples the first N seconds
+        from src.core.profiler import start_from_env
+        start_from_env()
+
+        # Archiving, ANALYZE/optimize and incremental vacuum in the background
+        from src.db.maintenance import MaintenanceScheduler
+        MaintenanceScheduler().start()
         
         # Start application
         app = ModernFaceRecognition()
         app.root.mainloop()
+
+        # Write out queued attendance events and apply the journal
+        from src.core.event_bus import AttendanceEventBus
+        AttendanceEventBus().stop()
     except Exception as e:
         logging.error(f"Application error: {e}")
         raise
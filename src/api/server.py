@@ -0,0 +1,389 @@
+"""Headless HTTP API for recognition and attendance queries
+
+Runs without the GUI on the standard library HTTP server::
+
+    python -m src.api.server --port 8765
+
+Endpoints (JSON responses, HTTP/1.1 keep-alive):
+
+    POST /recognize            image/jpeg body, or multipart/form-data with
+                               several images; ``?crop=1`` skips detection
+                               (images are face crops), ``?mark=1`` publishes
+                               attendance events for recognized students
+    GET  /attendance?date=...  one day of attendance, keyset paged with
+                               ``after_time``/``after_id`` and ``limit``
+    GET  /report?start=&end=   days present per student
+    GET  /health, /stats
+
+Images from concurrent requests are queued and handed to a small pool of
+workers in batches, each worker owning its own FaceDetector.
+"""
+import cv2
+import numpy as np
+import argparse
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from src.config.config_manager import ConfigManager
+from src.config.db_config import DatabaseConnection, init_database
+from src.db.rollups import attendance_report
+from src.core.event_bus import AttendanceMarked, event_bus
+from src.core.log_setup import setup_logging
+from src.db.students import label_directory
+from src.utils.face_utils import MODEL_PATH, FaceDetector, model_meta_path
+
+
+class ApiError(Exception):
+    """Client error reported as a JSON body with an HTTP status"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def int_param(params: Dict[str, str], name: str, default: Optional[int] = None) -> int:
+    """Integer query parameter; a malformed value is a 400"""
+    value = params.get(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ApiError(400, f"{name} must be an integer")
+
+
+def decode_image(data: bytes) -> np.ndarray:
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ApiError(400, "Could not decode image")
+    return image
+
+
+def split_multipart(content_type: str, body: bytes) -> List[bytes]:
+    """Payloads of every part of a multipart/form-data body"""
+    message = BytesParser(policy=HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode() + body
+    )
+    if not message.is_multipart():
+        raise ApiError(400, "Malformed multipart body")
+    return [part.get_payload(decode=True) for part in message.iter_parts()]
+
+
+def _worker_detector() -> FaceDetector:
+    detector = FaceDetector()
+    detector.use_private_cascades()
+    detector.load_trained_model()
+    return detector
+
+
+class RecognitionBatcher:
+    """Queues images from all requests and recognizes them in batches
+
+    A worker blocks for the first job, then collects whatever else arrives
+    within ``window_ms`` (up to ``max_batch``) and serves them together:
+    one model freshness check and one database round trip per batch.
+    """
+
+    def __init__(self, workers: int = 2, max_batch: int = 16, window_ms: float = 5.0):
+        self.max_batch = max_batch
+        self.window = window_ms / 1000.0
+        self.stats = {'requests': 0, 'images': 0, 'batches': 0, 'faces': 0, 'max_batch_seen': 0}
+        self.bus = event_bus()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"api-worker-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.stats)
+
+    def count_request(self):
+        with self._lock:
+            self.stats['requests'] += 1
+
+    def submit(self, image: np.ndarray, crop: bool, mark: bool) -> Future:
+        future: Future = Future()
+        self._queue.put((image, crop, mark, future))
+        return future
+
+    def close(self):
+        for _ in self._threads:
+            self._queue.put(None)
+
+    def _collect(self) -> List[Tuple]:
+        first = self._queue.get()
+        if first is None:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=max(0.0, remaining)) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # Let a sibling worker see the shutdown marker
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        detector = _worker_detector()
+        model_mtime = self._mtime()
+        while True:
+            batch = self._collect()
+            if not batch:
+                return
+            # Pick up models retrained by the GUI or another process
+            mtime = self._mtime()
+            if mtime != model_mtime:
+                detector.load_trained_model()
+                model_mtime = mtime
+            try:
+                results = self._recognize(detector, batch)
+                for (_, _, _, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                logging.error(f"Recognition batch failed: {e}")
+                for *_, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            with self._lock:
+                self.stats['batches'] += 1
+                self.stats['images'] += len(batch)
+                self.stats['max_batch_seen'] = max(self.stats['max_batch_seen'], len(batch))
+
+    @staticmethod
+    def _mtime() -> Optional[float]:
+        # The metadata is replaced after the model, so it changes only once
+        # both are in place; models saved before it existed have none
+        for path in (model_meta_path(str(MODEL_PATH)), MODEL_PATH):
+            try:
+                return os.path.getmtime(path)
+            except OSError:
+                continue
+        return None
+
+    def _recognize(self, detector: FaceDetector, batch: List[Tuple]) -> List[List[Dict[str, Any]]]:
+        threshold = detector.config_manager.config.recognition.confidence_threshold
+        predictions = []
+        for image, crop, mark, _ in batch:
+            if crop:
+                boxes = [(0, 0, image.shape[1], image.shape[0])]
+            else:
+                boxes = [tuple(int(v) for v in box) for box in detector.detect_faces(image)]
+            predictions.append([(box, *detector.predict_face(image, box)) for box in boxes])
+
+        results = []
+        with DatabaseConnection() as cursor:
+            for (image, crop, mark, _), faces in zip(batch, predictions):
+                entries = []
+                for box, label, confidence in faces:
+                    student = label_directory.lookup(cursor, label) if confidence > threshold else None
+                    entry = {
+                        "box": list(box),
+                        "label": label if student else None,
+                        "name": student[1] if student else None,
+                        "confidence": round(float(confidence), 2),
+                        "recognized": student is not None,
+                    }
+                    if mark and student is not None:
+                        event = AttendanceMarked(student[0], student[1], label, float(confidence), source="api")
+                        self.bus.publish(event)
+                        entry["attendance_event"] = event.event_id
+                    entries.append(entry)
+                results.append(entries)
+        with self._lock:
+            self.stats['faces'] += sum(len(r) for r in results)
+        return results
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    """Routes requests; one instance per request on a connection thread"""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "AttendanceAPI/1.0"
+
+    @property
+    def api(self) -> "RecognitionServer":
+        return self.server  # type: ignore[return-value]
+
+    def log_message(self, format, *args):
+        logging.debug(f"{self.address_string()} {format % args}")
+
+    def _send_json(self, status: int, payload: Any):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self) -> bytes:
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = 0
+        if length <= 0 or length > self.api.max_body:
+            # The unread body would be parsed as the next request
+            self.close_connection = True
+            if length <= 0:
+                raise ApiError(411, "Content-Length required")
+            raise ApiError(413, "Request body too large")
+        return self.rfile.read(length)
+
+    def _dispatch(self, routes):
+        url = urlparse(self.path)
+        handler = routes.get(url.path)
+        try:
+            if handler is None:
+                raise ApiError(404, f"No route for {url.path}")
+            params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            self._send_json(200, handler(params))
+        except ApiError as e:
+            self._send_json(e.status, {"error": str(e)})
+        except Exception as e:
+            logging.error(f"API error on {self.path}: {e}")
+            self._send_json(500, {"error": "Internal error"})
+
+    def do_GET(self):
+        self._dispatch({
+            "/health": self.health,
+            "/stats": self.stats,
+            "/attendance": self.attendance,
+            "/report": self.report,
+        })
+
+    def do_POST(self):
+        self._dispatch({"/recognize": self.recognize})
+
+    def health(self, params):
+        return {"status": "ok", "model": os.path.exists(MODEL_PATH)}
+
+    def stats(self, params):
+        bus = self.api.batcher.bus
+        return {
+            "recognition": self.api.batcher.snapshot(),
+            "events": dict(bus.stats, sinks={sink.name: dict(sink.stats) for sink in bus.sinks}),
+        }
+
+    def recognize(self, params):
+        body = self._read_body()
+        content_type = self.headers.get("Content-Type", "")
+        if content_type.startswith("multipart/"):
+            images = [decode_image(data) for data in split_multipart(content_type, body)]
+        else:
+            images = [decode_image(body)]
+        if not images:
+            raise ApiError(400, "No images in request")
+
+        crop = params.get("crop") == "1"
+        mark = params.get("mark") == "1"
+        self.api.batcher.count_request()
+        futures = [self.api.batcher.submit(image, crop, mark) for image in images]
+        results = [future.result(timeout=self.api.request_timeout) for future in futures]
+        if content_type.startswith("multipart/"):
+            return {"results": [{"faces": faces} for faces in results]}
+        return {"faces": results[0]}
+
+    def attendance(self, params):
+        date = params.get("date") or time.strftime("%Y-%m-%d")
+        limit = min(max(int_param(params, "limit", 200), 1), 5000)
+        query = """
+            SELECT a.id, s.student_id, s.name, a.date, a.time, a.status
+            FROM attendance a
+            JOIN students s ON s.id = a.student_pk
+            WHERE a.date = ? {keyset}
+            ORDER BY a.time DESC, a.id DESC
+            LIMIT ?
+        """
+        args: List[Any] = [date]
+        keyset = ""
+        if "after_time" in params and "after_id" in params:
+            keyset = "AND (a.time, a.id) < (?, ?)"
+            args += [params["after_time"], int_param(params, "after_id")]
+        with DatabaseConnection() as cursor:
+            cursor.execute(query.format(keyset=keyset), args + [limit])
+            rows = cursor.fetchall()
+        records = [
+            {"id": r[0], "student_id": r[1], "name": r[2], "date": r[3], "time": r[4], "status": r[5]}
+            for r in rows
+        ]
+        next_page = {"after_time": rows[-1][4], "after_id": rows[-1][0]} if len(rows) == limit else None
+        return {"date": date, "records": records, "next": next_page}
+
+    def report(self, params):
+        if "start" not in params or "end" not in params:
+            raise ApiError(400, "start and end are required")
+        with DatabaseConnection() as cursor:
+            rows = attendance_report(cursor, params["start"], params["end"])
+        return {
+            "start": params["start"],
+            "end": params["end"],
+            "students": [{"student_id": r[0], "name": r[1], "days_present": r[2]} for r in rows],
+        }
+
+
+class RecognitionServer(ThreadingHTTPServer):
+    """Threaded HTTP server sharing one RecognitionBatcher"""
+
+    daemon_threads = True
+
+    def __init__(self, address, batcher: RecognitionBatcher, max_body_mb: float = 20, request_timeout: float = 30):
+        super().__init__(address, ApiHandler)
+        self.batcher = batcher
+        self.max_body = int(max_body_mb * 1024 * 1024)
+        self.request_timeout = request_timeout
+
+
+def create_server(host: Optional[str] = None, port: Optional[int] = None) -> RecognitionServer:
+    cfg = ConfigManager().config.api
+    batcher = RecognitionBatcher(cfg.workers, cfg.max_batch, cfg.batch_window_ms)
+    return RecognitionServer(
+        (host or cfg.host, cfg.port if port is None else port),
+        batcher, cfg.max_body_mb, cfg.request_timeout
+    )
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Headless recognition and attendance API")
+    parser.add_argument("--host", default=None)
+    parser.add_argument("--port", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    setup_logging("api")
+    init_database()
+    server = create_server(args.host, args.port)
+    host, port = server.server_address[:2]
+    logging.info(f"Recognition API listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.batcher.close()
+        server.server_close()
+        server.batcher.bus.stop()
+
+
+if __name__ == "__main__":
+    main()
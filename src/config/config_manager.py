@@ -1,73 +1,408 @@
 import json
+import os
+import threading
+from dataclasses import dataclass, field, asdict, fields, is_dataclass
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional
 import logging
 
+ROOT_DIR = Path(__file__).parent.parent.parent
+CONFIG_FILE = ROOT_DIR / "config" / "settings.json"
+
+# Flat keys written by older versions of the settings view
+LEGACY_KEYS = {
+    "theme": "ui.theme",
+    "language": "ui.language",
+    "min_face_size": "detection.min_face_size",
+    "db_path": "database.path",
+}
+
+
+def _coerce(default: Any, value: Any) -> Any:
+    """Convert ``value`` to the type of the field's default"""
+    if isinstance(default, bool) and not isinstance(value, bool):
+        return str(value).strip().lower() in ("1", "true", "yes", "on")
+    return type(default)(value)
+
+
+@dataclass
+class DetectionConfig:
+    """Haar cascade parameters used by FaceDetector.detect_faces"""
+    scale_factor: float = 1.1
+    min_neighbors: int = 5
+    min_face_size: int = 30
+    max_face_size: int = 300
+    # Frames are downscaled by this factor before detection (1.0 = full size)
+    detection_scale: float = 1.0
+    # Run detection on every (frame_skip + 1)th frame, reusing boxes in between
+    frame_skip: int = 0
+
+
+@dataclass
+class MotionConfig:
+    """Skip detection on static scenes and poll slowly when idle"""
+    enabled: bool = True
+    # Fraction of the 64x48 thumbnail that must change to count as motion
+    area_threshold: float = 0.01
+    pixel_threshold: int = 18
+    # Detect at least this often even without motion
+    refresh_seconds: float = 2.0
+    idle_after: float = 5.0
+    active_interval_ms: int = 10
+    idle_interval_ms: int = 200
+
+
+@dataclass
+class RecognitionConfig:
+    """Thresholds on the 0-100 confidence returned by predict_face"""
+    confidence_threshold: float = 40.0
+    strong_threshold: float = 60.0
+    lbph_threshold: float = 100.0
+    # Align crops on the eyes before training (applies from the next full training)
+    align_faces: bool = True
+
+
+@dataclass
+class ShardingConfig:
+    """Split the recognizer by course or label hash (mode: none, course, hash)"""
+    mode: str = "none"
+    hash_shards: int = 16
+    # Courses (or hash shard numbers) this kiosk searches; empty = all shards
+    active_shards: str = ""
+    # Search the full model when the best shard match is below confidence_threshold
+    fallback: bool = True
+
+
+@dataclass
+class EnrollmentConfig:
+    target_images: int = 30
+    auto_retrain: bool = True
+
+
+@dataclass
+class DatasetConfig:
+    """Curation of the training images before each training run"""
+    curate: bool = True
+    max_per_student: int = 60
+    # dHash bits (of 64) within which two crops count as duplicates
+    dedupe_distance: int = 2
+    balance: bool = True
+    # No student keeps more than this multiple of the median class size
+    balance_ratio: float = 2.0
+
+
+@dataclass
+class TrainingConfig:
+    """Full trainings with at least ``parallel_min_faces`` faces compute
+    their histograms in ``workers`` processes (0 = one per core)"""
+    workers: int = 0
+    chunk_size: int = 1000
+    parallel_min_faces: int = 4000
+
+
+@dataclass
+class DatabaseConfig:
+    path: str = "data/face_recognition.db"
+
+
+@dataclass
+class PerformanceConfig:
+    """Tuning knobs for pools, caches and paging"""
+    report_cache_size: int = 32
+    page_size: int = 200
+    export_chunk_size: int = 5000
+    # Reuse predictions for unchanged face crops (0 entries disables)
+    recognition_cache_size: int = 64
+    recognition_cache_ttl: float = 1.0
+    recognition_cache_max_distance: int = 4
+
+
+@dataclass
+class MaintenanceConfig:
+    """Background database upkeep"""
+    interval_hours: float = 24.0
+    vacuum_pages: int = 2000
+    # Raw attendance older than this is archived per term (0 disables)
+    retention_days: int = 0
+    archive_format: str = "sqlite"
+
+
+@dataclass
+class EventsConfig:
+    """Sinks fed by the attendance event bus"""
+    sqlite: bool = True
+    csv_journal: bool = False
+    # Local endpoint receiving batches of events as JSON (empty disables)
+    webhook_url: str = ""
+    batch_size: int = 50
+    flush_ms: float = 200.0
+    queue_size: int = 1000
+    # Append-only journal replayed into SQLite after a crash
+    journal: bool = True
+    journal_group_size: int = 32
+    journal_fsync_ms: float = 50.0
+    journal_segment_kb: float = 1024.0
+    journal_checkpoint_seconds: float = 60.0
+
+
+@dataclass
+class ApiConfig:
+    """Headless HTTP API (python -m src.api.server)"""
+    host: str = "127.0.0.1"
+    port: int = 8765
+    workers: int = 2
+    # Images arriving within this window are recognized as one batch
+    max_batch: int = 16
+    batch_window_ms: float = 5.0
+    max_body_mb: float = 20.0
+    request_timeout: float = 30.0
+
+
+@dataclass
+class LoggingConfig:
+    """Queued logging to a rotating file (JSON lines) and the console"""
+    level: str = "INFO"
+    json: bool = True
+    max_mb: float = 5.0
+    backups: int = 5
+    # Per call site: at most this many records per window, repeats dropped
+    rate_limit_burst: int = 5
+    rate_limit_window: float = 10.0
+
+
+@dataclass
+class ProfilingConfig:
+    """Stage spans and on-demand profile captures (ATTENDANCE_PROFILE=1 also enables)"""
+    enabled: bool = False
+    # "sample" (all threads, low overhead) or "cprofile" (UI thread, exact counts)
+    mode: str = "sample"
+    capture_seconds: float = 10.0
+    sample_interval_ms: float = 5.0
+    max_events: int = 50000
+
+
+@dataclass
+class UIConfig:
+    theme: str = "system"
+    language: str = "en"
+
+
+@dataclass
+class AppConfig:
+    """Typed view of config/settings.json"""
+    detection: DetectionConfig = field(default_factory=DetectionConfig)
+    motion: MotionConfig = field(default_factory=MotionConfig)
+    recognition: RecognitionConfig = field(default_factory=RecognitionConfig)
+    sharding: ShardingConfig = field(default_factory=ShardingConfig)
+    enrollment: EnrollmentConfig = field(default_factory=EnrollmentConfig)
+    dataset: DatasetConfig = field(default_factory=DatasetConfig)
+    training: TrainingConfig = field(default_factory=TrainingConfig)
+    database: DatabaseConfig = field(default_factory=DatabaseConfig)
+    performance: PerformanceConfig = field(default_factory=PerformanceConfig)
+    maintenance: MaintenanceConfig = field(default_factory=MaintenanceConfig)
+    events: EventsConfig = field(default_factory=EventsConfig)
+    api: ApiConfig = field(default_factory=ApiConfig)
+    profiling: ProfilingConfig = field(default_factory=ProfilingConfig)
+    logging: LoggingConfig = field(default_factory=LoggingConfig)
+    ui: UIConfig = field(default_factory=UIConfig)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "AppConfig":
+        """Build a config, ignoring unknown keys and coercing value types"""
+        config = cls()
+        for section in fields(cls):
+            values = data.get(section.name)
+            if not isinstance(values, dict):
+                continue
+            target = getattr(config, section.name)
+            for item in fields(target):
+                if item.name in values:
+                    default = getattr(target, item.name)
+                    try:
+                        setattr(target, item.name, _coerce(default, values[item.name]))
+                    except (TypeError, ValueError):
+                        logging.warning(f"Ignoring invalid config value {section.name}.{item.name}")
+        return config
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
 class ConfigManager:
-    """Manages application configuration"""
-    
+    """Manages application configuration
+
+    A single JSON file backs a typed ``AppConfig``. Writes are debounced and
+    batched, and a watcher thread reloads the file when it changes on disk,
+    notifying subscribers so running components pick up new values.
+    """
+
     _instance = None
-    
+
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
         return cls._instance
-    
+
     def __init__(self):
         if not hasattr(self, 'initialized'):
-            self.config_file = Path(__file__).parent / "config.json"
-            self.config: Dict[str, Any] = {}
+            self.config_file = CONFIG_FILE
+            self.config = AppConfig()
+            self.write_delay = 0.5
+            self.poll_interval = 1.0
+            self._lock = threading.RLock()
+            self._subscribers: List[Callable[[AppConfig], None]] = []
+            self._save_timer: Optional[threading.Timer] = None
+            self._mtime = None
+            self._watcher: Optional[threading.Thread] = None
+            self._stop = threading.Event()
             self.load_config()
             self.initialized = True
-    
-    def load_config(self):
-        """Load configuration from file"""
+
+    def load_config(self) -> bool:
+        """Load configuration from file; returns False if it could not be read
+
+        Only the first load falls back to defaults. Later (hot) reloads keep
+        the last good config, so a half-written save never resets a running
+        kiosk's thresholds.
+        """
         try:
             if self.config_file.exists():
+                # Taken first, so a broken file is not retried until it changes again
+                self._mtime = os.path.getmtime(self.config_file)
                 with open(self.config_file, 'r') as f:
-                    self.config = json.load(f)
+                    data = json.load(f)
+                config = AppConfig.from_dict(self._upgrade(data))
+                with self._lock:
+                    self.config = config
             else:
-                self.config = self._get_default_config()
+                with self._lock:
+                    self.config = AppConfig()
                 self.save_config()
+            return True
         except Exception as e:
-            logging.error(f"Error loading config: {e}")
-            self.config = self._get_default_config()
-    
+            if hasattr(self, 'initialized'):
+                logging.error(f"Error reloading config, keeping the current settings: {e}")
+            else:
+                logging.error(f"Error loading config, using defaults: {e}")
+                with self._lock:
+                    self.config = AppConfig()
+            return False
+
+    @staticmethod
+    def _upgrade(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Move legacy flat keys into their sections"""
+        upgraded = {k: v for k, v in data.items() if isinstance(v, dict)}
+        for old, new in LEGACY_KEYS.items():
+            if old in data and not isinstance(data[old], dict):
+                section, key = new.split(".")
+                upgraded.setdefault(section, {}).setdefault(key, data[old])
+        return upgraded
+
     def save_config(self):
         """Save configuration to file"""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            data = self.config.to_dict()
         try:
-            with open(self.config_file, 'w') as f:
-                json.dump(self.config, f, indent=4)
+            self.config_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.config_file.with_suffix(".json.tmp")
+            with open(tmp_file, 'w') as f:
+                json.dump(data, f, indent=4)
+            os.replace(tmp_file, self.config_file)
+            # Our own write must not trigger a reload
+            self._mtime = os.path.getmtime(self.config_file)
         except Exception as e:
             logging.error(f"Error saving config: {e}")
-    
+
+    def flush(self):
+        """Write any pending changes immediately"""
+        with self._lock:
+            pending = self._save_timer is not None
+        if pending:
+            self.save_config()
+
     def get(self, key: str, default: Any = None) -> Any:
-        """Get configuration value"""
-        return self.config.get(key, default)
-    
+        """Get configuration value by dotted key, e.g. ``detection.scale_factor``"""
+        node: Any = self.config
+        for part in key.split("."):
+            if is_dataclass(node) and hasattr(node, part):
+                node = getattr(node, part)
+            else:
+                return default
+        return node
+
     def set(self, key: str, value: Any):
-        """Set configuration value"""
-        self.config[key] = value
-        self.save_config()
-    
-    def _get_default_config(self) -> Dict[str, Any]:
-        """Get default configuration"""
-        return {
-            "database": {
-                "path": "data/face_recognition.db"
-            },
-            "face_detection": {
-                "confidence_threshold": 85,
-                "min_face_size": 30,
-                "scale_factor": 1.1
-            },
-            "training": {
-                "batch_size": 32,
-                "epochs": 10,
-                "validation_split": 0.2
-            },
-            "ui": {
-                "theme": "system",
-                "language": "en"
-            }
-        }
+        """Set configuration value; the file write is debounced"""
+        self.update({key: value})
+
+    def update(self, values: Dict[str, Any]):
+        """Set several dotted keys at once and schedule a single write"""
+        with self._lock:
+            # Validate everything first so a bad value changes nothing
+            changes = []
+            for key, value in values.items():
+                section_name, _, name = key.rpartition(".")
+                section = self.get(section_name) if section_name else None
+                if not is_dataclass(section) or not hasattr(section, name):
+                    raise KeyError(f"Unknown config key: {key}")
+                changes.append((section, name, _coerce(getattr(section, name), value)))
+            for section, name, value in changes:
+                setattr(section, name, value)
+            self._schedule_save()
+        self._notify()
+
+    def _schedule_save(self):
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+        self._save_timer = threading.Timer(self.write_delay, self.save_config)
+        self._save_timer.daemon = True
+        self._save_timer.start()
+
+    def subscribe(self, callback: Callable[[AppConfig], None]):
+        """Register ``callback(config)`` for changes made here or on disk"""
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[AppConfig], None]):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def _notify(self):
+        with self._lock:
+            subscribers = list(self._subscribers)
+            config = self.config
+        for callback in subscribers:
+            try:
+                callback(config)
+            except Exception as e:
+                logging.error(f"Config subscriber failed: {e}")
+
+    def start_watching(self):
+        """Poll the config file for external edits (hot reload)"""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, name="config-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop.set()
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                mtime = os.path.getmtime(self.config_file)
+            except OSError:
+                continue
+            if mtime != self._mtime:
+                logging.info(f"Reloading configuration from {self.config_file}")
+                if self.load_config():
+                    self._notify()
+
+
+def get_config() -> AppConfig:
+    """Current typed configuration"""
+    return ConfigManager().config
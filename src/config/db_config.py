@@ -3,11 +3,18 @@ from typing import Optional
 import logging
 from pathlib import Path
 
+from src.db.rollups import ensure_rollups
+from src.db.students import APPLIED_EVENTS_SQL, ATTENDANCE_SQL, LABELS_SQL, migrate_student_keys
+from src.config.config_manager import ConfigManager, ROOT_DIR
+
 class DatabaseConnection:
     """Database connection manager"""
     
     def __init__(self, db_path: Optional[str] = None):
-        self.db_path = db_path or str(Path(__file__).parent.parent.parent / "data" / "face_recognition.db")
+        if db_path is None:
+            # Relative paths in the config are relative to the project root
+            db_path = str(ROOT_DIR / ConfigManager().config.database.path)
+        self.db_path = db_path
         self.connection = None
         self.cursor = None
         # Create data directory if it doesn't exist
@@ -29,10 +36,10 @@ class DatabaseConnection:
             self.cursor.close()
             self.connection.close()
 
-def init_database():
+def init_database(db_path: Optional[str] = None):
     """Initialize database with required tables"""
     try:
-        with DatabaseConnection() as cursor:
+        with DatabaseConnection(db_path) as cursor:
             # Create students table
             cursor.execute('''
             CREATE TABLE IF NOT EXISTS students (
@@ -45,17 +52,15 @@ def init_database():
             )
             ''')
             
-            # Create attendance table
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS attendance (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                student_id TEXT,
-                date DATE,
-                time TIME,
-                status TEXT,
-                FOREIGN KEY (student_id) REFERENCES students(student_id)
-            )
-            ''')
+            # Older databases keyed attendance on the TEXT student_id
+            migrate_student_keys(cursor)
+
+            # Create attendance and recognizer label tables; attendance is
+            # indexed by (date, time) for keyset pagination of a day
+            cursor.executescript(ATTENDANCE_SQL + LABELS_SQL + APPLIED_EVENTS_SQL)
+
+            # Daily rollups used by reports
+            ensure_rollups(cursor)
             logging.info("Database initialized successfully")
     except Exception as e:
         logging.error(f"Failed to initialize database: {e}")
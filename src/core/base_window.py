@@ -34,3 +34,11 @@ class BaseWindow:
             
             self.root.geometry(f"{window_width}x{window_height}+{x}+{y}")
             self.root.resizable(True, True)
+
+    def on_show(self):
+        """Called when a cached view is shown again"""
+        pass
+
+    def on_hide(self):
+        """Called before a cached view is hidden; release cameras etc. here"""
+        pass
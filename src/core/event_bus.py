@@ -0,0 +1,429 @@
+"""Asyncio attendance event bus with pluggable sinks
+
+Recognition publishes ``AttendanceMarked`` events from any thread; the
+call only schedules the event on the bus loop and returns immediately.
+Every sink has its own bounded queue and consumer task, writes in batches
+and runs blocking I/O in the loop's executor, so a slow sink delays only
+itself and never the camera loop or the other sinks. Memory per sink is
+bounded too: see ``EventSink`` for what happens when a sink falls behind. With a journal
+attached, events are also appended to it before fan-out so queued marks
+survive a crash (see src/core/journal.py).
+"""
+import asyncio
+import atexit
+import csv
+import json
+import logging
+import threading
+import time
+import urllib.request
+import uuid
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+
+from src.config.config_manager import ConfigManager, ROOT_DIR
+from src.core.journal import AttendanceJournal, replay_journal
+from src.core.log_setup import log_timing
+
+LOG_DIR = ROOT_DIR / "logs"
+
+
+@dataclass(frozen=True)
+class AttendanceMarked:
+    """A student recognized with enough confidence to count as present"""
+    student_pk: int
+    name: str = ""
+    label: Optional[int] = None
+    confidence: float = 0.0
+    source: str = "kiosk"
+    status: str = "Present"
+    timestamp: str = field(default_factory=lambda: datetime.now().isoformat(timespec="seconds"))
+    event_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+
+    @property
+    def date(self) -> str:
+        return self.timestamp[:10]
+
+    @property
+    def time(self) -> str:
+        return self.timestamp[11:19]
+
+
+class EventSink:
+    """Base class for bus consumers
+
+    ``overflow`` decides what happens when the sink's queue of
+    ``max_queue`` events is full. Publishers are never slowed down:
+
+    - ``"spill"``: further events go to an overflow deque of up to
+      ``max_spill`` events, moved into the queue as the sink catches up.
+      When that is full too, the oldest spilled event is dropped.
+    - ``"drop_oldest"``: the oldest queued event is dropped.
+
+    Either way at most ``max_queue + max_spill`` events are held and every
+    dropped event is counted in ``stats['dropped']``. Events the SQLite
+    sink drops are still applied by the journal checkpoint when a journal
+    is attached.
+    """
+
+    name = "sink"
+
+    def __init__(self, max_batch: int = 50, flush_ms: float = 200, max_queue: int = 1000,
+                 overflow: str = "spill", max_spill: int = 10000):
+        self.max_batch = max_batch
+        self.flush_interval = flush_ms / 1000.0
+        self.max_queue = max_queue
+        self.overflow = overflow
+        self.max_spill = max_spill
+        self.stats = {'written': 0, 'batches': 0, 'spilled': 0, 'dropped': 0, 'failed': 0}
+
+    async def write(self, events: List[AttendanceMarked]):
+        raise NotImplementedError
+
+    async def close(self):
+        """Called once after the last batch"""
+
+
+class BlockingSink(EventSink):
+    """Sink whose ``write_batch`` does blocking I/O on the executor"""
+
+    async def write(self, events: List[AttendanceMarked]):
+        await asyncio.get_running_loop().run_in_executor(None, self.write_batch, events)
+
+    def write_batch(self, events: List[AttendanceMarked]):
+        raise NotImplementedError
+
+
+class SQLiteSink(BlockingSink):
+    """Inserts attendance rows, one transaction per batch; events already
+    applied (e.g. by journal replay) are skipped"""
+
+    name = "sqlite"
+
+    def __init__(self, db_path: Optional[str] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.db_path = db_path
+
+    def write_batch(self, events: List[AttendanceMarked]):
+        from src.config.db_config import DatabaseConnection
+        from src.db.students import insert_attendance_events
+        with DatabaseConnection(self.db_path) as cursor:
+            insert_attendance_events(
+                cursor, [(e.event_id, e.student_pk, e.date, e.time, e.status) for e in events]
+            )
+
+
+class CsvJournalSink(BlockingSink):
+    """Appends events to a daily CSV file under logs/events"""
+
+    name = "csv"
+    COLUMNS = ["event_id", "timestamp", "student_pk", "label", "name", "confidence", "status", "source"]
+
+    def __init__(self, directory: Optional[Path] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.directory = Path(directory or LOG_DIR / "events")
+
+    def write_batch(self, events: List[AttendanceMarked]):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        by_day: Dict[str, List[AttendanceMarked]] = {}
+        for event in events:
+            by_day.setdefault(event.date, []).append(event)
+        for day, day_events in by_day.items():
+            path = self.directory / f"attendance_{day}.csv"
+            new_file = not path.exists()
+            with open(path, 'a', newline='') as f:
+                writer = csv.writer(f)
+                if new_file:
+                    writer.writerow(self.COLUMNS)
+                for e in day_events:
+                    writer.writerow([getattr(e, column) for column in self.COLUMNS])
+
+
+class WebhookSink(BlockingSink):
+    """POSTs each batch as JSON to a (local) URL; failed batches are dropped"""
+
+    name = "webhook"
+
+    def __init__(self, url: str, timeout: float = 2.0, **kwargs):
+        kwargs.setdefault("overflow", "drop_oldest")
+        super().__init__(**kwargs)
+        self.url = url
+        self.timeout = timeout
+
+    def write_batch(self, events: List[AttendanceMarked]):
+        body = json.dumps({"events": [asdict(e) for e in events]}).encode()
+        request = urllib.request.Request(
+            self.url, data=body, headers={"Content-Type": "application/json"}, method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+class DashboardSink(EventSink):
+    """In-memory counters and recent events for on-screen display"""
+
+    name = "dashboard"
+
+    def __init__(self, recent: int = 50, **kwargs):
+        kwargs.setdefault("overflow", "drop_oldest")
+        kwargs.setdefault("flush_ms", 0)
+        super().__init__(**kwargs)
+        self.recent: Deque[AttendanceMarked] = deque(maxlen=recent)
+        self.marks_by_student: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    async def write(self, events: List[AttendanceMarked]):
+        with self._lock:
+            for event in events:
+                self.recent.append(event)
+                self.marks_by_student[event.student_pk] = self.marks_by_student.get(event.student_pk, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "students": len(self.marks_by_student),
+                "marks": sum(self.marks_by_student.values()),
+                "recent": [asdict(e) for e in list(self.recent)[-10:]],
+            }
+
+
+class AttendanceEventBus:
+    """Process-wide bus running its own asyncio loop on a daemon thread"""
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, 'initialized'):
+            self.sinks: List[EventSink] = []
+            self.stats = {'published': 0}
+            self._loop: Optional[asyncio.AbstractEventLoop] = None
+            self._thread: Optional[threading.Thread] = None
+            self._queues: Dict[str, asyncio.Queue] = {}
+            self._tasks: List[asyncio.Task] = []
+            self._spills: Dict[str, Deque[AttendanceMarked]] = {}
+            self.journal: Optional[AttendanceJournal] = None
+            self.journal_db_path: Optional[str] = None
+            self._checkpoint_seconds = 60.0
+            self._lock = threading.Lock()
+            self._atexit_registered = False
+            self.initialized = True
+
+    def add_sink(self, sink: EventSink):
+        """Register a sink; sinks added after start() are wired in on the loop"""
+        with self._lock:
+            self.sinks.append(sink)
+            loop = self._loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self._start_sink, sink)
+
+    def attach_journal(self, journal: AttendanceJournal, checkpoint_seconds: float = 60.0,
+                       db_path: Optional[str] = None):
+        """Journal every published event and replay sealed segments
+        into SQLite at start and every ``checkpoint_seconds``"""
+        with self._lock:
+            self.journal = journal
+            self.journal_db_path = db_path
+            self._checkpoint_seconds = checkpoint_seconds
+            loop = self._loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self._start_checkpoints)
+
+    def checkpoint(self) -> Optional[dict]:
+        """Seal the active journal segment and apply all sealed ones"""
+        if self.journal is None:
+            return None
+        self.journal.rotate()
+        return replay_journal(self.journal.sealed_segments(), self.journal_db_path)
+
+    def sink(self, name: str) -> Optional[EventSink]:
+        return next((s for s in self.sinks if s.name == name), None)
+
+    def start(self):
+        """Start the loop thread (idempotent)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            ready = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(ready,), name="event-bus", daemon=True)
+            self._thread.start()
+        ready.wait()
+        if not self._atexit_registered:
+            # Flush whatever is queued when the interpreter exits
+            atexit.register(self.stop)
+            self._atexit_registered = True
+
+    def publish(self, event: AttendanceMarked):
+        """Hand an event to every sink; never blocks the caller"""
+        if self._loop is None:
+            self.start()
+        with self._lock:
+            self.stats['published'] += 1
+        if self.journal is not None:
+            try:
+                self.journal.append(event)
+            except Exception as e:
+                logging.error(f"Could not journal attendance event {event.event_id}: {e}")
+        self._loop.call_soon_threadsafe(self._fanout, event)
+
+    def stop(self, timeout: float = 5.0):
+        """Flush queued events and stop the loop"""
+        loop = self._loop
+        if loop is None or not loop.is_running():
+            return
+        future = asyncio.run_coroutine_threadsafe(self._drain(), loop)
+        try:
+            future.result(timeout)
+        except Exception as e:
+            logging.error(f"Event bus did not flush cleanly: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join(timeout)
+        self._loop = None
+
+    def _run(self, ready: threading.Event):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        for sink in list(self.sinks):
+            self._start_sink(sink)
+        if self.journal is not None:
+            self._start_checkpoints()
+        loop.call_soon(ready.set)
+        loop.run_forever()
+        loop.close()
+
+    def _start_sink(self, sink: EventSink):
+        queue: asyncio.Queue = asyncio.Queue(maxsize=sink.max_queue)
+        self._queues[sink.name] = queue
+        self._spills[sink.name] = deque()
+        self._tasks.append(self._loop.create_task(self._consume(sink, queue)))
+
+    def _start_checkpoints(self):
+        self._tasks.append(self._loop.create_task(self._checkpoint_loop()))
+
+    async def _checkpoint_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # The first pass replays whatever a crash left behind
+            try:
+                await loop.run_in_executor(None, self.checkpoint)
+            except Exception as e:
+                logging.error(f"Journal checkpoint failed: {e}")
+            await asyncio.sleep(self._checkpoint_seconds)
+
+    def _fanout(self, event: AttendanceMarked):
+        for sink in self.sinks:
+            queue = self._queues.get(sink.name)
+            if queue is None:
+                continue
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                if sink.overflow == "drop_oldest":
+                    queue.get_nowait()
+                    queue.task_done()
+                    queue.put_nowait(event)
+                    sink.stats['dropped'] += 1
+                else:
+                    spill = self._spills[sink.name]
+                    if len(spill) >= sink.max_spill:
+                        spill.popleft()
+                        sink.stats['dropped'] += 1
+                    spill.append(event)
+                    sink.stats['spilled'] += 1
+
+    async def _consume(self, sink: EventSink, queue: asyncio.Queue):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + sink.flush_interval
+            while len(batch) < sink.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0 and queue.empty():
+                    break
+                try:
+                    batch.append(queue.get_nowait() if remaining <= 0 else
+                                 await asyncio.wait_for(queue.get(), remaining))
+                except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                    break
+            start = time.perf_counter()
+            try:
+                await sink.write(batch)
+                sink.stats['written'] += len(batch)
+                sink.stats['batches'] += 1
+            except Exception as e:
+                sink.stats['failed'] += len(batch)
+                logging.error(f"Event sink {sink.name} failed on {len(batch)} events: {e}")
+            finally:
+                # Refill before task_done so join() waits for spilled events
+                spill = self._spills.get(sink.name)
+                while spill and not queue.full():
+                    queue.put_nowait(spill.popleft())
+                for _ in batch:
+                    queue.task_done()
+            elapsed = (time.perf_counter() - start) * 1000
+            if elapsed > 1000:
+                log_timing(f"event_sink.{sink.name}", elapsed,
+                           f"Event sink {sink.name} took {elapsed:.0f}ms for {len(batch)} events",
+                           level=logging.WARNING, events=len(batch))
+
+    async def _drain(self):
+        for queue in self._queues.values():
+            await queue.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._queues.clear()
+        self._spills.clear()
+        for sink in self.sinks:
+            await sink.close()
+        if self.journal is not None:
+            # Everything is in SQLite now; a clean exit leaves no segments
+            self.journal.close()
+            await asyncio.get_running_loop().run_in_executor(
+                None, replay_journal, self.journal.sealed_segments(), self.journal_db_path
+            )
+            self.journal = None
+
+
+def default_sinks() -> List[EventSink]:
+    """Sinks enabled in the events config section"""
+    cfg = ConfigManager().config.events
+    options = {"max_batch": cfg.batch_size, "flush_ms": cfg.flush_ms, "max_queue": cfg.queue_size}
+    sinks: List[EventSink] = [DashboardSink()]
+    if cfg.sqlite:
+        sinks.append(SQLiteSink(**options))
+    if cfg.csv_journal:
+        sinks.append(CsvJournalSink(**options))
+    if cfg.webhook_url:
+        sinks.append(WebhookSink(cfg.webhook_url, **options))
+    return sinks
+
+
+_setup_lock = threading.Lock()
+
+
+def event_bus() -> AttendanceEventBus:
+    """The process-wide bus, configured with the default sinks on first use"""
+    bus = AttendanceEventBus()
+    with _setup_lock:
+        if not bus.sinks:
+            for sink in default_sinks():
+                bus.add_sink(sink)
+            cfg = ConfigManager().config.events
+            if cfg.journal:
+                journal = AttendanceJournal(
+                    group_size=cfg.journal_group_size,
+                    fsync_ms=cfg.journal_fsync_ms,
+                    segment_bytes=int(cfg.journal_segment_kb * 1024),
+                )
+                bus.attach_journal(journal, cfg.journal_checkpoint_seconds)
+    return bus
@@ -0,0 +1,323 @@
+"""Crash-safe append-only journal of attendance events
+
+Every published event is appended as one JSON line to the active segment
+under data/journal. Appends only reach the file buffer; a flusher thread
+fsyncs them in groups (every ``group_size`` events or ``fsync_ms``), so a
+power cut loses at most one group window while the camera loop never
+waits on the disk. Sealed segments are replayed into SQLite on startup
+and in the background, then deleted. Replay is idempotent: applied event
+ids are recorded in the attendance_events table.
+
+The GUI and the API server may journal into the same directory. Each
+journal writes ``attendance-<writer>-<seq>.jsonl`` segments and, while it
+is open, holds an exclusive lock on ``attendance-<writer>.lock``. A process
+replays its own sealed segments and every segment of a writer whose lock is
+free (closed or crashed), never another live writer's files.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from dataclasses import asdict
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from src.config.config_manager import ROOT_DIR
+from src.config.db_config import DatabaseConnection
+from src.db.students import insert_attendance_events
+
+JOURNAL_DIR = ROOT_DIR / "data" / "journal"
+SEGMENT_PREFIX = "attendance-"
+LOCK_SUFFIX = ".lock"
+# Lock files of dead writers with no segments left are removed after this
+STALE_LOCK_SECONDS = 60.0
+
+
+def segment_paths(directory: Path) -> List[Path]:
+    """Journal segments in write order"""
+    return sorted(Path(directory).glob(f"{SEGMENT_PREFIX}*.jsonl"))
+
+
+def segment_writer(path: Path) -> str:
+    """Writer id of a segment ("" for segments from before writer ids)"""
+    name = path.stem[len(SEGMENT_PREFIX):]
+    return name.rpartition("-")[0]
+
+
+def lock_path(directory: Path, writer: str) -> Path:
+    return Path(directory) / f"{SEGMENT_PREFIX}{writer}{LOCK_SUFFIX}"
+
+
+def _try_lock(f) -> bool:
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def writer_alive(directory: Path, writer: str) -> bool:
+    """True while the writer's journal is open in some process"""
+    if not writer:
+        return False
+    try:
+        with open(lock_path(directory, writer), 'rb') as f:
+            if not _try_lock(f):
+                return True
+            _unlock(f)
+            return False
+    except FileNotFoundError:
+        return False
+
+
+def read_segment(path: Path) -> Tuple[List[dict], int]:
+    """Records of a segment and the number of torn (unreadable) lines"""
+    records, torn = [], 0
+    with open(path, 'rb') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # A crash mid-write leaves at most a partial last line
+                torn += 1
+    return records, torn
+
+
+def replay_journal(paths: Iterable[Path], db_path: Optional[str] = None) -> Dict[str, int]:
+    """Apply segments to SQLite and delete each one once committed"""
+    stats = {'segments': 0, 'events': 0, 'applied': 0, 'torn': 0}
+    for path in paths:
+        try:
+            records, torn = read_segment(path)
+        except FileNotFoundError:
+            # Already applied by a concurrent checkpoint
+            continue
+        rows = [
+            (r['event_id'], r['student_pk'], r['timestamp'][:10], r['timestamp'][11:19], r.get('status', 'Present'))
+            for r in records
+        ]
+        with DatabaseConnection(db_path) as cursor:
+            stats['applied'] += insert_attendance_events(cursor, rows)
+        path.unlink(missing_ok=True)
+        stats['segments'] += 1
+        stats['events'] += len(rows)
+        stats['torn'] += torn
+    if stats['applied'] or stats['torn']:
+        logging.info(
+            f"Journal replay applied {stats['applied']} of {stats['events']} events "
+            f"from {stats['segments']} segments ({stats['torn']} torn lines)"
+        )
+    return stats
+
+
+class AttendanceJournal:
+    """Append-only JSONL segments with group fsync"""
+
+    def __init__(self,
+                 directory: Optional[Path] = None,
+                 group_size: int = 32,
+                 fsync_ms: float = 50.0,
+                 segment_bytes: int = 1 << 20):
+        self.directory = Path(directory or JOURNAL_DIR)
+        self.group_size = group_size
+        self.fsync_interval = fsync_ms / 1000.0
+        self.segment_bytes = segment_bytes
+        self.stats = {'appended': 0, 'fsyncs': 0, 'segments': 0, 'bytes': 0}
+        # Unique per journal, so concurrent processes never share a file name
+        self.writer = f"{os.getpid()}.{uuid.uuid4().hex[:8]}"
+        self._seq = 0
+        self._lock_file = None
+        # _sync_lock serializes fsync/rotation; _cond guards the buffer and
+        # is only held for in-memory work, never across an fsync in append()
+        self._sync_lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._pending = 0
+        self._closed = False
+        # Segments are opened on the first append, so an idle bus leaves no files
+        self._file = None
+        self.active_path: Optional[Path] = None
+        # Detached by rotate() but not yet fsynced; not replayable until it is
+        self._sealing: Optional[Path] = None
+        self._segment_size = 0
+        self._thread = threading.Thread(target=self._flush_loop, name="journal-fsync", daemon=True)
+        self._thread.start()
+
+    def _open_segment(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if self._lock_file is None:
+            # Taken before the first segment exists, so other processes
+            # that see one of our segments also see the lock held
+            self._lock_file = open(lock_path(self.directory, self.writer), 'ab')
+            if not _try_lock(self._lock_file):
+                raise RuntimeError(f"Journal writer lock {self.writer} is already held")
+        self._seq += 1
+        self.active_path = self.directory / f"{SEGMENT_PREFIX}{self.writer}-{self._seq:08d}.jsonl"
+        self._file = open(self.active_path, 'ab')
+        self._segment_size = 0
+        self.stats['segments'] += 1
+
+    def append(self, event):
+        """Buffer one event; durable after the next group fsync"""
+        line = (json.dumps(asdict(event), separators=(',', ':')) + '\n').encode()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Journal is closed")
+            if self._file is None:
+                self._open_segment()
+            self._file.write(line)
+            self._pending += 1
+            self._segment_size += len(line)
+            self.stats['appended'] += 1
+            self.stats['bytes'] += len(line)
+            if self._pending >= self.group_size or self._segment_size >= self.segment_bytes:
+                self._cond.notify()
+
+    def sync(self):
+        """Flush and fsync everything appended so far"""
+        with self._sync_lock:
+            with self._cond:
+                if self._pending == 0 or self._closed:
+                    return
+                self._file.flush()
+                fd = self._file.fileno()
+                self._pending = 0
+            os.fsync(fd)
+            self.stats['fsyncs'] += 1
+
+    def rotate(self) -> Optional[Path]:
+        """Seal the active segment; the next append starts a new one"""
+        with self._sync_lock:
+            with self._cond:
+                file, sealed = self._detach_locked()
+            self._seal(file, sealed)
+        return sealed
+
+    def _detach_locked(self) -> Tuple[Optional[BinaryIO], Optional[Path]]:
+        """Take the active segment out of use (``_cond`` held)
+
+        Only the in-memory swap happens under ``_cond``; the caller seals
+        the file with ``_seal`` afterwards, like ``sync``, so appends go on
+        to a new segment instead of waiting for the fsync.
+        """
+        if self._file is None:
+            return None, None
+        file, sealed = self._file, self.active_path
+        file.flush()
+        self._sealing = sealed
+        self._file = None
+        self.active_path = None
+        self._pending = 0
+        self._segment_size = 0
+        return file, sealed
+
+    def _seal(self, file: Optional[BinaryIO], path: Optional[Path]):
+        if file is None:
+            return
+        try:
+            os.fsync(file.fileno())
+            self.stats['fsyncs'] += 1
+        finally:
+            file.close()
+            with self._cond:
+                if self._sealing == path:
+                    self._sealing = None
+
+    def sealed_segments(self) -> List[Path]:
+        """Segments safe to replay: ours except the active one, and those of
+        writers that are no longer running"""
+        # List under the lock: a segment opened between reading active_path
+        # and the glob would otherwise be replayed and deleted while in use
+        with self._cond:
+            # Segments are listed before the locks are probed: a writer locks
+            # before creating its first segment, so a free lock means it is gone
+            paths = segment_paths(self.directory)
+            in_use = {self.active_path, self._sealing}
+        alive: Dict[str, bool] = {}
+        sealed = []
+        for path in paths:
+            writer = segment_writer(path)
+            if writer == self.writer:
+                if path not in in_use:
+                    sealed.append(path)
+                continue
+            if writer not in alive:
+                alive[writer] = writer_alive(self.directory, writer)
+            if not alive[writer]:
+                sealed.append(path)
+        self._prune_locks({segment_writer(path) for path in paths})
+        return sealed
+
+    def _prune_locks(self, writers_with_segments):
+        """Remove lock files left by crashed writers whose segments are gone"""
+        now = time.time()
+        for path in self.directory.glob(f"{SEGMENT_PREFIX}*{LOCK_SUFFIX}"):
+            writer = path.name[len(SEGMENT_PREFIX):-len(LOCK_SUFFIX)]
+            if writer == self.writer or writer in writers_with_segments:
+                continue
+            try:
+                if now - path.stat().st_mtime > STALE_LOCK_SECONDS and not writer_alive(self.directory, writer):
+                    path.unlink()
+            except OSError:
+                pass
+
+    def close(self):
+        """Seal the active segment, stop the flusher and release the writer lock
+
+        Segments not yet replayed stay on disk; with the lock released any
+        process (or the next start) replays them.
+        """
+        with self._sync_lock:
+            with self._cond:
+                file, sealed = self._detach_locked()
+                self._closed = True
+                self._cond.notify_all()
+            self._seal(file, sealed)
+        self._thread.join()
+        if self._lock_file is not None:
+            _unlock(self._lock_file)
+            self._lock_file.close()
+            self._lock_file = None
+            lock_path(self.directory, self.writer).unlink(missing_ok=True)
+
+    def _flush_loop(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._closed or self._pending > 0)
+                # Give the group a short window to fill before syncing it
+                self._cond.wait_for(
+                    lambda: self._closed or self._pending >= self.group_size
+                    or self._segment_size >= self.segment_bytes,
+                    timeout=self.fsync_interval
+                )
+                if self._closed:
+                    return
+                full = self._segment_size >= self.segment_bytes
+            try:
+                if full:
+                    self.rotate()
+                else:
+                    self.sync()
+            except OSError as e:
+                logging.error(f"Journal fsync failed: {e}")
@@ -0,0 +1,160 @@
+"""Asynchronous, structured, rate-limited logging
+
+Callers only put records on a queue; a QueueListener thread formats and
+writes them, so a slow disk never stalls the Tk loop. The file handler
+rotates and writes one JSON object per line (logs/app.jsonl); the console
+keeps the familiar text format.
+
+Each call site may emit ``burst`` records per ``window`` seconds and
+repeats of the same message inside the window are dropped; the next
+record let through reports how many were suppressed. Timing measurements
+go through ``log_timing``, bypass the limit and carry a ``timing`` object
+that benchmarks/log_timings.py aggregates.
+"""
+import atexit
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.config.config_manager import ConfigManager, ROOT_DIR
+
+LOG_DIR = ROOT_DIR / "logs"
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_listener: Optional[QueueListener] = None
+_setup_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, keeping ``timing`` and ``suppressed``"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "module": record.module,
+            "line": record.lineno,
+            "msg": record.getMessage(),
+        }
+        for key in ("timing", "suppressed"):
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """Per call site: at most ``burst`` records per ``window`` seconds, no repeats"""
+
+    def __init__(self, burst: int = 5, window: float = 10.0):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        # (pathname, lineno) -> [window start, passed, suppressed, last message]
+        self._sites: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "rate_limit", True) is False:
+            return True
+        key = (record.pathname, record.lineno)
+        message = record.getMessage()
+        now = time.monotonic()
+        with self._lock:
+            state = self._sites.get(key)
+            if state is None or now - state[0] >= self.window:
+                suppressed = state[2] if state is not None else 0
+                self._sites[key] = [now, 1, 0, message]
+            elif state[1] >= self.burst or message == state[3]:
+                state[2] += 1
+                return False
+            else:
+                state[1] += 1
+                state[3] = message
+                return True
+        if suppressed:
+            record.suppressed = suppressed
+            record.msg = f"{message} ({suppressed} similar messages suppressed)"
+            record.args = None
+        return True
+
+
+def log_timing(name: str, ms: float, message: Optional[str] = None, level: int = logging.INFO, **fields):
+    """Log a measurement as a structured ``timing`` record"""
+    logging.log(
+        level, message or f"{name} took {ms:.2f}ms",
+        # Measurements are never rate limited; callers choose how often to log them
+        extra={"timing": {"name": name, "ms": round(ms, 3), **fields}, "rate_limit": False},
+        stacklevel=2
+    )
+
+
+def setup_logging(file_name: str = "app", log_dir: Optional[Path] = None) -> QueueListener:
+    """Route the root logger through a queue to rotating file and console handlers"""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return _listener
+        cfg = ConfigManager().config.logging
+        log_dir = Path(log_dir or LOG_DIR)
+        log_dir.mkdir(parents=True, exist_ok=True)
+
+        file_handler = RotatingFileHandler(
+            log_dir / f"{file_name}.{'jsonl' if cfg.json else 'log'}",
+            maxBytes=int(cfg.max_mb * 1024 * 1024), backupCount=cfg.backups, encoding="utf-8"
+        )
+        file_handler.setFormatter(JsonFormatter() if cfg.json else logging.Formatter(TEXT_FORMAT))
+        console = logging.StreamHandler()
+        console.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+        records: queue.SimpleQueue = queue.SimpleQueue()
+        handler = QueueHandler(records)
+        handler.addFilter(RateLimitFilter(cfg.rate_limit_burst, cfg.rate_limit_window))
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(handler)
+        root.setLevel(cfg.level.upper())
+
+        _listener = QueueListener(records, file_handler, console, respect_handler_level=True)
+        _listener.start()
+        # Drain the queue before the interpreter exits
+        atexit.register(shutdown_logging)
+        return _listener
+
+
+def shutdown_logging():
+    """Flush queued records and close the handlers"""
+    global _listener
+    with _setup_lock:
+        listener, _listener = _listener, None
+    if listener is None:
+        return
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
+def read_timings(path: Path) -> List[dict]:
+    """``timing`` objects from one JSON log file, with their timestamps"""
+    timings = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if "timing" in entry:
+                timings.append(dict(entry["timing"], ts=entry["ts"]))
+    return timings
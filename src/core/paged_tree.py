@@ -0,0 +1,126 @@
+import logging
+import queue
+import threading
+from tkinter import ttk
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+# fetch_page(cursor, limit) -> (rows, next_cursor); next_cursor None at the end
+FetchPage = Callable[[Any, int], Tuple[List[Sequence], Any]]
+
+
+class PagedTreeLoader:
+    """Keyset-paginated, on-scroll loading for a ``ttk.Treeview``
+
+    Pages are queried on a worker thread and inserted from the Tk thread, so
+    each render step only ever touches ``page_size`` rows regardless of how
+    many rows the query matches.
+    """
+
+    def __init__(self,
+                 widget,
+                 tree: ttk.Treeview,
+                 scrollbar: ttk.Scrollbar,
+                 fetch_page: Optional[FetchPage] = None,
+                 page_size: int = 200,
+                 prefetch_at: float = 0.9,
+                 on_error: Optional[Callable[[Exception], None]] = None,
+                 on_page: Optional[Callable[[int, bool], None]] = None):
+        self.widget = widget
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.fetch_page = fetch_page
+        self.page_size = page_size
+        self.prefetch_at = prefetch_at
+        self.on_error = on_error
+        self.on_page = on_page
+
+        self.rows_loaded = 0
+        self.exhausted = False
+        self._cursor = None
+        self._loading = False
+        self._polling = False
+        self._generation = 0
+        self._results: "queue.Queue" = queue.Queue()
+
+        self.tree.configure(yscrollcommand=self._on_scroll)
+
+    def reset(self, fetch_page: Optional[FetchPage] = None):
+        """Bulk-clear the tree and start loading from the first page"""
+        if fetch_page is not None:
+            self.fetch_page = fetch_page
+        # Results from an older query are dropped when they arrive
+        self._generation += 1
+        self.tree.delete(*self.tree.get_children())
+        self.rows_loaded = 0
+        self.exhausted = False
+        self._cursor = None
+        self._loading = False
+        self.load_next()
+
+    def load_next(self):
+        """Fetch the next page in the background if one is not in flight
+
+        Does nothing until a fetch function is set (here or by ``reset``).
+        """
+        if self.fetch_page is None or self._loading or self.exhausted:
+            return
+        self._loading = True
+        threading.Thread(
+            target=self._fetch,
+            args=(self._generation, self._cursor),
+            name="tree-page",
+            daemon=True
+        ).start()
+        if not self._polling:
+            self._polling = True
+            self.widget.after(20, self._poll)
+
+    def _fetch(self, generation: int, cursor):
+        try:
+            rows, next_cursor = self.fetch_page(cursor, self.page_size)
+            self._results.put((generation, rows, next_cursor, None))
+        except Exception as e:
+            self._results.put((generation, [], None, e))
+
+    def _poll(self):
+        self._polling = False
+        try:
+            while self._loading:
+                generation, rows, next_cursor, error = self._results.get_nowait()
+                # Pages from a query replaced by reset() are dropped
+                if generation == self._generation:
+                    self._apply_page(rows, next_cursor, error)
+        except queue.Empty:
+            pass
+
+        if self._loading:
+            self._polling = True
+            try:
+                self.widget.after(20, self._poll)
+            except Exception:
+                # Widget destroyed while a page was loading
+                self._polling = False
+
+    def _apply_page(self, rows: List[Sequence], next_cursor, error: Optional[Exception]):
+        self._loading = False
+        if error is not None:
+            logging.error(f"Error loading page: {error}")
+            self.exhausted = True
+            if self.on_error is not None:
+                self.on_error(error)
+            return
+
+        for row in rows:
+            self.tree.insert("", "end", values=row)
+        self.rows_loaded += len(rows)
+        self._cursor = next_cursor
+        self.exhausted = next_cursor is None
+        if self.on_page is not None:
+            self.on_page(self.rows_loaded, self.exhausted)
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        # Also fires when a page fits on screen (last == 1.0), which keeps
+        # filling until the tree actually scrolls
+        if float(last) >= self.prefetch_at:
+            self.load_next()
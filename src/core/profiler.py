@@ -0,0 +1,262 @@
+"""Stage spans and on-demand profile captures for the live loops
+
+Hot paths wrap their stages in ``profiler.span("frame.detect")``. While
+profiling is off (the default) a span is a shared no-op context manager;
+when it is on, every span is recorded with its thread and timing, and
+per-stage totals are kept for a quick summary.
+
+``start_capture`` records for a while and then writes to logs/profiles:
+
+    <stamp>.trace.json   spans as a Chrome trace (chrome://tracing, Perfetto)
+    <stamp>.folded       sampled stacks of every thread, one "a;b;c count"
+                         line per stack (flamegraph.pl, speedscope)
+    <stamp>.prof/.txt    cProfile stats of the UI thread (mode "cprofile")
+
+Profiling is toggled from the Settings view or with ATTENDANCE_PROFILE=1;
+ATTENDANCE_PROFILE_SECONDS=N also starts a sampling capture at startup.
+"""
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Tuple
+
+from src.config.config_manager import ConfigManager, ROOT_DIR
+
+PROFILE_DIR = ROOT_DIR / "logs" / "profiles"
+
+_NULL_SPAN = nullcontext()
+
+# (name, thread id, start ns, duration ns)
+SpanRecord = Tuple[str, int, int, int]
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.profiler._record(self.name, self.start, time.perf_counter_ns() - self.start)
+        return False
+
+
+def collapse_stack(frame, thread_name: str) -> str:
+    """Folded-stack line for one thread, root first"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    names.append(thread_name)
+    return ";".join(reversed(names))
+
+
+class Capture:
+    """One profiling window; files are written when it stops"""
+
+    def __init__(self, mode: str, seconds: float, interval: float, directory: Path):
+        self.mode = mode
+        self.seconds = seconds
+        self.interval = interval
+        self.directory = directory
+        self.stamp = time.strftime("%Y%m%d_%H%M%S")
+        self.start_ns = time.perf_counter_ns()
+        self.samples: Counter = Counter()
+        self.paths: List[Path] = []
+        self.done = threading.Event()
+        self._stop = threading.Event()
+        self._profile: Optional[cProfile.Profile] = None
+        self._sampler: Optional[threading.Thread] = None
+
+    def start(self):
+        if self.mode == "cprofile":
+            # cProfile only sees the thread that enables it (the Tk thread)
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            self._sampler = threading.Thread(target=self._sample, name="profile-sampler", daemon=True)
+            self._sampler.start()
+
+    def _sample(self):
+        own = threading.get_ident()
+        deadline = time.monotonic() + self.seconds
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != own:
+                    self.samples[collapse_stack(frame, names.get(ident, str(ident)))] += 1
+            self._stop.wait(self.interval)
+        self._stop.set()
+
+    def stop(self):
+        self._stop.set()
+        if self._profile is not None:
+            self._profile.disable()
+        if self._sampler is not None and self._sampler is not threading.current_thread():
+            self._sampler.join()
+
+
+class Profiler:
+    """Process-wide span recorder and capture controller"""
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, 'initialized'):
+            self.config_manager = ConfigManager()
+            self.env_enabled = os.environ.get("ATTENDANCE_PROFILE", "") not in ("", "0")
+            self.events: Deque[SpanRecord] = deque(maxlen=self.config_manager.config.profiling.max_events)
+            self.totals: Dict[str, List[float]] = {}
+            self.capture: Optional[Capture] = None
+            self._lock = threading.Lock()
+            self.initialized = True
+
+    @property
+    def enabled(self) -> bool:
+        return self.env_enabled or self.config_manager.config.profiling.enabled
+
+    def span(self, name: str):
+        """Context manager timing one stage; free when profiling is off"""
+        if not self.enabled and self.capture is None:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def _record(self, name: str, start: int, duration: int):
+        with self._lock:
+            self.events.append((name, threading.get_ident(), start, duration))
+            total = self.totals.setdefault(name, [0, 0.0, 0.0])
+            ms = duration / 1e6
+            total[0] += 1
+            total[1] += ms
+            total[2] = max(total[2], ms)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Per-stage count, mean and max in milliseconds, slowest first"""
+        with self._lock:
+            totals = {name: list(values) for name, values in self.totals.items()}
+        return {
+            name: {"count": count, "mean_ms": round(total / count, 3), "max_ms": round(peak, 3)}
+            for name, (count, total, peak) in sorted(totals.items(), key=lambda kv: -kv[1][1])
+        }
+
+    def reset(self):
+        with self._lock:
+            self.events.clear()
+            self.totals.clear()
+
+    def start_capture(self, seconds: Optional[float] = None, mode: Optional[str] = None,
+                      directory: Optional[Path] = None) -> Capture:
+        """Start recording; a sampling capture stops itself after ``seconds``
+
+        cProfile must be enabled and disabled on the thread it profiles, so
+        in "cprofile" mode the caller ends the capture with ``stop_capture``
+        from the same thread (the Settings view schedules it with ``after``).
+        """
+        cfg = self.config_manager.config.profiling
+        with self._lock:
+            if self.capture is not None:
+                return self.capture
+            capture = Capture(
+                mode or cfg.mode,
+                cfg.capture_seconds if seconds is None else seconds,
+                cfg.sample_interval_ms / 1000.0,
+                Path(directory or PROFILE_DIR),
+            )
+            self.capture = capture
+        capture.start()
+        if capture.mode != "cprofile":
+            threading.Thread(target=self._finish_when_sampled, args=(capture,), daemon=True).start()
+        logging.info(f"Profile capture started ({capture.mode}, {capture.seconds:.0f}s)")
+        return capture
+
+    def _finish_when_sampled(self, capture: Capture):
+        capture._sampler.join()
+        self.stop_capture(capture)
+
+    def stop_capture(self, capture: Optional[Capture] = None) -> List[Path]:
+        """End the running capture (or only ``capture``) and write its files"""
+        with self._lock:
+            if self.capture is None or (capture is not None and capture is not self.capture):
+                return capture.paths if capture is not None else []
+            capture, self.capture = self.capture, None
+        capture.stop()
+        try:
+            capture.paths = self._write(capture)
+            logging.info(f"Profile written: {', '.join(str(p) for p in capture.paths)}")
+        except OSError as e:
+            logging.error(f"Could not write profile: {e}")
+        finally:
+            capture.done.set()
+        return capture.paths
+
+    def _write(self, capture: Capture) -> List[Path]:
+        capture.directory.mkdir(parents=True, exist_ok=True)
+        base = capture.directory / f"profile_{capture.stamp}"
+        paths = [self._write_trace(capture, base.with_suffix(".trace.json"))]
+
+        if capture.samples:
+            folded = base.with_suffix(".folded")
+            with open(folded, 'w') as f:
+                for stack, count in capture.samples.most_common():
+                    f.write(f"{stack} {count}\n")
+            paths.append(folded)
+
+        if capture._profile is not None:
+            prof = base.with_suffix(".prof")
+            capture._profile.dump_stats(str(prof))
+            text = io.StringIO()
+            pstats.Stats(capture._profile, stream=text).sort_stats("cumulative").print_stats(40)
+            base.with_suffix(".txt").write_text(text.getvalue())
+            paths.append(prof)
+        return paths
+
+    def _write_trace(self, capture: Capture, path: Path) -> Path:
+        with self._lock:
+            spans = [e for e in self.events if e[2] >= capture.start_ns]
+        pid = os.getpid()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        events = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": names.get(tid, str(tid))}}
+            for tid in {span[1] for span in spans}
+        ]
+        events += [
+            {
+                "name": name, "cat": name.split(".")[0], "ph": "X", "pid": pid, "tid": tid,
+                "ts": (start - capture.start_ns) / 1000, "dur": duration / 1000,
+            }
+            for name, tid, start, duration in spans
+        ]
+        with open(path, 'w') as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms",
+                       "otherData": {"mode": capture.mode, "summary": self.summary()}}, f)
+        return path
+
+
+profiler = Profiler()
+
+
+def start_from_env():
+    """Begin a sampling capture if ATTENDANCE_PROFILE_SECONDS is set"""
+    seconds = os.environ.get("ATTENDANCE_PROFILE_SECONDS")
+    if seconds:
+        profiler.start_capture(float(seconds), mode="sample")
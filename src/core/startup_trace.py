@@ -0,0 +1,88 @@
+import importlib
+import json
+import logging
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+LOG_DIR = Path(__file__).parent.parent.parent / "logs"
+
+
+class StartupTrace:
+    """Records time-to-interactive milestones and per-module import cost
+
+    For a full interpreter-level breakdown run ``python -X importtime main.py``;
+    this trace covers the imports the application itself defers.
+    """
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.marks: List[Dict[str, Any]] = []
+        self.imports: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.t0) * 1000
+
+    def mark(self, name: str):
+        """Record a milestone relative to process start"""
+        with self._lock:
+            self.marks.append({
+                "name": name,
+                "ms": round(self.elapsed_ms(), 2),
+                "thread": threading.current_thread().name
+            })
+        logging.debug(f"Startup mark {name}: {self.elapsed_ms():.1f}ms")
+
+    @contextmanager
+    def span(self, name: str):
+        """Record a named duration"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self.marks.append({
+                    "name": name,
+                    "ms": round(self.elapsed_ms(), 2),
+                    "duration_ms": round(duration, 2),
+                    "thread": threading.current_thread().name
+                })
+
+    def timed_import(self, module_name: str):
+        """Import a module, recording its cost if it was not loaded yet"""
+        if module_name in sys.modules:
+            return sys.modules[module_name]
+        start = time.perf_counter()
+        module = importlib.import_module(module_name)
+        with self._lock:
+            self.imports[module_name] = round((time.perf_counter() - start) * 1000, 2)
+        return module
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "marks": list(self.marks),
+                "imports_ms": dict(sorted(self.imports.items(), key=lambda kv: -kv[1]))
+            }
+
+    def write(self, path: Optional[Path] = None) -> Path:
+        """Dump the trace as JSON (default ``logs/startup_trace.json``)"""
+        path = Path(path or LOG_DIR / "startup_trace.json")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        summary = self.summary()
+        with open(path, 'w') as f:
+            json.dump(summary, f, indent=4)
+
+        interactive = next((m["ms"] for m in summary["marks"] if m["name"] == "first_paint"), None)
+        from src.core.log_setup import log_timing
+        log_timing("startup.first_paint", interactive or 0.0,
+                   f"Startup: interactive after {interactive}ms, imports {summary['imports_ms']}")
+        return path
+
+
+startup_trace = StartupTrace()
@@ -0,0 +1,234 @@
+import logging
+import threading
+import time
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from src.core.profiler import profiler
+from src.utils.curation import curate_dataset
+from src.utils.dataset import load_training_data, TrainingCancelled
+
+# Fractions of the overall progress bar assigned to each stage
+_STAGES = {
+    "load": (0.0, 0.5),
+    "preprocess": (0.5, 0.8),
+    "train": (0.8, 0.95),
+    "save": (0.95, 1.0),
+}
+
+
+@dataclass
+class TrainingJob:
+    """State of a single background training run"""
+    job_id: int
+    incremental: bool = False
+    student_ids: Optional[List[int]] = None
+    # Defaults: data/training_images and data/models/classifier.xml
+    data_dir: Optional[Path] = None
+    model_path: Optional[str] = None
+    state: str = "pending"  # pending, running, done, failed, cancelled
+    progress: float = 0.0
+    message: str = ""
+    error: Optional[str] = None
+    stats: dict = field(default_factory=dict)
+    cancel_event: threading.Event = field(default_factory=threading.Event)
+
+    def cancel(self):
+        """Request cancellation; checked between images"""
+        self.cancel_event.set()
+
+    @property
+    def finished(self) -> bool:
+        return self.state in ("done", "failed", "cancelled")
+
+
+class TrainingJobManager:
+    """Runs recognizer training off the UI thread and publishes new models"""
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, 'initialized'):
+            # One worker: jobs queue up instead of racing on the model file
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="training")
+            self._ids = itertools.count(1)
+            self._lock = threading.Lock()
+            self._subscribers: List[Callable[[str, int], None]] = []
+            self.model_version = 0
+            self.current_job: Optional[TrainingJob] = None
+            self.initialized = True
+
+    def subscribe(self, callback: Callable[[str, int], None]):
+        """Register ``callback(model_path, version)`` for newly published models"""
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[str, int], None]):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def submit(self,
+               incremental: bool = False,
+               student_ids: Optional[List[int]] = None,
+               on_progress: Optional[Callable[[TrainingJob], None]] = None,
+               on_done: Optional[Callable[[TrainingJob], None]] = None,
+               data_dir: Optional[Path] = None,
+               model_path: Optional[str] = None) -> TrainingJob:
+        """Queue a training job
+
+        An incremental job adds the images of ``student_ids`` to the current
+        model. That only works for students the model has never seen: LBPH
+        ``update`` appends, so re-adding a known student's images would
+        duplicate them. Jobs for known students run as full trainings.
+
+        Callbacks run on the training thread; UI code should hand results
+        back to Tk (e.g. through a queue polled with ``after``).
+        """
+        job = TrainingJob(next(self._ids), incremental, student_ids, data_dir, model_path)
+        self._executor.submit(self._run, job, on_progress, on_done)
+        return job
+
+    def _run(self, job: TrainingJob, on_progress, on_done):
+        # Imported lazily so the manager can be created before cv2 is loaded
+        from src.utils.face_utils import FaceDetector
+
+        self.current_job = job
+        job.state = "running"
+
+        def report(stage):
+            start, end = _STAGES[stage]
+
+            def callback(fraction: float, message: str):
+                job.progress = start + (end - start) * fraction
+                job.message = message
+                if on_progress is not None:
+                    on_progress(job)
+            return callback
+
+        try:
+            detector = FaceDetector()
+            start_time = time.perf_counter()
+
+            incremental = job.incremental
+            if incremental:
+                detector.load_trained_model(job.model_path, with_shards=False)
+                if not detector.model_loaded:
+                    logging.info("No existing model, falling back to full training")
+                    incremental = False
+                elif not job.student_ids:
+                    logging.info("Incremental job without students, running full training")
+                    incremental = False
+                else:
+                    known = set(detector.recognizer.getLabels().ravel().tolist())
+                    if known & set(job.student_ids):
+                        logging.info(
+                            f"Students {sorted(known & set(job.student_ids))} are already in the model, "
+                            f"falling back to full training"
+                        )
+                        incremental = False
+
+            with profiler.span("training.load"):
+                faces, ids = load_training_data(
+                    job.data_dir,
+                    student_ids=job.student_ids if incremental else None,
+                    progress=report("load"),
+                    cancel_event=job.cancel_event
+                )
+            with profiler.span("training.curate"):
+                # Drop near-duplicates and cap each student's share
+                faces, ids, curation = curate_dataset(faces, ids)
+            load_time = (time.perf_counter() - start_time) * 1000
+
+            def preprocess_progress(fraction: float, message: str):
+                report("preprocess")(fraction, message)
+                if fraction >= 1.0:
+                    report("train")(0.0, "Training model...")
+
+            with profiler.span("training.fit"):
+                if incremental:
+                    processed, labels = detector.update_recognizer(faces, ids, preprocess_progress, job.cancel_event)
+                else:
+                    processed, labels = detector.train_recognizer(faces, ids, preprocess_progress, job.cancel_event)
+            if job.cancel_event.is_set():
+                raise TrainingCancelled()
+
+            report("save")(0.0, "Saving model...")
+            with profiler.span("training.save"):
+                job.model_path = detector.save_trained_model(job.model_path)
+            job.stats = {
+                "load_time_ms": load_time,
+                "training_time_ms": detector.performance_stats.get('training') or 0,
+                "images": len(faces),
+                "students": sorted(set(ids)),
+                "incremental": incremental,
+            }
+            if curation is not None:
+                job.stats["curation"] = {k: v for k, v in curation.items() if k != "students"}
+            with profiler.span("training.shards"):
+                self._build_shards(detector, processed, labels, incremental, job)
+            self._publish(job.model_path)
+
+            job.state = "done"
+            report("save")(1.0, "Training completed successfully")
+        except TrainingCancelled:
+            job.state = "cancelled"
+            job.message = "Training cancelled"
+            logging.info(f"Training job {job.job_id} cancelled")
+        except Exception as e:
+            job.state = "failed"
+            job.error = str(e)
+            job.message = f"Training error: {e}"
+            logging.error(f"Training job {job.job_id} failed: {e}")
+        finally:
+            self.current_job = None
+            if on_done is not None:
+                on_done(job)
+
+    def _build_shards(self, detector, faces, labels, incremental: bool, job: TrainingJob):
+        """Rebuild (or extend) the per-course/hash shards when sharding is on"""
+        cfg = detector.config_manager.config
+        if cfg.sharding.mode == "none":
+            return
+        from src.config.db_config import DatabaseConnection
+        from src.utils import sharding
+
+        with DatabaseConnection() as cursor:
+            assignments = sharding.shard_assignments(
+                cursor, labels, cfg.sharding.mode, cfg.sharding.hash_shards
+            )
+        threshold = cfg.recognition.lbph_threshold
+        if incremental:
+            existing = sharding.read_manifest()
+            if existing is None or existing.get("mode") != cfg.sharding.mode:
+                logging.warning("No shards for the current shard mode; run a full training to build them")
+                return
+            manifest = sharding.update_shards(faces, labels, assignments, threshold)
+        else:
+            manifest = sharding.train_shards(
+                faces, labels, assignments, cfg.sharding.mode,
+                detector.preprocessing, threshold, cancel_event=job.cancel_event
+            )
+        if manifest is not None:
+            job.stats["shards"] = len(manifest["shards"])
+
+    def _publish(self, model_path: str):
+        """Notify running recognizers that a new model file is in place"""
+        with self._lock:
+            self.model_version += 1
+            version = self.model_version
+            subscribers = list(self._subscribers)
+        logging.info(f"Publishing model version {version}: {model_path}")
+        for callback in subscribers:
+            try:
+                callback(model_path, version)
+            except Exception as e:
+                logging.error(f"Model subscriber failed: {e}")
@@ -0,0 +1,193 @@
+"""Streaming attendance exports straight from SQLite
+
+Usable from the UI or as a nightly job::
+
+    python -m src.db.export --kind attendance --format csv --out exports/
+"""
+import argparse
+import csv
+import logging
+import os
+import sqlite3
+import threading
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+
+from src.config.db_config import DatabaseConnection
+
+ATTENDANCE_COLUMNS = ["Student ID", "Name", "Time", "Date", "Status"]
+REPORT_COLUMNS = ["Student ID", "Name", "Days Present", "Marks", "First Seen", "Last Seen"]
+
+ATTENDANCE_SQL = '''
+SELECT s.student_id, s.name, a.time, a.date, a.status
+FROM attendance a
+JOIN students s ON s.id = a.student_pk
+WHERE a.date BETWEEN ? AND ?
+ORDER BY a.date, a.time, a.id
+'''
+
+# Same rows as ATTENDANCE_SQL, so progress reaches exactly 100%
+ATTENDANCE_COUNT_SQL = '''
+SELECT COUNT(*)
+FROM attendance a
+JOIN students s ON s.id = a.student_pk
+WHERE a.date BETWEEN ? AND ?
+'''
+
+# Aggregates come from the daily rollups, so they survive raw-row archiving
+REPORT_SQL = '''
+SELECT
+    s.student_id,
+    s.name,
+    COUNT(d.date),
+    COALESCE(SUM(d.marks), 0),
+    MIN(d.date || ' ' || d.first_seen),
+    MAX(d.date || ' ' || d.last_seen)
+FROM students s
+LEFT JOIN attendance_daily d
+    ON d.student_pk = s.id AND d.date BETWEEN ? AND ?
+GROUP BY s.id
+ORDER BY s.student_id
+'''
+
+REPORT_COUNT_SQL = '''
+SELECT COUNT(*) FROM students
+'''
+
+EXPORT_KINDS = {
+    "attendance": (ATTENDANCE_SQL, ATTENDANCE_COUNT_SQL, ATTENDANCE_COLUMNS),
+    "report": (REPORT_SQL, REPORT_COUNT_SQL, REPORT_COLUMNS),
+}
+
+
+class ExportCancelled(Exception):
+    """Raised when an export is cancelled before completion"""
+
+
+def _iter_chunks(cursor: sqlite3.Cursor, chunk_size: int) -> Iterator[List[Tuple]]:
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        yield rows
+
+
+def _write_csv(path: Path, columns: Sequence[str], chunks: Iterator[List[Tuple]], on_chunk):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for rows in chunks:
+            writer.writerows(rows)
+            on_chunk(len(rows))
+
+
+def _write_parquet(path: Path, columns: Sequence[str], chunks: Iterator[List[Tuple]], on_chunk):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export requires the 'pyarrow' package")
+
+    # Everything is exported as strings so the schema never depends on data
+    schema = pa.schema([(name, pa.string()) for name in columns])
+    with pq.ParquetWriter(str(path), schema) as writer:
+        for rows in chunks:
+            arrays = [
+                pa.array([None if row[i] is None else str(row[i]) for row in rows], pa.string())
+                for i in range(len(columns))
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            on_chunk(len(rows))
+
+
+WRITERS = {
+    "csv": _write_csv,
+    "parquet": _write_parquet,
+}
+
+
+def export_rows(out_path: str,
+                start_date: str,
+                end_date: str,
+                kind: str = "attendance",
+                fmt: str = "csv",
+                chunk_size: int = 5000,
+                progress: Optional[Callable[[int, int], None]] = None,
+                cancel_event: Optional[threading.Event] = None,
+                db_path: Optional[str] = None) -> int:
+    """Stream an export to ``out_path`` in constant memory
+
+    Rows are fetched ``chunk_size`` at a time and written straight out; the
+    file is written under a temporary name and renamed when complete.
+    Returns the number of rows written.
+    """
+    if kind not in EXPORT_KINDS:
+        raise ValueError(f"Unknown export kind: {kind}")
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    query, count_query, columns = EXPORT_KINDS[kind]
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = out_path.with_name(out_path.name + ".part")
+
+    written = 0
+    try:
+        with DatabaseConnection(db_path) as cursor:
+            count_params = (start_date, end_date) if "?" in count_query else ()
+            cursor.execute(count_query, count_params)
+            total = cursor.fetchone()[0]
+            cursor.execute(query, (start_date, end_date))
+
+            def on_chunk(count):
+                nonlocal written
+                written += count
+                if progress is not None:
+                    progress(written, total)
+                if cancel_event is not None and cancel_event.is_set():
+                    raise ExportCancelled()
+
+            WRITERS[fmt](tmp_path, columns, _iter_chunks(cursor, chunk_size), on_chunk)
+
+        os.replace(tmp_path, out_path)
+    except BaseException:
+        if tmp_path.exists():
+            tmp_path.unlink()
+        raise
+
+    logging.info(f"Exported {written} {kind} rows ({start_date}..{end_date}) to {out_path}")
+    return written
+
+
+def default_filename(kind: str, start_date: str, end_date: str, fmt: str) -> str:
+    if start_date == end_date:
+        return f"{kind}_{start_date}.{fmt}"
+    return f"{kind}_{start_date}_{end_date}.{fmt}"
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command line entry point for scheduled (e.g. nightly) exports"""
+    yesterday = (date.today() - timedelta(days=1)).strftime("%Y-%m-%d")
+
+    parser = argparse.ArgumentParser(description="Export attendance data from SQLite")
+    parser.add_argument("--kind", choices=sorted(EXPORT_KINDS), default="attendance")
+    parser.add_argument("--format", dest="fmt", choices=sorted(WRITERS), default="csv")
+    parser.add_argument("--start", default=yesterday, help="First date (YYYY-MM-DD), default yesterday")
+    parser.add_argument("--end", default=None, help="Last date (YYYY-MM-DD), default --start")
+    parser.add_argument("--out", default="exports", help="Output file or directory")
+    parser.add_argument("--db", default=None, help="Database path")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    end_date = args.end or args.start
+    out = Path(args.out)
+    if out.suffix.lower() not in (".csv", ".parquet"):
+        out = out / default_filename(args.kind, args.start, end_date, args.fmt)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    export_rows(str(out), args.start, end_date, args.kind, args.fmt, args.chunk_size, db_path=args.db)
+
+
+if __name__ == "__main__":
+    main()
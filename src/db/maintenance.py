@@ -0,0 +1,290 @@
+"""Attendance retention, archiving and SQLite upkeep
+
+Raw attendance rows are archived per term (half year) into attached SQLite
+files or Parquet, leaving the daily rollups in the live database so reports
+keep working. Routine ``PRAGMA optimize``/``ANALYZE``/incremental vacuum runs
+on a schedule, and ``health_report`` shows size and query-plan health::
+
+    python -m src.db.maintenance report
+    python -m src.db.maintenance archive --before 2025-01-01
+"""
+import argparse
+import json
+import logging
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.config.config_manager import ConfigManager, ROOT_DIR
+from src.config.db_config import DatabaseConnection
+from src.db.rollups import rebuild_rollups, report_cache
+
+ARCHIVE_DIR = ROOT_DIR / "data" / "archive"
+
+ARCHIVE_SCHEMA_SQL = '''
+CREATE TABLE IF NOT EXISTS archive.attendance (
+    id INTEGER PRIMARY KEY,
+    student_pk INTEGER NOT NULL,
+    date DATE,
+    time TIME,
+    status TEXT
+);
+CREATE INDEX IF NOT EXISTS archive.idx_attendance_date_time
+    ON attendance (date, time);
+CREATE TABLE IF NOT EXISTS archive.students (
+    id INTEGER PRIMARY KEY,
+    student_id TEXT,
+    name TEXT,
+    email TEXT,
+    course TEXT,
+    created_at TIMESTAMP
+);
+'''
+
+# Below this many rows a full scan is a legitimate planner choice
+SCAN_ROW_LIMIT = 10000
+
+# Hot queries whose plans must stay on an index, with their main table
+HEALTH_QUERIES = {
+    "attendance_by_day": (
+        "attendance",
+        "SELECT a.id FROM attendance a JOIN students s ON s.id = a.student_pk "
+        "WHERE a.date = ? ORDER BY a.time DESC, a.id DESC LIMIT 200",
+        ("2000-01-01",)
+    ),
+    "rollup_range": (
+        "attendance_daily",
+        "SELECT student_pk, COUNT(*) FROM attendance_daily "
+        "WHERE date BETWEEN ? AND ? GROUP BY student_pk",
+        ("2000-01-01", "2000-12-31")
+    ),
+    "label_lookup": (
+        "recognizer_labels",
+        "SELECT s.id, s.name FROM recognizer_labels l JOIN students s ON s.id = l.student_pk "
+        "WHERE l.label = ?",
+        (1,)
+    ),
+}
+
+
+def term_of(day: str) -> Tuple[str, str, str]:
+    """Half-year term for a date: (name, first day, first day of next term)"""
+    d = datetime.strptime(day, "%Y-%m-%d").date()
+    if d.month <= 6:
+        return f"{d.year}H1", f"{d.year}-01-01", f"{d.year}-07-01"
+    return f"{d.year}H2", f"{d.year}-07-01", f"{d.year + 1}-01-01"
+
+
+def _archive_term_sqlite(cursor: sqlite3.Cursor, path: Path, start: str, end: str) -> int:
+    cursor.execute("ATTACH DATABASE ? AS archive", (str(path),))
+    try:
+        cursor.executescript(ARCHIVE_SCHEMA_SQL)
+        cursor.execute("""
+            INSERT OR REPLACE INTO archive.students
+            SELECT id, student_id, name, email, course, created_at FROM main.students
+        """)
+        cursor.execute("""
+            INSERT OR IGNORE INTO archive.attendance (id, student_pk, date, time, status)
+            SELECT id, student_pk, date, time, status FROM main.attendance
+            WHERE date >= ? AND date < ?
+        """, (start, end))
+        cursor.execute("DELETE FROM main.attendance WHERE date >= ? AND date < ?", (start, end))
+        moved = cursor.rowcount
+        cursor.connection.commit()
+    finally:
+        cursor.execute("DETACH DATABASE archive")
+    return moved
+
+
+def archive_before(cutoff: str,
+                   fmt: str = "sqlite",
+                   archive_dir: Optional[Path] = None,
+                   db_path: Optional[str] = None) -> Dict[str, int]:
+    """Move raw attendance older than ``cutoff`` into per-term archives
+
+    Daily rollups for the archived days are refreshed first and kept in the
+    live database. Returns rows archived per term.
+    """
+    archive_dir = Path(archive_dir or ARCHIVE_DIR)
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    archived: Dict[str, int] = {}
+
+    with DatabaseConnection(db_path) as cursor:
+        cursor.execute("SELECT MIN(date) FROM attendance WHERE date < ?", (cutoff,))
+        first = cursor.fetchone()[0]
+        if first is None:
+            return archived
+        # Make sure the rollups fully describe what is about to be removed
+        rebuild_rollups(cursor, first, cutoff)
+        cursor.connection.commit()
+
+        day = first
+        while day < cutoff:
+            name, start, next_start = term_of(day)
+            end = min(next_start, cutoff)
+            if fmt == "parquet":
+                from src.db.export import export_rows
+                last_day = (datetime.strptime(end, "%Y-%m-%d") - timedelta(days=1)).strftime("%Y-%m-%d")
+                path = archive_dir / f"attendance_{name}_{start}_{last_day}.parquet"
+                export_rows(str(path), start, last_day, db_path=db_path)
+                cursor.execute("DELETE FROM attendance WHERE date >= ? AND date < ?", (start, end))
+                moved = cursor.rowcount
+                cursor.connection.commit()
+            else:
+                moved = _archive_term_sqlite(cursor, archive_dir / f"attendance_{name}.db", start, end)
+            if moved:
+                archived[name] = moved
+                logging.info(f"Archived {moved} attendance rows for term {name}")
+            day = next_start
+
+    report_cache.invalidate()
+    return archived
+
+
+def enable_incremental_vacuum(db_path: Optional[str] = None) -> bool:
+    """Switch the database to incremental auto-vacuum (one full VACUUM)"""
+    with DatabaseConnection(db_path) as cursor:
+        cursor.execute("PRAGMA auto_vacuum")
+        if cursor.fetchone()[0] == 2:
+            return False
+        cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        cursor.connection.commit()
+        cursor.execute("VACUUM")
+    logging.info("Enabled incremental auto-vacuum")
+    return True
+
+
+def optimize(vacuum_pages: int = 2000, db_path: Optional[str] = None) -> Dict[str, Any]:
+    """Routine upkeep: planner statistics and a bounded incremental vacuum"""
+    start = time.perf_counter()
+    with DatabaseConnection(db_path) as cursor:
+        cursor.execute("PRAGMA freelist_count")
+        free_before = cursor.fetchone()[0]
+        cursor.execute("ANALYZE")
+        cursor.execute("PRAGMA optimize")
+        cursor.connection.commit()
+        # No-op unless auto_vacuum is INCREMENTAL
+        cursor.execute(f"PRAGMA incremental_vacuum({int(vacuum_pages)})")
+        cursor.fetchall()
+        cursor.execute("PRAGMA freelist_count")
+        free_after = cursor.fetchone()[0]
+    result = {
+        "freed_pages": free_before - free_after,
+        "duration_ms": round((time.perf_counter() - start) * 1000, 2)
+    }
+    logging.info(f"Database maintenance: {result}")
+    return result
+
+
+def health_report(db_path: Optional[str] = None) -> Dict[str, Any]:
+    """DB size, row counts and whether hot queries still use indexes"""
+    report: Dict[str, Any] = {"tables": {}, "queries": {}}
+    with DatabaseConnection(db_path) as cursor:
+        report["path"] = cursor.connection.execute("PRAGMA database_list").fetchone()[2]
+        page_size = cursor.execute("PRAGMA page_size").fetchone()[0]
+        page_count = cursor.execute("PRAGMA page_count").fetchone()[0]
+        freelist = cursor.execute("PRAGMA freelist_count").fetchone()[0]
+        report["size_bytes"] = page_size * page_count
+        report["free_bytes"] = page_size * freelist
+        report["auto_vacuum"] = ["none", "full", "incremental"][
+            cursor.execute("PRAGMA auto_vacuum").fetchone()[0]
+        ]
+
+        for table in ("students", "attendance", "attendance_daily", "recognizer_labels"):
+            try:
+                report["tables"][table] = cursor.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            except sqlite3.OperationalError:
+                report["tables"][table] = None
+
+        for name, (table, sql, params) in HEALTH_QUERIES.items():
+            try:
+                plan = [row[3] for row in cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+                start = time.perf_counter()
+                cursor.execute(sql, params).fetchall()
+                latency = (time.perf_counter() - start) * 1000
+            except sqlite3.OperationalError as e:
+                report["queries"][name] = {"error": str(e)}
+                continue
+            # A bare SCAN (no index) on a large table means a missing index
+            full_scans = [step for step in plan if step.startswith("SCAN") and "INDEX" not in step]
+            rows = report["tables"].get(table) or 0
+            report["queries"][name] = {
+                "plan": plan,
+                "latency_ms": round(latency, 3),
+                "healthy": not full_scans or rows < SCAN_ROW_LIMIT
+            }
+    return report
+
+
+class MaintenanceScheduler:
+    """Runs archiving and upkeep periodically on a daemon thread"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path
+        self.config_manager = ConfigManager()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="db-maintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def run_once(self):
+        cfg = self.config_manager.config.maintenance
+        if cfg.retention_days > 0:
+            cutoff = (date.today() - timedelta(days=cfg.retention_days)).strftime("%Y-%m-%d")
+            archive_before(cutoff, cfg.archive_format, db_path=self.db_path)
+        optimize(cfg.vacuum_pages, self.db_path)
+
+    def _run(self):
+        # Give startup a head start before touching the database
+        if self._stop.wait(60):
+            return
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                logging.error(f"Database maintenance failed: {e}")
+            interval = self.config_manager.config.maintenance.interval_hours * 3600
+            if self._stop.wait(max(interval, 60)):
+                return
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Attendance database maintenance")
+    parser.add_argument("--db", default=None, help="Database path")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("report", help="Print size and query-plan health as JSON")
+    opt = sub.add_parser("optimize", help="ANALYZE, PRAGMA optimize and incremental vacuum")
+    opt.add_argument("--pages", type=int, default=None)
+    sub.add_parser("enable-incremental-vacuum", help="One-off VACUUM into incremental mode")
+    arc = sub.add_parser("archive", help="Archive raw attendance before a date")
+    arc.add_argument("--before", required=True, help="Cutoff date (YYYY-MM-DD), exclusive")
+    arc.add_argument("--format", dest="fmt", choices=["sqlite", "parquet"], default="sqlite")
+    arc.add_argument("--archive-dir", default=None)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if args.command == "report":
+        result = health_report(args.db)
+    elif args.command == "optimize":
+        pages = args.pages or ConfigManager().config.maintenance.vacuum_pages
+        result = optimize(pages, args.db)
+    elif args.command == "enable-incremental-vacuum":
+        result = {"changed": enable_incremental_vacuum(args.db)}
+    else:
+        result = archive_before(args.before, args.fmt, args.archive_dir, args.db)
+    print(json.dumps(result, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,9 @@ import logging
 from pathlib import Path
 from typing import List, Dict
 
+from src.db.rollups import ROLLUP_SQL
+from src.db.students import APPLIED_EVENTS_SQL, STUDENT_KEY_MIGRATION_SQL
+
 class Migration:
     """Base migration class"""
     version: int
@@ -41,10 +44,82 @@ class InitialMigration(Migration):
     DROP TABLE IF EXISTS settings;
     '''
 
+class DailyRollupMigration(Migration):
+    version = 2
+    # Frozen copy of the TEXT-keyed rollups; version 4 replaces them
+    up_sql = '''
+    CREATE TABLE IF NOT EXISTS attendance_daily (
+        student_id TEXT NOT NULL,
+        date DATE NOT NULL,
+        first_seen TIME,
+        last_seen TIME,
+        marks INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (student_id, date)
+    ) WITHOUT ROWID;
+
+    CREATE INDEX IF NOT EXISTS idx_attendance_daily_date
+        ON attendance_daily (date, student_id);
+
+    CREATE TRIGGER IF NOT EXISTS trg_attendance_daily_insert
+    AFTER INSERT ON attendance
+    BEGIN
+        INSERT INTO attendance_daily (student_id, date, first_seen, last_seen, marks)
+        VALUES (NEW.student_id, NEW.date, NEW.time, NEW.time, 1)
+        ON CONFLICT (student_id, date) DO UPDATE SET
+            first_seen = min(first_seen, excluded.first_seen),
+            last_seen = max(last_seen, excluded.last_seen),
+            marks = marks + 1;
+    END;
+
+    INSERT OR REPLACE INTO attendance_daily (student_id, date, first_seen, last_seen, marks)
+    SELECT student_id, date, MIN(time), MAX(time), COUNT(*)
+    FROM attendance
+    GROUP BY student_id, date;
+    '''
+    down_sql = '''
+    DROP TRIGGER IF EXISTS trg_attendance_daily_insert;
+    DROP TABLE IF EXISTS attendance_daily;
+    '''
+
+class AttendanceDateIndexMigration(Migration):
+    version = 3
+    up_sql = '''
+    CREATE INDEX IF NOT EXISTS idx_attendance_date_time
+        ON attendance (date, time);
+    '''
+    down_sql = '''
+    DROP INDEX IF EXISTS idx_attendance_date_time;
+    '''
+
+class StudentKeyMigration(Migration):
+    version = 4
+    up_sql = STUDENT_KEY_MIGRATION_SQL + ROLLUP_SQL + '''
+    INSERT OR REPLACE INTO attendance_daily (student_pk, date, first_seen, last_seen, marks)
+    SELECT student_pk, date, MIN(time), MAX(time), COUNT(*)
+    FROM attendance
+    GROUP BY student_pk, date;
+    '''
+    down_sql = '''
+    DROP TRIGGER IF EXISTS trg_attendance_daily_insert;
+    DROP TABLE IF EXISTS attendance_daily;
+    DROP TABLE IF EXISTS recognizer_labels;
+    '''
+
+class AppliedEventsMigration(Migration):
+    version = 5
+    up_sql = APPLIED_EVENTS_SQL
+    down_sql = '''
+    DROP TABLE IF EXISTS attendance_events;
+    '''
+
 def get_migrations() -> List[Migration]:
     """Get all migrations in order"""
     return [
-        InitialMigration
+        InitialMigration,
+        DailyRollupMigration,
+        AttendanceDateIndexMigration,
+        StudentKeyMigration,
+        AppliedEventsMigration
     ]
 
 def migrate(db_path: str):
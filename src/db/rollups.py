@@ -0,0 +1,159 @@
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from src.config.config_manager import ConfigManager
+
+# One row per student per day, maintained by a trigger on every raw insert
+ROLLUP_SQL = '''
+CREATE TABLE IF NOT EXISTS attendance_daily (
+    student_pk INTEGER NOT NULL REFERENCES students(id),
+    date DATE NOT NULL,
+    first_seen TIME,
+    last_seen TIME,
+    marks INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (student_pk, date)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_attendance_daily_date
+    ON attendance_daily (date, student_pk);
+
+CREATE TRIGGER IF NOT EXISTS trg_attendance_daily_insert
+AFTER INSERT ON attendance
+BEGIN
+    INSERT INTO attendance_daily (student_pk, date, first_seen, last_seen, marks)
+    VALUES (NEW.student_pk, NEW.date, NEW.time, NEW.time, 1)
+    ON CONFLICT (student_pk, date) DO UPDATE SET
+        first_seen = min(first_seen, excluded.first_seen),
+        last_seen = max(last_seen, excluded.last_seen),
+        marks = marks + 1;
+END;
+'''
+
+REPORT_SQL = '''
+SELECT
+    s.student_id,
+    s.name,
+    COALESCE(d.days_present, 0) AS days_present
+FROM students s
+LEFT JOIN (
+    SELECT student_pk, COUNT(*) AS days_present
+    FROM attendance_daily
+    WHERE date BETWEEN ? AND ?
+    GROUP BY student_pk
+) d ON d.student_pk = s.id
+ORDER BY s.student_id
+'''
+
+
+def ensure_rollups(cursor: sqlite3.Cursor):
+    """Create the rollup table and trigger, backfilling on first use"""
+    cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='attendance_daily'"
+    )
+    existed = cursor.fetchone() is not None
+    cursor.executescript(ROLLUP_SQL)
+    if not existed:
+        rebuild_rollups(cursor)
+
+
+def rebuild_rollups(cursor: sqlite3.Cursor,
+                    start_date: Optional[str] = None,
+                    end_date: Optional[str] = None) -> int:
+    """Recompute rollups from raw attendance (compaction job)
+
+    Without a date range every rollup row is rebuilt. Rollups for days whose
+    raw rows have already been archived are left untouched.
+    """
+    where = ""
+    params: Tuple = ()
+    if start_date is not None and end_date is not None:
+        where = "WHERE date BETWEEN ? AND ?"
+        params = (start_date, end_date)
+
+    cursor.execute(f'''
+        INSERT OR REPLACE INTO attendance_daily (student_pk, date, first_seen, last_seen, marks)
+        SELECT student_pk, date, MIN(time), MAX(time), COUNT(*)
+        FROM attendance
+        {where}
+        GROUP BY student_pk, date
+    ''', params)
+    rebuilt = cursor.rowcount
+    report_cache.invalidate()
+    logging.info(f"Rebuilt {rebuilt} attendance rollup rows")
+    return rebuilt
+
+
+class ReportCache:
+    """Small LRU of report results keyed by date range
+
+    Each entry remembers a cheap write token (highest attendance and student
+    ids plus the student count); any new insert changes the token, so stale
+    entries are detected without an explicit invalidation call.
+    """
+
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Tuple, List[Tuple]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def write_token(cursor: sqlite3.Cursor) -> Tuple:
+        cursor.execute('''
+            SELECT
+                (SELECT MAX(id) FROM attendance),
+                (SELECT MAX(id) FROM students),
+                (SELECT COUNT(*) FROM students)
+        ''')
+        return tuple(cursor.fetchone())
+
+    def get(self, key: Tuple[str, str], token: Tuple) -> Optional[List[Tuple]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != token:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Tuple[str, str], token: Tuple, rows: List[Tuple]):
+        with self._lock:
+            self._entries[key] = (token, rows)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def resize(self, max_entries: int):
+        """Change the capacity, evicting the least recently used entries"""
+        with self._lock:
+            self.max_entries = max_entries
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+
+report_cache = ReportCache(ConfigManager().config.performance.report_cache_size)
+# Follow the Settings view and hot reloads of performance.report_cache_size
+ConfigManager().subscribe(lambda config: report_cache.resize(config.performance.report_cache_size))
+
+
+def attendance_report(cursor: sqlite3.Cursor,
+                      start_date: str,
+                      end_date: str) -> List[Tuple[str, str, int]]:
+    """Days present per student between two dates, read from the rollups"""
+    key = (start_date, end_date)
+    token = report_cache.write_token(cursor)
+    rows = report_cache.get(key, token)
+    if rows is None:
+        cursor.execute(REPORT_SQL, (start_date, end_date))
+        rows = cursor.fetchall()
+        report_cache.put(key, token, rows)
+    return rows
@@ -0,0 +1,171 @@
+import logging
+import sqlite3
+import threading
+from typing import Dict, Optional, Tuple
+
+# Recognizer labels map to the integer students.id; attendance references it
+LABELS_SQL = '''
+CREATE TABLE IF NOT EXISTS recognizer_labels (
+    label INTEGER PRIMARY KEY,
+    student_pk INTEGER NOT NULL UNIQUE REFERENCES students(id)
+);
+'''
+
+ATTENDANCE_SQL = '''
+CREATE TABLE IF NOT EXISTS attendance (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    student_pk INTEGER NOT NULL REFERENCES students(id),
+    date DATE,
+    time TIME,
+    status TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_attendance_date_time
+    ON attendance (date, time);
+'''
+
+# Ids of attendance events already written, so journal replay is idempotent
+APPLIED_EVENTS_SQL = '''
+CREATE TABLE IF NOT EXISTS attendance_events (
+    event_id TEXT PRIMARY KEY
+) WITHOUT ROWID;
+'''
+
+# Moves a TEXT-keyed attendance table onto students.id. Rows whose student_id
+# is NULL or matches no student are kept aside in attendance_unmatched.
+STUDENT_KEY_MIGRATION_SQL = LABELS_SQL + '''
+INSERT OR IGNORE INTO recognizer_labels (label, student_pk)
+SELECT CAST(student_id AS INTEGER), id
+FROM students
+WHERE student_id <> '' AND student_id NOT GLOB '*[^0-9]*';
+
+CREATE TABLE IF NOT EXISTS attendance_unmatched AS
+SELECT * FROM attendance WHERE 0;
+
+INSERT INTO attendance_unmatched
+SELECT * FROM attendance
+WHERE student_id IS NULL
+   OR student_id NOT IN (SELECT student_id FROM students WHERE student_id IS NOT NULL);
+
+CREATE TABLE attendance_new (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    student_pk INTEGER NOT NULL REFERENCES students(id),
+    date DATE,
+    time TIME,
+    status TEXT
+);
+
+INSERT INTO attendance_new (id, student_pk, date, time, status)
+SELECT a.id, s.id, a.date, a.time, a.status
+FROM attendance a
+JOIN students s ON s.student_id = a.student_id;
+
+DROP TABLE attendance;
+ALTER TABLE attendance_new RENAME TO attendance;
+
+CREATE INDEX IF NOT EXISTS idx_attendance_date_time
+    ON attendance (date, time);
+
+DROP TRIGGER IF EXISTS trg_attendance_daily_insert;
+DROP TABLE IF EXISTS attendance_daily;
+'''
+
+
+def has_student_keys(cursor: sqlite3.Cursor) -> bool:
+    """True if attendance already references students.id"""
+    cursor.execute("PRAGMA table_info(attendance)")
+    columns = {row[1] for row in cursor.fetchall()}
+    return not columns or "student_pk" in columns
+
+
+def migrate_student_keys(cursor: sqlite3.Cursor):
+    """Upgrade a legacy TEXT-keyed attendance table in place"""
+    if has_student_keys(cursor):
+        return
+    cursor.execute("SELECT COUNT(*) FROM attendance")
+    total = cursor.fetchone()[0]
+    # Explicit transaction: a failure part-way leaves the old table intact
+    cursor.executescript("BEGIN;" + STUDENT_KEY_MIGRATION_SQL + "COMMIT;")
+    cursor.execute("SELECT COUNT(*) FROM attendance")
+    migrated = cursor.fetchone()[0]
+    logging.info(
+        f"Migrated attendance to integer student keys: {migrated}/{total} rows, "
+        f"{total - migrated} unmatched rows kept in attendance_unmatched"
+    )
+
+
+def assign_label(cursor: sqlite3.Cursor, student_pk: int, student_id: str) -> int:
+    """Return the recognizer label for a student, allocating one if needed
+
+    Numeric student IDs keep their value as label (matching existing
+    ``user.<id>.<n>.jpg`` files) unless it is already taken; anything else
+    gets the next free label.
+    """
+    cursor.execute("SELECT label FROM recognizer_labels WHERE student_pk = ?", (student_pk,))
+    row = cursor.fetchone()
+    if row is not None:
+        return row[0]
+
+    label = None
+    if student_id and student_id.isdigit():
+        cursor.execute("SELECT 1 FROM recognizer_labels WHERE label = ?", (int(student_id),))
+        if cursor.fetchone() is None:
+            label = int(student_id)
+    if label is None:
+        cursor.execute("SELECT COALESCE(MAX(label), 0) + 1 FROM recognizer_labels")
+        label = cursor.fetchone()[0]
+
+    cursor.execute(
+        "INSERT INTO recognizer_labels (label, student_pk) VALUES (?, ?)",
+        (label, student_pk)
+    )
+    return label
+
+
+def insert_attendance_events(cursor: sqlite3.Cursor, rows) -> int:
+    """Insert (event_id, student_pk, date, time, status) rows, skipping
+    events that were already applied; returns the number inserted"""
+    applied = 0
+    for event_id, student_pk, date, time, status in rows:
+        cursor.execute("INSERT OR IGNORE INTO attendance_events (event_id) VALUES (?)", (event_id,))
+        if cursor.rowcount != 1:
+            continue
+        cursor.execute(
+            "INSERT INTO attendance (student_pk, date, time, status) VALUES (?, ?, ?, ?)",
+            (student_pk, date, time, status)
+        )
+        applied += 1
+    return applied
+
+
+class LabelDirectory:
+    """Cached recognizer label -> (students.id, name) lookups for hot paths"""
+
+    def __init__(self):
+        self._cache: Dict[int, Optional[Tuple[int, str]]] = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, cursor: sqlite3.Cursor, label: int) -> Optional[Tuple[int, str]]:
+        with self._lock:
+            if label in self._cache:
+                return self._cache[label]
+        cursor.execute("""
+            SELECT s.id, s.name
+            FROM recognizer_labels l
+            JOIN students s ON s.id = l.student_pk
+            WHERE l.label = ?
+        """, (int(label),))
+        row = cursor.fetchone()
+        result = (row[0], row[1]) if row else None
+        # Unknown labels are not cached so a late enrollment is picked up
+        if result is not None:
+            with self._lock:
+                self._cache[label] = result
+        return result
+
+    def invalidate(self):
+        with self._lock:
+            self._cache.clear()
+
+
+label_directory = LabelDirectory()
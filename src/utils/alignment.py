@@ -0,0 +1,126 @@
+"""Eye-based face alignment shared by enrollment, training and recognition
+
+Haar face boxes drift with head roll and framing, so LBPH sees the same
+person at many slightly different positions and needs many samples to
+cover them. Rotating and scaling every crop so the eyes land on fixed
+points removes most of that variation.
+"""
+import cv2
+import numpy as np
+import logging
+import math
+from typing import Optional, Sequence, Tuple
+
+from src.utils import assets
+from src.utils.image_utils import equalize_batch
+
+# Eye centres in the output crop, as fractions of its width/height
+LEFT_EYE = (0.32, 0.38)
+RIGHT_EYE = (0.68, 0.38)
+
+Point = Tuple[float, float]
+
+
+class EyeAligner:
+    """Aligns grayscale face crops on the eyes found by the eye cascade
+
+    Crops where two plausible eyes are not found are only resized, so the
+    output always has ``size`` and alignment never drops a sample.
+    """
+
+    def __init__(self,
+                 size: Tuple[int, int] = (200, 200),
+                 eye_cascade: Optional[cv2.CascadeClassifier] = None):
+        self.size = size
+        # Each aligner gets its own classifier: the same detector's aligner is
+        # used by training jobs and by recognition on the Tk thread at once
+        self.eye_cascade = eye_cascade if eye_cascade is not None else assets.private_cascade("eye")
+        self.stats = {'aligned': 0, 'fallback': 0}
+
+    def find_eyes(self, gray_face: np.ndarray) -> Optional[Tuple[Point, Point]]:
+        """Centres of the (left, right) eye in crop coordinates, or None"""
+        height, width = gray_face.shape[:2]
+        # Eyes sit in the upper part of a Haar face box
+        upper = gray_face[:int(height * 0.6)]
+        min_eye = max(8, width // 10)
+        eyes = self.eye_cascade.detectMultiScale(
+            upper,
+            scaleFactor=1.1,
+            minNeighbors=5,
+            minSize=(min_eye, min_eye),
+            maxSize=(width // 2, width // 2)
+        )
+        if len(eyes) < 2:
+            return None
+
+        centres = [(x + w / 2.0, y + h / 2.0) for x, y, w, h in eyes]
+        left = [c for c in centres if c[0] < width / 2.0]
+        right = [c for c in centres if c[0] >= width / 2.0]
+        if not left or not right:
+            return None
+        # Pick the pair closest to level; stray detections (brows, nostrils)
+        # rarely pair up horizontally with a real eye
+        left_eye, right_eye = min(
+            ((l, r) for l in left for r in right),
+            key=lambda pair: abs(pair[1][1] - pair[0][1])
+        )
+        dx = right_eye[0] - left_eye[0]
+        if dx < width * 0.2 or abs(right_eye[1] - left_eye[1]) > dx:
+            return None
+        return left_eye, right_eye
+
+    def angle(self, gray_face: np.ndarray) -> Optional[float]:
+        """Roll angle in degrees, usable as ``AlignStage(aligner.angle)``"""
+        eyes = self.find_eyes(gray_face)
+        if eyes is None:
+            return None
+        (lx, ly), (rx, ry) = eyes
+        return math.degrees(math.atan2(ry - ly, rx - lx))
+
+    def align(self, gray_face: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Rotate, scale and crop so the eyes land on LEFT_EYE/RIGHT_EYE"""
+        width, height = self.size
+        eyes = self.find_eyes(gray_face)
+        if eyes is None:
+            self.stats['fallback'] += 1
+            return cv2.resize(gray_face, self.size, dst=out)
+
+        (lx, ly), (rx, ry) = eyes
+        angle = math.degrees(math.atan2(ry - ly, rx - lx))
+        desired = (RIGHT_EYE[0] - LEFT_EYE[0]) * width
+        scale = desired / math.hypot(rx - lx, ry - ly)
+        centre = ((lx + rx) / 2.0, (ly + ry) / 2.0)
+
+        matrix = cv2.getRotationMatrix2D(centre, angle, scale)
+        # Move the eye midpoint to its place in the output crop
+        matrix[0, 2] += (LEFT_EYE[0] + RIGHT_EYE[0]) / 2.0 * width - centre[0]
+        matrix[1, 2] += LEFT_EYE[1] * height - centre[1]
+        self.stats['aligned'] += 1
+        return cv2.warpAffine(gray_face, matrix, self.size, dst=out,
+                              flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+    def preprocess(self, gray_face: np.ndarray) -> np.ndarray:
+        """Aligned and histogram-equalized crop, ready for LBPH"""
+        return cv2.equalizeHist(self.align(gray_face))
+
+    def preprocess_batch(self,
+                         faces: Sequence[np.ndarray],
+                         out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Align and equalize a list of crops into one N x H x W stack"""
+        width, height = self.size
+        if out is None:
+            out = np.empty((len(faces), height, width), dtype=np.uint8)
+        for i, face in enumerate(faces):
+            if face.ndim == 3:
+                face = cv2.cvtColor(face, cv2.COLOR_BGR2GRAY)
+            self.align(face, out=out[i])
+        return equalize_batch(out, out)
+
+
+def create_aligner(size: Tuple[int, int] = (200, 200)) -> Optional[EyeAligner]:
+    """EyeAligner, or None (with a warning) if the eye cascade is unavailable"""
+    try:
+        return EyeAligner(size)
+    except assets.AssetError as e:
+        logging.warning(f"Face alignment disabled: {e}")
+        return None
@@ -0,0 +1,162 @@
+"""Offline model asset resolution and verification
+
+Assets are looked up in the bundled ``data`` directory first and then in the
+cascades shipped with OpenCV (``cv2.data.haarcascades``); nothing is ever
+downloaded at runtime. Validate everything at deploy time with::
+
+    python -m src.utils.assets
+"""
+import cv2
+import argparse
+import hashlib
+import logging
+import sys
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DATA_DIR = Path(__file__).parent.parent.parent / "data"
+
+
+class AssetError(Exception):
+    """Raised when a required asset is missing or fails verification"""
+
+
+@dataclass(frozen=True)
+class AssetSpec:
+    """A model file the application depends on"""
+    filename: str
+    sha256: Optional[str] = None  # None: not pinned, checksum is only logged
+    cv2_fallback: bool = True
+
+
+ASSETS: Dict[str, AssetSpec] = {
+    "frontalface": AssetSpec(
+        "haarcascade_frontalface_default.xml",
+        "0f7d4527844eb514d4a4948e822da90fbb16a34a0bbbbc6adc6498747a5aafb0"
+    ),
+    "eye": AssetSpec(
+        "haarcascade_eye.xml",
+        "71cc64fc305a355dc60067880f6fbbd43dd155bd63ee3844661a1bda34b2fd8c"
+    ),
+}
+
+_verified: Dict[Path, str] = {}
+_cascades: Dict[Path, cv2.CascadeClassifier] = {}
+_lock = threading.Lock()
+
+
+def sha256sum(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def candidate_paths(spec: AssetSpec) -> List[Path]:
+    """Locations searched for an asset, in priority order"""
+    paths = [DATA_DIR / spec.filename]
+    cv2_data = getattr(cv2, "data", None)
+    if spec.cv2_fallback and cv2_data is not None:
+        paths.append(Path(cv2_data.haarcascades) / spec.filename)
+    return paths
+
+
+def verify(path: Path, expected: Optional[str] = None) -> bool:
+    """Check a file against its pinned checksum, hashing each path only once"""
+    path = Path(path)
+    with _lock:
+        digest = _verified.get(path)
+    if digest is None:
+        digest = sha256sum(path)
+        with _lock:
+            _verified[path] = digest
+    return expected is None or digest == expected
+
+
+def resolve(name: str) -> Path:
+    """Return the path of a verified asset"""
+    if name not in ASSETS:
+        raise AssetError(f"Unknown asset: {name}")
+    spec = ASSETS[name]
+
+    for path in candidate_paths(spec):
+        if not path.exists():
+            continue
+        if verify(path, spec.sha256):
+            return path
+        logging.warning(f"Checksum mismatch for {name} at {path}, skipping")
+
+    raise AssetError(
+        f"Asset {name!r} ({spec.filename}) not found or failed verification; "
+        f"searched {[str(p) for p in candidate_paths(spec)]}"
+    )
+
+
+def load_cascade(path) -> cv2.CascadeClassifier:
+    """Parse a cascade once per path and share it between detectors
+
+    OpenCV classifiers must not be used from two threads at once, so only
+    detectors on the UI thread may share this instance; anything that can
+    run elsewhere uses ``private_cascade``.
+    """
+    path = Path(path)
+    with _lock:
+        cascade = _cascades.get(path)
+    if cascade is None:
+        cascade = cv2.CascadeClassifier(str(path))
+        if cascade.empty():
+            raise AssetError(f"Could not parse cascade: {path}")
+        with _lock:
+            cascade = _cascades.setdefault(path, cascade)
+    return cascade
+
+
+def cascade(name: str) -> cv2.CascadeClassifier:
+    """Resolve, verify and load a named cascade asset (shared instance)"""
+    return load_cascade(resolve(name))
+
+
+def private_cascade(name: str) -> cv2.CascadeClassifier:
+    """A new, unshared classifier for a named cascade asset"""
+    path = resolve(name)
+    classifier = cv2.CascadeClassifier(str(path))
+    if classifier.empty():
+        raise AssetError(f"Could not parse cascade: {path}")
+    return classifier
+
+
+def prewarm(names: Optional[List[str]] = None) -> Dict[str, str]:
+    """Validate (and parse) every asset; returns name -> path or error"""
+    results = {}
+    for name in names or ASSETS:
+        try:
+            path = resolve(name)
+            if path.suffix == ".xml":
+                load_cascade(path)
+            results[name] = str(path)
+            logging.info(f"Asset {name}: {path} (sha256 {_verified[path][:12]})")
+        except AssetError as e:
+            results[name] = f"ERROR: {e}"
+            logging.error(str(e))
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Deploy-time check that every asset resolves offline"""
+    parser = argparse.ArgumentParser(description="Validate bundled model assets")
+    parser.add_argument("names", nargs="*", help="Assets to check (default: all)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    results = prewarm(args.names or None)
+    failed = [name for name, value in results.items() if value.startswith("ERROR")]
+    for name, value in results.items():
+        print(f"{name}: {value}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
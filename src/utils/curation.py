@@ -0,0 +1,156 @@
+"""Training set curation: near-duplicate removal, per-student cap, balance
+
+Students who re-enrolled accumulate near-identical crops, and LBPH training
+time and model size grow with every one of them. Curation runs per student
+on the loaded grayscale crops, before preprocessing:
+
+1. crops whose dHash is within ``dedupe_distance`` bits of a crop already
+   kept are dropped (a negative distance disables this);
+2. the rest is capped at ``max_per_student`` by farthest-point sampling on
+   the hashes, so the most varied crops survive;
+3. with ``balance`` on, the cap is lowered to ``balance_ratio`` times the
+   median class size so no student dominates the gallery.
+
+Files on disk are never touched. To see what a training run would keep::
+
+    python -m src.utils.curation --max-per-student 40
+"""
+import argparse
+import json
+import logging
+import math
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.config.config_manager import ConfigManager
+from src.utils.recognition_cache import dhash
+
+
+def _popcount(values: np.ndarray) -> np.ndarray:
+    """Set bits of each uint64"""
+    return np.unpackbits(values.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+def face_hashes(faces: Sequence[np.ndarray]) -> np.ndarray:
+    return np.array([dhash(face) for face in faces], dtype=np.uint64)
+
+
+def dedupe(hashes: np.ndarray, max_distance: int) -> List[int]:
+    """Indices kept after greedily dropping near-duplicates"""
+    kept: List[int] = []
+    kept_hashes = np.empty(len(hashes), dtype=np.uint64)
+    for i, value in enumerate(hashes):
+        if kept and _popcount(kept_hashes[:len(kept)] ^ value).min() <= max_distance:
+            continue
+        kept_hashes[len(kept)] = value
+        kept.append(i)
+    return kept
+
+
+def farthest_point_subset(hashes: np.ndarray, count: int) -> List[int]:
+    """``count`` indices spread as far apart as possible in Hamming distance"""
+    if len(hashes) <= count:
+        return list(range(len(hashes)))
+    chosen = [0]
+    distance = _popcount(hashes ^ hashes[0]).astype(np.int64)
+    distance[0] = -1
+    for _ in range(count - 1):
+        # Chosen indices are masked with -1, so colliding hashes (distance
+        # 0) still yield distinct crops instead of repeating one
+        nearest = int(distance.argmax())
+        chosen.append(nearest)
+        distance = np.minimum(distance, _popcount(hashes ^ hashes[nearest]))
+        distance[chosen] = -1
+    return sorted(chosen)
+
+
+def curate(faces: List[np.ndarray], labels: List[int],
+           max_per_student: int = 60,
+           dedupe_distance: int = 2,
+           balance: bool = True,
+           balance_ratio: float = 2.0) -> Tuple[List[np.ndarray], List[int], Dict[str, Any]]:
+    """Curated faces and labels plus a report of what was dropped"""
+    hashes = face_hashes(faces)
+    by_label: Dict[int, List[int]] = defaultdict(list)
+    for i, label in enumerate(labels):
+        by_label[label].append(i)
+
+    deduped = {
+        label: [indices[j] for j in dedupe(hashes[indices], dedupe_distance)]
+        for label, indices in by_label.items()
+    }
+
+    cap = max_per_student if max_per_student > 0 else math.inf
+    if balance and deduped:
+        median = float(np.median([len(indices) for indices in deduped.values()]))
+        cap = min(cap, max(1, math.ceil(balance_ratio * median)))
+
+    keep: List[int] = []
+    students: Dict[int, Dict[str, int]] = {}
+    for label, indices in sorted(deduped.items()):
+        selected = indices
+        if len(indices) > cap:
+            selected = [indices[j] for j in farthest_point_subset(hashes[indices], int(cap))]
+        keep.extend(selected)
+        students[label] = {
+            "images": len(by_label[label]),
+            "duplicates": len(by_label[label]) - len(indices),
+            "capped": len(indices) - len(selected),
+            "kept": len(selected),
+        }
+
+    keep.sort()
+    report = {
+        "images": len(faces),
+        "kept": len(keep),
+        "duplicates": sum(s["duplicates"] for s in students.values()),
+        "capped": sum(s["capped"] for s in students.values()),
+        "cap": None if cap == math.inf else int(cap),
+        "students": students,
+    }
+    logging.info(
+        f"Curation kept {report['kept']} of {report['images']} images "
+        f"({report['duplicates']} near-duplicates, {report['capped']} over the cap of {report['cap']})"
+    )
+    return [faces[i] for i in keep], [labels[i] for i in keep], report
+
+
+def curate_dataset(faces: List[np.ndarray], labels: List[int]) -> Tuple[List[np.ndarray], List[int], Optional[Dict[str, Any]]]:
+    """``curate`` with the dataset config section; a no-op when disabled"""
+    cfg = ConfigManager().config.dataset
+    if not cfg.curate:
+        return faces, labels, None
+    return curate(faces, labels, cfg.max_per_student, cfg.dedupe_distance, cfg.balance, cfg.balance_ratio)
+
+
+def main(argv: Optional[List[str]] = None):
+    from src.utils.dataset import load_training_data
+
+    cfg = ConfigManager().config.dataset
+    parser = argparse.ArgumentParser(description="Report what training-set curation would keep")
+    parser.add_argument("--data-dir", default=None, help="Training images directory")
+    parser.add_argument("--max-per-student", type=int, default=cfg.max_per_student, help="0 disables the cap")
+    parser.add_argument("--dedupe-distance", type=int, default=cfg.dedupe_distance,
+                        help="Max dHash bits apart to count as duplicate (-1 disables)")
+    parser.add_argument("--balance-ratio", type=float, default=cfg.balance_ratio)
+    parser.add_argument("--no-balance", action="store_true")
+    parser.add_argument("--json", action="store_true", help="Print the full report as JSON")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    faces, labels = load_training_data(args.data_dir)
+    _, _, report = curate(faces, labels, args.max_per_student, args.dedupe_distance,
+                          not args.no_balance, args.balance_ratio)
+    if args.json:
+        print(json.dumps(report, indent=4))
+        return
+    print(f"{'label':>10} {'images':>8} {'dupes':>8} {'capped':>8} {'kept':>8}")
+    for label, row in report["students"].items():
+        print(f"{label:>10} {row['images']:>8} {row['duplicates']:>8} {row['capped']:>8} {row['kept']:>8}")
+    print(f"{'total':>10} {report['images']:>8} {report['duplicates']:>8} {report['capped']:>8} {report['kept']:>8}")
+
+
+if __name__ == "__main__":
+    main()
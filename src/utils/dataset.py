@@ -0,0 +1,107 @@
+import cv2
+import os
+import logging
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+TRAINING_DIR = Path(__file__).parent.parent.parent / "data" / "training_images"
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+class TrainingCancelled(Exception):
+    """Raised when a training job is cancelled mid-way"""
+
+
+def parse_label(filename: str) -> Optional[int]:
+    """Extract the recognizer label from a ``user.<id>.<n>.jpg`` filename"""
+    parts = filename.split('.')
+    if len(parts) < 3:
+        return None
+    try:
+        return int(parts[1])
+    except ValueError:
+        return None
+
+
+def list_flat_files(data_dir: Optional[Path] = None,
+                    wanted: Optional[set] = None) -> List[Tuple[Path, int]]:
+    """(path, label) pairs of ``user.<id>.<n>.jpg`` files in the top directory"""
+    data_dir = Path(data_dir or TRAINING_DIR)
+    files = []
+    for name in os.listdir(data_dir):
+        if not name.endswith(IMAGE_EXTENSIONS):
+            continue
+        label = parse_label(name)
+        if label is None:
+            logging.warning(f"Skipping invalid filename: {name}")
+            continue
+        if wanted is None or label in wanted:
+            files.append((data_dir / name, label))
+    return files
+
+
+def list_training_files(data_dir: Optional[Path] = None,
+                        student_ids: Optional[Iterable[int]] = None) -> List[Tuple[Path, int]]:
+    """List (path, label) pairs, optionally restricted to some students
+
+    Per-student directories are read from the manifest when there is one
+    (see src/utils/image_store.py); flat ``user.<id>.<n>.jpg`` files in the
+    top directory are always included, so a half-migrated tree still loads.
+    """
+    data_dir = Path(data_dir or TRAINING_DIR)
+    if not data_dir.exists():
+        raise ValueError("No training data directory found")
+
+    from src.utils.image_store import TrainingImageStore, indexed
+    wanted = set(student_ids) if student_ids is not None else None
+    files = []
+    if indexed(data_dir):
+        files.extend(TrainingImageStore(data_dir).files(wanted))
+    else:
+        for name in os.listdir(data_dir):
+            path = data_dir / name
+            if name.isdigit() and path.is_dir() and (wanted is None or int(name) in wanted):
+                # Student directories copied in without a manifest
+                files.extend((path / f, int(name)) for f in os.listdir(path) if f.endswith(IMAGE_EXTENSIONS))
+    files.extend(list_flat_files(data_dir, wanted))
+    return files
+
+
+def load_training_data(data_dir: Optional[Path] = None,
+                       student_ids: Optional[Iterable[int]] = None,
+                       progress: Optional[Callable[[float, str], None]] = None,
+                       cancel_event: Optional[threading.Event] = None) -> Tuple[List[np.ndarray], List[int]]:
+    """Load grayscale training images and their labels
+
+    ``progress`` receives a 0..1 fraction of files read; ``cancel_event``
+    is checked between files so long loads can be abandoned.
+    """
+    files = list_training_files(data_dir, student_ids)
+    logging.info(f"Found {len(files)} training images")
+
+    faces = []
+    ids = []
+    for i, (path, label) in enumerate(files):
+        if cancel_event is not None and cancel_event.is_set():
+            raise TrainingCancelled()
+        img = cv2.imread(str(path), cv2.IMREAD_GRAYSCALE)
+        if img is None:
+            logging.warning(f"Skipping unreadable image: {path.name}")
+        else:
+            faces.append(img)
+            ids.append(label)
+        if progress is not None and (i % 25 == 0 or i == len(files) - 1):
+            progress((i + 1) / len(files), f"Loading images {i + 1}/{len(files)}")
+
+    if not faces:
+        raise ValueError("No valid training images found")
+
+    # Log statistics for each student
+    for id_num, count in Counter(ids).items():
+        logging.info(f"Student ID {id_num}: {count} images")
+
+    return faces, ids
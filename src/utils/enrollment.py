@@ -0,0 +1,207 @@
+import cv2
+import numpy as np
+import logging
+import queue
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.utils.alignment import EyeAligner
+
+
+@dataclass
+class CropScore:
+    """Quality breakdown for a single enrollment crop"""
+    sharpness: float
+    size: int
+    symmetry: float
+    novelty: float
+    accepted: bool
+    reason: str = ""
+
+
+class CropQualityScorer:
+    """Scores face crops for sharpness, pose/size and diversity"""
+
+    def __init__(self,
+                 min_sharpness: float = 60.0,
+                 min_size: int = 80,
+                 min_symmetry: float = 0.6,
+                 min_novelty: float = 6.0,
+                 thumb_size: Tuple[int, int] = (32, 32)):
+        self.min_sharpness = min_sharpness
+        self.min_size = min_size
+        self.min_symmetry = min_symmetry
+        self.min_novelty = min_novelty
+        self.thumb_size = thumb_size
+
+    def thumbnail(self, gray_face: np.ndarray) -> np.ndarray:
+        """Small equalized thumbnail used for near-duplicate comparison"""
+        thumb = cv2.resize(gray_face, self.thumb_size, interpolation=cv2.INTER_AREA)
+        return cv2.equalizeHist(thumb).astype(np.int16)
+
+    def score(self,
+              gray_face: np.ndarray,
+              kept_thumbs: List[np.ndarray],
+              thumb: Optional[np.ndarray] = None) -> CropScore:
+        """Score a grayscale face crop against already-kept samples"""
+        size = int(min(gray_face.shape[:2]))
+        if size < self.min_size:
+            return CropScore(0.0, size, 0.0, 0.0, False, "too small")
+
+        # Variance of the Laplacian is a cheap focus/motion-blur measure
+        sharpness = float(cv2.Laplacian(gray_face, cv2.CV_64F).var())
+        if sharpness < self.min_sharpness:
+            return CropScore(sharpness, size, 0.0, 0.0, False, "blurry")
+
+        # Left/right symmetry as a yaw proxy: frontal faces mirror well
+        if thumb is None:
+            thumb = self.thumbnail(gray_face)
+        mirrored = thumb[:, ::-1]
+        symmetry = 1.0 - float(np.abs(thumb - mirrored).mean()) / 255.0
+        if symmetry < self.min_symmetry:
+            return CropScore(sharpness, size, symmetry, 0.0, False, "off-pose")
+
+        # Mean absolute difference to the closest kept sample
+        if kept_thumbs:
+            novelty = min(float(np.abs(thumb - kept).mean()) for kept in kept_thumbs)
+        else:
+            novelty = float("inf")
+        if novelty < self.min_novelty:
+            return CropScore(sharpness, size, symmetry, novelty, False, "duplicate")
+
+        return CropScore(sharpness, size, symmetry, novelty, True)
+
+
+class AsyncImageWriter:
+    """Background writer so cv2.imwrite never runs on the UI thread"""
+
+    def __init__(self,
+                 max_pending: int = 64,
+                 on_written: Optional[Callable[[Path, np.ndarray], None]] = None):
+        self.on_written = on_written
+        self.written = 0
+        self.failed = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name="image-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, path: Path, image: np.ndarray):
+        """Queue an image for writing; blocks only if the writer is far behind"""
+        self._queue.put((Path(path), image))
+
+    def close(self, wait: bool = True):
+        """Flush pending writes and stop the writer thread"""
+        self._queue.put(None)
+        if wait:
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            path, image = item
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                if not cv2.imwrite(str(path), image):
+                    raise IOError(f"cv2.imwrite returned False for {path}")
+                self.written += 1
+                if self.on_written is not None:
+                    self.on_written(path, image)
+            except Exception as e:
+                self.failed += 1
+                logging.error(f"Error writing enrollment image {path}: {e}")
+
+
+class EnrollmentSession:
+    """Keeps only sharp, frontal and diverse crops for one student"""
+
+    def __init__(self,
+                 label: int,
+                 data_dir: Path,
+                 target_count: int = 30,
+                 max_frames: int = 600,
+                 scorer: Optional[CropQualityScorer] = None,
+                 writer: Optional[AsyncImageWriter] = None,
+                 aligner: Optional[EyeAligner] = None,
+                 store=None,
+                 atlas=None):
+        self.label = label
+        self.data_dir = Path(data_dir)
+        # With a TrainingImageStore, crops go to <label>/<n>.jpg after the
+        # student's existing captures and are recorded in the manifest
+        self.store = store
+        self.first_index = store.next_index(label) if store is not None else 0
+        self._quality: Dict[Path, float] = {}
+        # The sharpest kept crop becomes the student's ThumbnailAtlas tile
+        self.atlas = atlas
+        self._best: Optional[Tuple[float, np.ndarray]] = None
+        self.target_count = target_count
+        self.max_frames = max_frames
+        self.scorer = scorer or CropQualityScorer()
+        self.writer = writer or AsyncImageWriter(on_written=self._on_written if store is not None else None)
+        # With an EyeAligner, pose and novelty are judged on aligned crops,
+        # so framing jitter alone no longer counts as a new sample
+        self.aligner = aligner
+        self.kept_thumbs: List[np.ndarray] = []
+        self.frames_seen = 0
+        self.rejected = {}
+
+    @property
+    def kept(self) -> int:
+        return len(self.kept_thumbs)
+
+    @property
+    def complete(self) -> bool:
+        return self.kept >= self.target_count or self.frames_seen >= self.max_frames
+
+    def offer(self, frame: np.ndarray, face_coords: Tuple[int, int, int, int]) -> CropScore:
+        """Score a detected face and queue it for writing if it is worth keeping"""
+        self.frames_seen += 1
+        x, y, w, h = face_coords
+        face = frame[y:y+h, x:x+w]
+        gray = cv2.cvtColor(face, cv2.COLOR_BGR2GRAY) if face.ndim == 3 else face
+
+        aligned = self.aligner.align(gray) if self.aligner is not None else gray
+        thumb = self.scorer.thumbnail(aligned)
+        result = self.scorer.score(gray, self.kept_thumbs, thumb)
+        if not result.accepted:
+            self.rejected[result.reason] = self.rejected.get(result.reason, 0) + 1
+            return result
+
+        if self.store is not None:
+            filename = self.store.image_path(self.label, self.first_index + self.kept)
+            self._quality[filename] = result.sharpness
+        else:
+            filename = self.data_dir / f"user.{self.label}.{self.kept}.jpg"
+        self.kept_thumbs.append(thumb)
+        # Copy so the camera buffer can be reused while the write is pending
+        face = face.copy()
+        self.writer.submit(filename, face)
+        if self._best is None or result.sharpness > self._best[0]:
+            self._best = (result.sharpness, face)
+        return result
+
+    def _on_written(self, path: Path, image: np.ndarray):
+        try:
+            self.store.add(self.label, path, quality=self._quality.pop(path, None))
+        except Exception as e:
+            logging.error(f"Could not record {path} in the image manifest: {e}")
+
+    def finish(self):
+        """Flush pending writes and log a capture summary"""
+        self.writer.close()
+        if self.atlas is not None and self._best is not None and self.writer.written:
+            try:
+                self.atlas.put(self.label, self._best[1], quality=self._best[0])
+            except Exception as e:
+                logging.error(f"Could not update the thumbnail for label {self.label}: {e}")
+        if self.aligner is not None:
+            logging.info(f"Enrollment alignment for label {self.label}: {self.aligner.stats}")
+        logging.info(
+            f"Enrollment for label {self.label}: kept {self.kept} of "
+            f"{self.frames_seen} frames, rejected {self.rejected}, "
+            f"written {self.writer.written}, failed {self.writer.failed}"
+        )
@@ -0,0 +1,365 @@
+"""Offline accuracy and latency evaluation of the LBPH recognizer
+
+Splits ``data/training_images`` into stratified folds (or a single holdout),
+trains one model per fold in parallel and writes a JSON and HTML report::
+
+    python -m src.utils.evaluation --folds 5
+    python -m src.utils.evaluation --holdout 0.2 --preprocessing equalize
+
+In every fold some students are left out of training entirely and used as
+impostors, so FAR is measured on people the model has never seen. Scores
+use the same 0-100 confidence scale as ``FaceDetector.predict_face``.
+"""
+import cv2
+import argparse
+import html
+import json
+import logging
+import os
+import random
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.config.config_manager import ConfigManager, ROOT_DIR
+from src.utils.alignment import create_aligner
+from src.utils.dataset import load_training_data
+from src.utils.face_utils import (
+    FACE_SIZE, LBPH_PARAMS, PREPROCESS_ALIGNED, PREPROCESS_EQUALIZE
+)
+
+REPORT_DIR = ROOT_DIR / "logs" / "evaluation"
+THRESHOLDS = list(range(0, 101, 2))
+
+
+def confidence_of(distance: float) -> float:
+    """LBPH distance -> the 0-100 confidence shown in the app"""
+    return 100.0 - min(100.0, distance)
+
+
+def percentiles(values: Sequence[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    arr = np.asarray(values)
+    return {
+        "p50": round(float(np.percentile(arr, 50)), 4),
+        "p90": round(float(np.percentile(arr, 90)), 4),
+        "p99": round(float(np.percentile(arr, 99)), 4),
+        "mean": round(float(arr.mean()), 4),
+    }
+
+
+def preprocess_faces(faces: List[np.ndarray], mode: str) -> np.ndarray:
+    """Preprocess every image once, exactly as training would"""
+    aligner = create_aligner(FACE_SIZE) if mode == PREPROCESS_ALIGNED else None
+    if aligner is not None:
+        return aligner.preprocess_batch(faces)
+    out = np.empty((len(faces), FACE_SIZE[1], FACE_SIZE[0]), dtype=np.uint8)
+    for i, face in enumerate(faces):
+        cv2.resize(cv2.equalizeHist(face), FACE_SIZE, dst=out[i])
+    return out
+
+
+def make_folds(labels: Sequence[int],
+               folds: int = 5,
+               holdout: float = 0.2,
+               unknown_per_fold: int = 1,
+               seed: int = 0) -> List[Dict[str, Any]]:
+    """Stratified split of sample indices
+
+    Each fold tests on its share of every enrolled student's images and on
+    all images of ``unknown_per_fold`` students excluded from training.
+    ``folds=1`` is a single holdout of ``holdout`` per student.
+    """
+    rng = random.Random(seed)
+    by_label: Dict[int, List[int]] = defaultdict(list)
+    for index, label in enumerate(labels):
+        by_label[label].append(index)
+    students = sorted(by_label)
+    # Keep at least two enrolled students in every fold
+    unknown_per_fold = max(0, min(unknown_per_fold, len(students) - 2))
+
+    assignments: Dict[int, List[List[int]]] = {}
+    for label in students:
+        indices = by_label[label][:]
+        rng.shuffle(indices)
+        if folds == 1:
+            cut = max(1, int(round(len(indices) * holdout)))
+            assignments[label] = [indices[:cut]]
+        else:
+            assignments[label] = [indices[k::folds] for k in range(folds)]
+
+    order = students[:]
+    rng.shuffle(order)
+    result = []
+    for k in range(folds):
+        unknown = {order[(k * unknown_per_fold + j) % len(order)] for j in range(unknown_per_fold)}
+        train, test, impostor = [], [], []
+        for label in students:
+            if label in unknown:
+                impostor.extend(by_label[label])
+                continue
+            test.extend(assignments[label][k])
+            held = set(assignments[label][k])
+            train.extend(i for i in by_label[label] if i not in held)
+        result.append({"fold": k, "train": train, "test": test,
+                       "impostor": impostor, "unknown": sorted(unknown)})
+    return result
+
+
+def _run_fold(faces: np.ndarray, labels: np.ndarray, fold: Dict[str, Any]) -> Dict[str, Any]:
+    """Train on one fold and score its genuine and impostor probes"""
+    start = time.perf_counter()
+    recognizer = cv2.face.LBPHFaceRecognizer_create(**LBPH_PARAMS)
+    train = fold["train"]
+    recognizer.train(list(faces[train]), labels[train])
+    train_ms = (time.perf_counter() - start) * 1000
+
+    def probe(indices):
+        results = []
+        for i in indices:
+            t0 = time.perf_counter()
+            predicted, distance = recognizer.predict(faces[i])
+            latency = (time.perf_counter() - t0) * 1000
+            results.append((int(labels[i]), int(predicted), confidence_of(distance), latency))
+        return results
+
+    return {
+        "fold": fold["fold"],
+        "unknown": fold["unknown"],
+        "train_size": len(train),
+        "train_ms": round(train_ms, 2),
+        "genuine": probe(fold["test"]),
+        "impostor": probe(fold["impostor"]),
+    }
+
+
+def error_curves(genuine: List[Tuple], impostor: List[Tuple]) -> List[Dict[str, Any]]:
+    """FAR/FRR (and mis-identification rate) for every confidence threshold
+
+    FRR counts enrolled probes not accepted as themselves; FAR counts
+    impostor probes accepted as anyone; misid counts enrolled probes
+    accepted under someone else's identity.
+    """
+    g_conf = np.array([g[2] for g in genuine])
+    g_right = np.array([g[0] == g[1] for g in genuine])
+    i_conf = np.array([i[2] for i in impostor])
+    curves = []
+    for t in THRESHOLDS:
+        accepted = g_conf >= t
+        curves.append({
+            "threshold": t,
+            "frr": round(float(1 - (accepted & g_right).mean()), 4) if len(g_conf) else None,
+            "misid": round(float((accepted & ~g_right).mean()), 4) if len(g_conf) else None,
+            "far": round(float((i_conf >= t).mean()), 4) if len(i_conf) else None,
+        })
+    return curves
+
+
+def equal_error_rate(curves: List[Dict[str, Any]]) -> Optional[Dict[str, float]]:
+    points = [c for c in curves if c["far"] is not None and c["frr"] is not None]
+    if not points:
+        return None
+    best = min(points, key=lambda c: abs(c["far"] - c["frr"]))
+    return {"threshold": best["threshold"], "rate": round((best["far"] + best["frr"]) / 2, 4)}
+
+
+def confusion(genuine: List[Tuple], impostor: List[Tuple], threshold: float) -> Dict[str, Dict[str, int]]:
+    """true label -> predicted label counts; rejections count as ``unknown``"""
+    matrix: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for true, predicted, conf, _ in genuine:
+        matrix[str(true)][str(predicted) if conf >= threshold else "unknown"] += 1
+    for true, predicted, conf, _ in impostor:
+        matrix[f"{true} (not enrolled)"][str(predicted) if conf >= threshold else "unknown"] += 1
+    return {k: dict(v) for k, v in sorted(matrix.items())}
+
+
+def gallery_latency(faces: np.ndarray,
+                    labels: np.ndarray,
+                    sizes: Sequence[int],
+                    probes: int = 200,
+                    seed: int = 0) -> List[Dict[str, Any]]:
+    """Predict latency percentiles for models trained on growing galleries
+
+    LBPH compares a probe against every stored histogram, so latency grows
+    with the number of training images rather than the number of students.
+    """
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(faces))
+    probe_idx = rng.choice(len(faces), size=min(probes, len(faces)), replace=False)
+    results = []
+    for size in sizes:
+        size = min(size, len(faces))
+        subset = order[:size]
+        recognizer = cv2.face.LBPHFaceRecognizer_create(**LBPH_PARAMS)
+        recognizer.train(list(faces[subset]), labels[subset])
+        latencies = []
+        for i in probe_idx:
+            t0 = time.perf_counter()
+            recognizer.predict(faces[i])
+            latencies.append((time.perf_counter() - t0) * 1000)
+        results.append({"gallery_size": int(size), "latency_ms": percentiles(latencies)})
+    return results
+
+
+def evaluate(data_dir: Optional[Path] = None,
+             folds: int = 5,
+             holdout: float = 0.2,
+             unknown_per_fold: int = 1,
+             preprocessing: Optional[str] = None,
+             workers: Optional[int] = None,
+             gallery_sizes: Optional[Sequence[int]] = None,
+             seed: int = 0) -> Dict[str, Any]:
+    """Run the full evaluation and return the report as a dict"""
+    config = ConfigManager().config.recognition
+    if preprocessing is None:
+        preprocessing = PREPROCESS_ALIGNED if config.align_faces else PREPROCESS_EQUALIZE
+
+    started = time.perf_counter()
+    raw_faces, raw_labels = load_training_data(data_dir)
+    faces = preprocess_faces(raw_faces, preprocessing)
+    labels = np.asarray(raw_labels, dtype=np.int32)
+    splits = make_folds(raw_labels, folds, holdout, unknown_per_fold, seed)
+
+    workers = workers or min(len(splits), os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            fold_results = list(pool.map(_run_fold, [faces] * len(splits), [labels] * len(splits), splits))
+    else:
+        fold_results = [_run_fold(faces, labels, fold) for fold in splits]
+
+    genuine = [g for r in fold_results for g in r["genuine"]]
+    impostor = [i for r in fold_results for i in r["impostor"]]
+    curves = error_curves(genuine, impostor)
+
+    def at(threshold):
+        point = min(curves, key=lambda c: abs(c["threshold"] - threshold))
+        return {"threshold": threshold, "far": point["far"], "frr": point["frr"], "misid": point["misid"]}
+
+    if gallery_sizes is None:
+        gallery_sizes = sorted({max(1, len(faces) // d) for d in (8, 4, 2, 1)})
+
+    report = {
+        "data": {
+            "images": len(faces),
+            "students": len(set(raw_labels)),
+            "preprocessing": preprocessing,
+            "folds": folds,
+            "holdout": holdout if folds == 1 else None,
+            "unknown_per_fold": unknown_per_fold,
+            "seed": seed,
+        },
+        "accuracy": round(float(np.mean([g[0] == g[1] for g in genuine])), 4) if genuine else None,
+        "operating_points": {
+            "confidence_threshold": at(config.confidence_threshold),
+            "strong_threshold": at(config.strong_threshold),
+        },
+        "eer": equal_error_rate(curves),
+        "curves": curves,
+        "confusion": confusion(genuine, impostor, config.confidence_threshold),
+        "folds": [{k: r[k] for k in ("fold", "unknown", "train_size", "train_ms")} for r in fold_results],
+        "predict_latency_ms": percentiles([g[3] for g in genuine + impostor]),
+        "gallery_latency": gallery_latency(faces, labels, gallery_sizes, seed=seed),
+        "duration_s": None,
+    }
+    report["duration_s"] = round(time.perf_counter() - started, 2)
+    return report
+
+
+def _svg_curves(curves: List[Dict[str, Any]], width: int = 480, height: int = 240) -> str:
+    series = [("frr", "#d62728"), ("far", "#1f77b4"), ("misid", "#ff7f0e")]
+    parts = [f'<svg width="{width}" height="{height}" style="border:1px solid #ccc">']
+    for key, colour in series:
+        points = [
+            f"{c['threshold'] / 100 * width:.1f},{height - c[key] * height:.1f}"
+            for c in curves if c[key] is not None
+        ]
+        if points:
+            parts.append(f'<polyline fill="none" stroke="{colour}" stroke-width="2" points="{" ".join(points)}"/>')
+            parts.append(f'<text x="5" y="{15 + 15 * series.index((key, colour))}" fill="{colour}">{key.upper()}</text>')
+    parts.append("</svg>")
+    return "".join(parts)
+
+
+def _html_table(headers: Sequence[str], rows: Sequence[Sequence[Any]]) -> str:
+    head = "".join(f"<th>{html.escape(str(h))}</th>" for h in headers)
+    body = "".join(
+        "<tr>" + "".join(f"<td>{html.escape(str(v))}</td>" for v in row) + "</tr>" for row in rows
+    )
+    return f"<table><tr>{head}</tr>{body}</table>"
+
+
+def render_html(report: Dict[str, Any]) -> str:
+    """Self-contained HTML view of a report"""
+    data = report["data"]
+    predicted = sorted({p for row in report["confusion"].values() for p in row})
+    sections = [
+        "<h1>Recognizer evaluation</h1>",
+        f"<p>{data['images']} images, {data['students']} students, "
+        f"{data['preprocessing']} preprocessing, {data['folds']} fold(s); "
+        f"accuracy {report['accuracy']}, EER {report['eer']}</p>",
+        "<h2>Operating points</h2>",
+        _html_table(["setting", "threshold", "FAR", "FRR", "mis-id"], [
+            [name, p["threshold"], p["far"], p["frr"], p["misid"]]
+            for name, p in report["operating_points"].items()
+        ]),
+        "<h2>FAR / FRR by confidence threshold</h2>",
+        _svg_curves(report["curves"]),
+        "<h2>Confusion (at confidence threshold)</h2>",
+        _html_table(["true \\ predicted"] + predicted, [
+            [true] + [row.get(p, "") for p in predicted] for true, row in report["confusion"].items()
+        ]),
+        "<h2>Predict latency vs gallery size (ms)</h2>",
+        _html_table(["gallery images", "p50", "p90", "p99", "mean"], [
+            [g["gallery_size"]] + [g["latency_ms"].get(k) for k in ("p50", "p90", "p99", "mean")]
+            for g in report["gallery_latency"]
+        ]),
+        "<h2>Folds</h2>",
+        _html_table(["fold", "not enrolled", "train images", "train ms"], [
+            [f["fold"], f["unknown"], f["train_size"], f["train_ms"]] for f in report["folds"]
+        ]),
+    ]
+    style = "body{font-family:sans-serif}table{border-collapse:collapse}td,th{border:1px solid #ccc;padding:2px 6px}"
+    return f"<html><head><meta charset='utf-8'><style>{style}</style></head><body>{''.join(sections)}</body></html>"
+
+
+def write_report(report: Dict[str, Any], out_dir: Optional[Path] = None) -> Tuple[Path, Path]:
+    out_dir = Path(out_dir or REPORT_DIR)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stamp = time.strftime("%Y%m%d_%H%M%S")
+    json_path = out_dir / f"evaluation_{stamp}.json"
+    html_path = out_dir / f"evaluation_{stamp}.html"
+    with open(json_path, 'w') as f:
+        json.dump(report, f, indent=4)
+    with open(html_path, 'w') as f:
+        f.write(render_html(report))
+    return json_path, html_path
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Evaluate recognizer accuracy and latency offline")
+    parser.add_argument("--data-dir", default=None, help="Training images directory")
+    parser.add_argument("--folds", type=int, default=5, help="Number of folds (1 = holdout)")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Test fraction when --folds 1")
+    parser.add_argument("--unknown", type=int, default=1, help="Students left out per fold as impostors")
+    parser.add_argument("--preprocessing", choices=[PREPROCESS_ALIGNED, PREPROCESS_EQUALIZE], default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--gallery-sizes", type=int, nargs="*", default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="Report directory")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    report = evaluate(args.data_dir, args.folds, args.holdout, args.unknown, args.preprocessing,
+                      args.workers, args.gallery_sizes, args.seed)
+    json_path, html_path = write_report(report, args.out)
+    print(json.dumps({k: report[k] for k in ("accuracy", "eer", "operating_points", "predict_latency_ms")}, indent=4))
+    print(f"Report written to {json_path} and {html_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,51 +1,125 @@
 import cv2
 import numpy as np
-from typing import Tuple, List, Optional
+from typing import Callable, Tuple, List, Optional
 import logging
+import threading
 import os
-import urllib.request
 from pathlib import Path
 import time  # Add this import
+import json
+
+from src.utils.dataset import TrainingCancelled
+from src.utils import assets
+from src.utils.alignment import EyeAligner, create_aligner
+from src.utils.recognition_cache import RecognitionCache
+from src.config.config_manager import ConfigManager
+from src.core.log_setup import log_timing
+
+MODEL_PATH = Path(__file__).parent.parent.parent / "data" / "models" / "classifier.xml"
+FACE_SIZE = (200, 200)
+# LBPH parameters shared by training and the evaluation harness
+LBPH_PARAMS = {"radius": 1, "neighbors": 8, "grid_x": 8, "grid_y": 8}
+
+# How crops are prepared before LBPH. Stored next to each saved model so a
+# model is always queried with the preprocessing it was trained with.
+PREPROCESS_EQUALIZE = "equalize"
+PREPROCESS_ALIGNED = "aligned"
+
+
+def model_meta_path(path: str) -> str:
+    return str(Path(path).with_suffix(".json"))
 
 class FaceDetector:
-    CASCADE_URL = "https://raw.githubusercontent.com/opencv/opencv/master/data/haarcascades/haarcascade_frontalface_default.xml"
-    
     def __init__(self, cascade_path: Optional[str] = None):
+        # Bundled or OpenCV-shipped cascades only; never downloaded at runtime
         if cascade_path is None:
-            cascade_path = str(Path(__file__).parent.parent.parent / "data" / "haarcascade_frontalface_default.xml")
-        
-        # Download cascade file if it doesn't exist
-        if not os.path.exists(cascade_path):
-            os.makedirs(os.path.dirname(cascade_path), exist_ok=True)
-            try:
-                urllib.request.urlretrieve(self.CASCADE_URL, cascade_path)
-                logging.info(f"Downloaded cascade file to {cascade_path}")
-            except Exception as e:
-                logging.error(f"Error downloading cascade file: {e}")
-                raise
+            self.face_cascade = assets.cascade("frontalface")
+        else:
+            if not os.path.exists(cascade_path):
+                raise assets.AssetError(f"Cascade file not found: {cascade_path}")
+            self.face_cascade = assets.load_cascade(cascade_path)
         
-        self.face_cascade = cv2.CascadeClassifier(cascade_path)
+        # Settings are read on every call so hot reloads apply immediately
+        self.config_manager = ConfigManager()
         self.recognizer = cv2.face.LBPHFaceRecognizer_create()
         self.model_loaded = False
+        # Models saved before alignment existed carry no metadata
+        self.preprocessing = PREPROCESS_EQUALIZE
+        self._aligner: Optional[EyeAligner] = None
+        self._aligner_checked = False
+        # ShardedModel searched before the full model, see src.utils.sharding
+        self.shards = None
+        perf = self.config_manager.config.performance
+        self.recognition_cache = RecognitionCache(
+            perf.recognition_cache_size,
+            perf.recognition_cache_ttl,
+            perf.recognition_cache_max_distance
+        )
         self.performance_stats = {
             'face_detection': [],
             'recognition': [],
-            'training': None
+            'training': None,
+            'recognition_cache': self.recognition_cache.stats
         }
 
+    @property
+    def aligner(self) -> Optional[EyeAligner]:
+        """This detector's eye aligner (own classifier), created on first use"""
+        if not self._aligner_checked:
+            self._aligner = create_aligner(FACE_SIZE)
+            self._aligner_checked = True
+        return self._aligner
+
+    def use_private_cascades(self):
+        """Give this detector its own cascade instances
+
+        Cascades are shared between detectors by default; one used from a
+        worker thread concurrently with others needs its own copies.
+        """
+        self.face_cascade = assets.private_cascade("frontalface")
+        # Aligners always build their own eye classifier
+        self._aligner = create_aligner(FACE_SIZE)
+        self._aligner_checked = True
+
+    def training_preprocessing(self) -> str:
+        """Preprocessing a newly trained model will use"""
+        if self.config_manager.config.recognition.align_faces and self.aligner is not None:
+            return PREPROCESS_ALIGNED
+        return PREPROCESS_EQUALIZE
+
+    def prepare_face(self, gray_face: np.ndarray, mode: Optional[str] = None) -> np.ndarray:
+        """Grayscale crop -> 200x200 LBPH input for the given preprocessing"""
+        mode = mode or self.preprocessing
+        if mode == PREPROCESS_ALIGNED and self.aligner is not None:
+            return self.aligner.preprocess(gray_face)
+        face = cv2.equalizeHist(gray_face)
+        return cv2.resize(face, FACE_SIZE)
+
     def detect_faces(self, frame: np.ndarray) -> List[Tuple[int, int, int, int]]:
         start_time = time.perf_counter()
+        cfg = self.config_manager.config.detection
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        scale = cfg.detection_scale
+        if 0 < scale < 1.0:
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        else:
+            scale = 1.0
         gray = cv2.equalizeHist(gray)
-        
+
+        min_size = max(1, int(cfg.min_face_size * scale))
+        max_size = max(min_size, int(cfg.max_face_size * scale))
         faces = self.face_cascade.detectMultiScale(
             gray,
-            scaleFactor=1.1,        # More gradual scaling
-            minNeighbors=5,         # Reduced to detect more faces
-            minSize=(30, 30),       # Smaller minimum size
-            maxSize=(300, 300),     # Add maximum size
+            scaleFactor=cfg.scale_factor,
+            minNeighbors=cfg.min_neighbors,
+            minSize=(min_size, min_size),
+            maxSize=(max_size, max_size),
             flags=cv2.CASCADE_SCALE_IMAGE
         )
+        if scale != 1.0 and len(faces):
+            # Map boxes back to full-resolution coordinates
+            faces = (np.asarray(faces) / scale).astype(np.int32)
         detection_time = (time.perf_counter() - start_time) * 1000
         self.performance_stats['face_detection'].append(detection_time)
         return faces
@@ -59,89 +133,217 @@ class FaceDetector:
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
         roi = gray[y:y+h, x:x+w]
         
-        # Normalize ROI
-        roi = cv2.equalizeHist(roi)
-        roi = cv2.resize(roi, (200, 200))
+        cache = self.recognition_cache
+        perf = self.config_manager.config.performance
+        cache_key = None
+        if perf.recognition_cache_size > 0 and roi.size > 0:
+            # Settings may change at runtime
+            cache.max_entries = perf.recognition_cache_size
+            cache.ttl = perf.recognition_cache_ttl
+            cache.max_distance = perf.recognition_cache_max_distance
+            cache_key = cache.key(roi, face_coords)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                self.performance_stats['recognition'].append((time.perf_counter() - start_time) * 1000)
+                return cached
+        
+        # Same preprocessing the loaded model was trained with
+        roi = self.prepare_face(roi)
         
         try:
-            id_, confidence = self.recognizer.predict(roi)
-            # Confidence is 0-100 where lower is better in OpenCV
-            confidence = 100 - min(100, confidence)
+            shards = self.shards
+            if shards is not None:
+                cfg = self.config_manager.config
+                id_, confidence = shards.predict(
+                    roi,
+                    self._to_confidence,
+                    cfg.recognition.strong_threshold,
+                    cfg.recognition.confidence_threshold,
+                    self._predict_full if cfg.sharding.fallback else None
+                )
+            else:
+                id_, confidence = self._predict_full(roi)
             prediction_time = (time.perf_counter() - start_time) * 1000
             self.performance_stats['recognition'].append(prediction_time)
+            if cache_key is not None:
+                cache.put(cache_key, (int(id_), confidence))
             return int(id_), confidence
         except Exception as e:
             logging.error(f"Prediction error: {e}")
             return -1, 0.0
 
-    def train_recognizer(self, faces: List[np.ndarray], labels: List[int]):
-        """Train the face recognizer"""
+    @staticmethod
+    def _to_confidence(distance: float) -> float:
+        # Confidence is 0-100 where lower is better in OpenCV
+        return 100 - min(100, distance)
+
+    def _predict_full(self, roi: np.ndarray) -> Tuple[int, float]:
+        id_, distance = self.recognizer.predict(roi)
+        return int(id_), self._to_confidence(distance)
+
+    def _preprocess_training_faces(self, faces: List[np.ndarray], labels: List[int],
+                                   progress: Optional[Callable[[float, str], None]] = None,
+                                   cancel_event: Optional[threading.Event] = None,
+                                   mode: Optional[str] = None):
+        """Align/equalize and resize training faces, dropping unusable ones"""
+        processed_faces = []
+        processed_labels = []
+
+        # Log preprocessing info
+        logging.info(f"Starting preprocessing of {len(faces)} images")
+
+        for i, (face, label) in enumerate(zip(faces, labels)):
+            if cancel_event is not None and cancel_event.is_set():
+                raise TrainingCancelled()
+            if face is not None and face.size > 0:
+                try:
+                    face = self.prepare_face(face, mode)
+                    processed_faces.append(face)
+                    processed_labels.append(label)
+                except Exception as e:
+                    logging.warning(f"Failed to process face for ID {label}: {e}")
+            if progress is not None and (i % 50 == 0 or i == len(faces) - 1):
+                progress((i + 1) / len(faces), f"Preprocessing {i + 1}/{len(faces)}")
+
+        if not processed_faces:
+            raise ValueError("No valid faces for training")
+
+        logging.info(f"Successfully preprocessed {len(processed_faces)} faces ({mode or self.preprocessing})")
+        if mode == PREPROCESS_ALIGNED and self.aligner is not None:
+            logging.info(f"Alignment: {self.aligner.stats}")
+        return processed_faces, processed_labels
+
+    def train_recognizer(self, faces: List[np.ndarray], labels: List[int],
+                         progress: Optional[Callable[[float, str], None]] = None,
+                         cancel_event: Optional[threading.Event] = None):
+        """Train the face recognizer
+
+        Returns the preprocessed faces and labels so shards can be built
+        from them without preprocessing again.
+        """
         try:
             start_time = time.perf_counter()
-            
-            processed_faces = []
-            processed_labels = []
-            
-            # Log preprocessing info
-            logging.info(f"Starting preprocessing of {len(faces)} images")
-            
-            for face, label in zip(faces, labels):
-                if face is not None and face.size > 0:
-                    try:
-                        face = cv2.equalizeHist(face)
-                        face = cv2.resize(face, (200, 200))
-                        processed_faces.append(face)
-                        processed_labels.append(label)
-                    except Exception as e:
-                        logging.warning(f"Failed to process face for ID {label}: {e}")
-            
-            if not processed_faces:
-                raise ValueError("No valid faces for training")
-            
-            logging.info(f"Successfully preprocessed {len(processed_faces)} faces")
-            
-            # Create and train recognizer
-            self.recognizer = cv2.face.LBPHFaceRecognizer_create(
-                radius=1,
-                neighbors=8,
-                grid_x=8,
-                grid_y=8,
-                threshold=100.0
+
+            mode = self.training_preprocessing()
+            processed_faces, processed_labels = self._preprocess_training_faces(
+                faces, labels, progress, cancel_event, mode
             )
-            
-            self.recognizer.train(processed_faces, np.array(processed_labels))
+
+            threshold = self.config_manager.config.recognition.lbph_threshold
+            cfg = self.config_manager.config.training
+            workers = cfg.workers or os.cpu_count() or 1
+            if workers > 1 and len(processed_faces) >= cfg.parallel_min_faces:
+                # Histograms from worker processes; see src.utils.parallel_training
+                from src.utils.parallel_training import train_parallel
+                recognizer = train_parallel(
+                    processed_faces, processed_labels, LBPH_PARAMS, threshold,
+                    workers, cfg.chunk_size, cancel_event
+                )
+            else:
+                # Create and train recognizer
+                recognizer = cv2.face.LBPHFaceRecognizer_create(**LBPH_PARAMS, threshold=threshold)
+                recognizer.train(processed_faces, np.array(processed_labels))
+            # Swap in only once training has fully succeeded
+            self.recognizer = recognizer
+            self.preprocessing = mode
             self.model_loaded = True
+            self.recognition_cache.clear()
             
             # Calculate and store training time
             training_time = (time.perf_counter() - start_time) * 1000
             self.performance_stats['training'] = training_time
             
             # Log success
-            logging.info(f"Training completed in {training_time:.2f}ms")
+            log_timing("training", training_time, f"Training completed in {training_time:.2f}ms",
+                       faces=len(processed_faces))
+            return processed_faces, processed_labels
             
         except Exception as e:
             logging.error(f"Training failed: {e}")
             raise
 
+    def update_recognizer(self, faces: List[np.ndarray], labels: List[int],
+                          progress: Optional[Callable[[float, str], None]] = None,
+                          cancel_event: Optional[threading.Event] = None):
+        """Incrementally add faces to an already trained model
+
+        Returns the preprocessed faces and labels, like train_recognizer.
+        """
+        if not self.model_loaded:
+            raise ValueError("No trained model to update")
+
+        start_time = time.perf_counter()
+        processed_faces, processed_labels = self._preprocess_training_faces(
+            faces, labels, progress, cancel_event
+        )
+        self.recognizer.update(processed_faces, np.array(processed_labels))
+        self.recognition_cache.clear()
+
+        training_time = (time.perf_counter() - start_time) * 1000
+        self.performance_stats['training'] = training_time
+        log_timing("training.incremental", training_time,
+                   f"Incremental update with {len(processed_faces)} faces in {training_time:.2f}ms",
+                   faces=len(processed_faces))
+        return processed_faces, processed_labels
+
     def save_trained_model(self, path: str = None):
-        """Save trained model to file"""
+        """Save trained model to file
+
+        The model is written to a temporary file and renamed into place so
+        readers never observe a half-written classifier. The metadata is
+        replaced last, so a change to it marks a complete model + metadata
+        pair; pollers watch it rather than the model (see src/api/server.py).
+        """
         if path is None:
-            path = str(Path(__file__).parent.parent.parent / "data" / "models" / "classifier.xml")
+            path = str(MODEL_PATH)
         os.makedirs(os.path.dirname(path), exist_ok=True)
-        self.recognizer.save(path)
+        meta_path = model_meta_path(path)
+        tmp_path = f"{path}.tmp"
+        self.recognizer.save(tmp_path)
+        with open(f"{meta_path}.tmp", 'w') as f:
+            json.dump({"preprocessing": self.preprocessing, "face_size": list(FACE_SIZE)}, f)
+        os.replace(tmp_path, path)
+        os.replace(f"{meta_path}.tmp", meta_path)
         return path
 
-    def load_trained_model(self, path: str = None):
-        """Load trained model from file"""
+    def load_trained_model(self, path: str = None, with_shards: bool = True):
+        """Load trained model from file, plus this kiosk's shards if sharding is on"""
         if path is None:
-            path = str(Path(__file__).parent.parent.parent / "data" / "models" / "classifier.xml")
+            path = str(MODEL_PATH)
         try:
             if os.path.exists(path):
-                self.recognizer.read(path)
+                recognizer = cv2.face.LBPHFaceRecognizer_create()
+                recognizer.read(path)
+                preprocessing = PREPROCESS_EQUALIZE
+                meta_path = model_meta_path(path)
+                if os.path.exists(meta_path):
+                    with open(meta_path, 'r') as f:
+                        preprocessing = json.load(f).get("preprocessing", PREPROCESS_EQUALIZE)
+                self.recognizer = recognizer
+                self.preprocessing = preprocessing
                 self.model_loaded = True
+                self.recognition_cache.clear()
+                if with_shards:
+                    self.load_shards()
             else:
                 logging.warning(f"Model file not found: {path}")
                 self.model_loaded = False
         except Exception as e:
             logging.error(f"Error loading model: {e}")
             self.model_loaded = False
+
+    def load_shards(self):
+        """Load the shards listed in ``sharding.active_shards`` (or drop them)"""
+        cfg = self.config_manager.config.sharding
+        if cfg.mode == "none":
+            self.shards = None
+            return
+        from src.utils.sharding import ShardedModel, active_shard_names
+        try:
+            names = active_shard_names(cfg.mode, cfg.active_shards, cfg.hash_shards)
+            self.shards = ShardedModel.load(names, self.preprocessing)
+        except Exception as e:
+            # Shards only speed up search; the full model stays in use
+            logging.error(f"Error loading shards, using the full model only: {e}")
+            self.shards = None
+        self.recognition_cache.clear()
@@ -0,0 +1,293 @@
+"""Per-student training image directories with a SQLite manifest
+
+Layout::
+
+    data/training_images/
+        manifest.db          one row per image + one summary row per student
+        <label>/<n>.jpg      captures of one student
+
+Image rows hold (label, index, relative path, size, quality, timestamp); a
+trigger keeps per-student counts in ``image_students``, the same way
+attendance rollups are maintained, so listing students, their counts and
+picking samples never touches every file. The flat ``user.<label>.<n>.jpg``
+layout is still read; convert it with::
+
+    python -m src.utils.image_store migrate
+    python -m src.utils.image_store stats
+"""
+import argparse
+import json
+import logging
+import os
+import random
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import cv2
+
+from src.config.db_config import DatabaseConnection
+from src.utils.dataset import IMAGE_EXTENSIONS, TRAINING_DIR, parse_label
+
+MANIFEST_NAME = "manifest.db"
+
+MANIFEST_SQL = '''
+CREATE TABLE IF NOT EXISTS images (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    label INTEGER NOT NULL,
+    idx INTEGER NOT NULL,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    quality REAL,
+    created_at TEXT NOT NULL,
+    UNIQUE (label, idx)
+);
+
+CREATE TABLE IF NOT EXISTS image_students (
+    label INTEGER PRIMARY KEY,
+    images INTEGER NOT NULL DEFAULT 0,
+    bytes INTEGER NOT NULL DEFAULT 0,
+    next_index INTEGER NOT NULL DEFAULT 0,
+    last_added TEXT
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_images_insert
+AFTER INSERT ON images
+BEGIN
+    INSERT INTO image_students (label, images, bytes, next_index, last_added)
+    VALUES (NEW.label, 1, NEW.size, NEW.idx + 1, NEW.created_at)
+    ON CONFLICT (label) DO UPDATE SET
+        images = images + 1,
+        bytes = bytes + excluded.bytes,
+        next_index = max(next_index, excluded.next_index),
+        last_added = max(coalesce(last_added, ''), excluded.last_added);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_images_delete
+AFTER DELETE ON images
+BEGIN
+    UPDATE image_students
+    SET images = images - 1, bytes = bytes - OLD.size
+    WHERE label = OLD.label;
+END;
+'''
+
+
+def indexed(root: Optional[Path] = None) -> bool:
+    """True if the directory has a manifest"""
+    return (Path(root or TRAINING_DIR) / MANIFEST_NAME).exists()
+
+
+def image_quality(path: Path) -> Optional[float]:
+    """Sharpness (variance of the Laplacian), as scored at enrollment"""
+    gray = cv2.imread(str(path), cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        return None
+    return float(cv2.Laplacian(gray, cv2.CV_64F).var())
+
+
+def parse_index(filename: str) -> Optional[int]:
+    """Capture index from ``user.<id>.<n>.jpg`` or ``<n>.jpg``"""
+    parts = filename.split('.')
+    try:
+        return int(parts[-2])
+    except (IndexError, ValueError):
+        return None
+
+
+class TrainingImageStore:
+    """Manifest-backed access to the per-student training image layout"""
+
+    def __init__(self, root: Optional[Path] = None, create: bool = True):
+        self.root = Path(root or TRAINING_DIR)
+        self.db_path = str(self.root / MANIFEST_NAME)
+        if create or indexed(self.root):
+            self.root.mkdir(parents=True, exist_ok=True)
+            with DatabaseConnection(self.db_path) as cursor:
+                cursor.executescript(MANIFEST_SQL)
+
+    def image_path(self, label: int, index: int) -> Path:
+        return self.root / str(label) / f"{index}.jpg"
+
+    def next_index(self, label: int) -> int:
+        """First capture index not used by this student"""
+        with DatabaseConnection(self.db_path) as cursor:
+            cursor.execute("SELECT next_index FROM image_students WHERE label = ?", (label,))
+            row = cursor.fetchone()
+        return row[0] if row else 0
+
+    def add(self, label: int, path: Path, quality: Optional[float] = None,
+            created_at: Optional[str] = None, size: Optional[int] = None):
+        """Record one image (re-adding a path replaces its row)"""
+        self.add_many([(label, path, quality, created_at, size)])
+
+    def add_many(self, entries: Iterable[Tuple]):
+        """Record (label, path, quality, created_at, size) tuples in one transaction"""
+        rows = []
+        for label, path, quality, created_at, size in entries:
+            path = Path(path)
+            stat = path.stat()
+            rows.append((
+                label,
+                parse_index(path.name),
+                path.relative_to(self.root).as_posix(),
+                stat.st_size if size is None else size,
+                quality,
+                created_at or datetime.fromtimestamp(stat.st_mtime).isoformat(timespec="seconds"),
+            ))
+        with DatabaseConnection(self.db_path) as cursor:
+            # Delete first so the counters stay right when a path is re-added
+            cursor.executemany("DELETE FROM images WHERE path = ?", [(r[2],) for r in rows])
+            cursor.executemany(
+                "INSERT INTO images (label, idx, path, size, quality, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def remove(self, path: Path):
+        with DatabaseConnection(self.db_path) as cursor:
+            cursor.execute("DELETE FROM images WHERE path = ?", (Path(path).relative_to(self.root).as_posix(),))
+
+    def files(self, student_ids: Optional[Iterable[int]] = None) -> List[Tuple[Path, int]]:
+        """(path, label) pairs from the manifest, optionally for some students"""
+        with DatabaseConnection(self.db_path) as cursor:
+            if student_ids is None:
+                cursor.execute("SELECT path, label FROM images ORDER BY label, idx")
+                rows = cursor.fetchall()
+            else:
+                rows = []
+                for label in sorted(set(student_ids)):
+                    cursor.execute("SELECT path, label FROM images WHERE label = ? ORDER BY idx", (label,))
+                    rows.extend(cursor.fetchall())
+        return [(self.root / path, label) for path, label in rows]
+
+    def student_stats(self) -> Dict[int, Dict[str, object]]:
+        """Per-student image count, bytes and last capture time"""
+        with DatabaseConnection(self.db_path) as cursor:
+            cursor.execute(
+                "SELECT label, images, bytes, last_added FROM image_students WHERE images > 0 ORDER BY label"
+            )
+            return {
+                label: {"images": images, "bytes": size, "last_added": last}
+                for label, images, size, last in cursor.fetchall()
+            }
+
+    def best_image(self, label: int) -> Optional[Tuple[Path, Optional[float]]]:
+        """Sharpest image of a student (latest if unscored) and its score"""
+        with DatabaseConnection(self.db_path) as cursor:
+            cursor.execute(
+                "SELECT path, quality FROM images WHERE label = ? "
+                "ORDER BY quality IS NULL, quality DESC, idx DESC LIMIT 1",
+                (label,)
+            )
+            row = cursor.fetchone()
+        return (self.root / row[0], row[1]) if row else None
+
+    def sample(self, count: int, rng: Optional[random.Random] = None) -> List[Tuple[Path, int]]:
+        """Random images, from distinct students while there are enough"""
+        rng = rng or random.Random()
+        with DatabaseConnection(self.db_path) as cursor:
+            cursor.execute("SELECT label, images FROM image_students WHERE images > 0")
+            students = cursor.fetchall()
+            chosen = rng.sample(students, min(count, len(students)))
+            while students and len(chosen) < count:
+                chosen.append(rng.choice(students))
+            picked = []
+            for label, images in chosen:
+                cursor.execute(
+                    "SELECT path FROM images WHERE label = ? ORDER BY idx LIMIT 1 OFFSET ?",
+                    (label, rng.randrange(images))
+                )
+                row = cursor.fetchone()
+                if row:
+                    picked.append((self.root / row[0], label))
+        return picked
+
+    def reindex(self, quality: bool = True) -> int:
+        """Add student-directory images missing from the manifest"""
+        with DatabaseConnection(self.db_path) as cursor:
+            cursor.execute("SELECT path FROM images")
+            known = {row[0] for row in cursor.fetchall()}
+        entries = []
+        for directory in self.root.iterdir():
+            if not directory.is_dir() or not directory.name.isdigit():
+                continue
+            for path in directory.iterdir():
+                if path.name.endswith(IMAGE_EXTENSIONS) and path.relative_to(self.root).as_posix() not in known:
+                    if parse_index(path.name) is None:
+                        logging.warning(f"Skipping invalid filename: {path}")
+                        continue
+                    entries.append((int(directory.name), path, image_quality(path) if quality else None, None, None))
+        if entries:
+            self.add_many(entries)
+        return len(entries)
+
+    def migrate_flat(self, quality: bool = True, dry_run: bool = False) -> Dict[str, int]:
+        """Move ``user.<label>.<n>.jpg`` files into per-student directories"""
+        stats = {"moved": 0, "renumbered": 0, "skipped": 0, "indexed": 0}
+        used: Dict[int, set] = {}
+        entries = []
+        for name in sorted(os.listdir(self.root)):
+            source = self.root / name
+            if not name.endswith(IMAGE_EXTENSIONS) or not source.is_file():
+                continue
+            label, index = parse_label(name), parse_index(name)
+            if label is None or index is None:
+                logging.warning(f"Skipping invalid filename: {name}")
+                stats["skipped"] += 1
+                continue
+            taken = used.setdefault(label, set())
+            target = self.image_path(label, index)
+            if index in taken or target.exists():
+                # The student already has this index; give it a fresh one
+                first_free = self.next_index(label) if indexed(self.root) else 0
+                index = max(taken | {first_free - 1}) + 1
+                while self.image_path(label, index).exists():
+                    index += 1
+                target = self.image_path(label, index)
+                stats["renumbered"] += 1
+            taken.add(index)
+            stats["moved"] += 1
+            if dry_run:
+                continue
+            target.parent.mkdir(exist_ok=True)
+            os.replace(source, target)
+            entries.append((label, target, image_quality(target) if quality else None, None, None))
+            if len(entries) >= 500:
+                self.add_many(entries)
+                entries = []
+        if not dry_run:
+            if entries:
+                self.add_many(entries)
+            # Also picks up anything moved before an interrupted run
+            stats["indexed"] = stats["moved"] + self.reindex(quality)
+        logging.info(f"Training image migration: {stats}")
+        return stats
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Per-student training image layout and manifest")
+    parser.add_argument("--data-dir", default=None, help="Training images directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    migrate = commands.add_parser("migrate", help="Move flat user.<id>.<n>.jpg files into per-student directories")
+    migrate.add_argument("--dry-run", action="store_true")
+    migrate.add_argument("--no-quality", action="store_true", help="Skip computing sharpness scores")
+    reindex = commands.add_parser("reindex", help="Add unlisted per-student images to the manifest")
+    reindex.add_argument("--no-quality", action="store_true")
+    commands.add_parser("stats", help="Print per-student counts from the manifest")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    dry_run = args.command == "migrate" and args.dry_run
+    store = TrainingImageStore(args.data_dir, create=args.command != "stats" and not dry_run)
+    if args.command == "stats" and not indexed(store.root):
+        print(f"{store.root} has no manifest; run the migrate command first")
+    elif args.command == "migrate":
+        print(json.dumps(store.migrate_flat(not args.no_quality, args.dry_run), indent=4))
+    elif args.command == "reindex":
+        print(f"Indexed {store.reindex(not args.no_quality)} images")
+    else:
+        print(json.dumps(store.student_stats(), indent=4))
+
+
+if __name__ == "__main__":
+    main()
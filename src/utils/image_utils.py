@@ -1,8 +1,11 @@
 import cv2
 import numpy as np
-from typing import Tuple, Optional
+from typing import Callable, List, Optional, Sequence, Tuple
 import logging
 
+# Standard deviations below this are treated as a flat (constant) crop
+NORM_EPS = 1e-6
+
 def enhance_image(image: np.ndarray) -> np.ndarray:
     """Enhance image quality for better face detection"""
     # Convert to grayscale
@@ -27,7 +30,11 @@ def normalize_face(face_img: np.ndarray, target_size: Tuple[int, int] = (160, 16
         
         # Convert to float and normalize
         face_img = face_img.astype(np.float32)
-        face_img = (face_img - face_img.mean()) / face_img.std()
+        face_img -= face_img.mean()
+        std = face_img.std()
+        # Flat crops (std == 0) are only mean-centred
+        if std > NORM_EPS:
+            face_img /= std
         
         return face_img
     except Exception as e:
@@ -52,3 +59,191 @@ def draw_face_box(image: np.ndarray,
                    (0, 255, 0), 2)
     
     return image
+
+
+# Batch variants operate on an N x H x W grayscale stack. Every function
+# accepts an ``out`` buffer so callers can reuse one allocation across
+# batches; passing the input itself as ``out`` works in place.
+
+def stack_faces(faces: Sequence[np.ndarray],
+                target_size: Tuple[int, int] = (200, 200),
+                out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Resize grayscale (or BGR) crops into one uint8 N x H x W stack"""
+    width, height = target_size
+    if out is None:
+        out = np.empty((len(faces), height, width), dtype=np.uint8)
+    elif out.shape != (len(faces), height, width) or out.dtype != np.uint8:
+        raise ValueError(f"out must be uint8 with shape {(len(faces), height, width)}")
+    for i, face in enumerate(faces):
+        if face.ndim == 3:
+            face = cv2.cvtColor(face, cv2.COLOR_BGR2GRAY)
+        if face.shape == (height, width):
+            out[i] = face
+        else:
+            cv2.resize(face, target_size, dst=out[i])
+    return out
+
+
+def _batch_out(batch: np.ndarray, out: Optional[np.ndarray], dtype) -> np.ndarray:
+    if batch.ndim != 3:
+        raise ValueError(f"Expected an N x H x W stack, got shape {batch.shape}")
+    if out is None:
+        return np.empty(batch.shape, dtype=dtype)
+    if out.shape != batch.shape or out.dtype != dtype:
+        raise ValueError(f"out must be {np.dtype(dtype).name} with shape {batch.shape}")
+    return out
+
+
+def normalize_batch(batch: np.ndarray,
+                    out: Optional[np.ndarray] = None,
+                    eps: float = NORM_EPS) -> np.ndarray:
+    """Zero-mean, unit-variance float32 normalization of every crop in a stack
+
+    Mean and variance come from one pass over the data (sum and sum of
+    squares); flat crops are mean-centred only instead of dividing by zero.
+    ``out`` may be the input itself when it is already float32.
+    """
+    out = _batch_out(batch, out, np.float32)
+    n = batch.shape[0]
+    if n == 0:
+        return out
+    flat = batch.reshape(n, -1)
+    pixels = flat.shape[1]
+    sums = flat.sum(axis=1, dtype=np.float64)
+    squares = np.einsum("ij,ij->i", flat, flat, dtype=np.float64, casting="unsafe")
+    mean = sums / pixels
+    std = np.sqrt(np.maximum(squares / pixels - mean * mean, 0.0))
+    scale = np.ones_like(std)
+    np.divide(1.0, std, out=scale, where=std > eps)
+
+    if out is not batch:
+        np.copyto(out, batch, casting="unsafe")
+    out -= mean.astype(np.float32)[:, None, None]
+    out *= scale.astype(np.float32)[:, None, None]
+    return out
+
+
+def equalize_batch(batch: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Histogram-equalize every uint8 crop in a stack"""
+    out = _batch_out(batch, out, np.uint8)
+    for i in range(batch.shape[0]):
+        cv2.equalizeHist(batch[i], dst=out[i])
+    return out
+
+
+def gamma_lut(gamma: float) -> np.ndarray:
+    """256-entry lookup table for gamma correction of uint8 images"""
+    if gamma <= 0:
+        raise ValueError("gamma must be positive")
+    levels = np.arange(256, dtype=np.float64) / 255.0
+    return np.clip(np.rint(levels ** (1.0 / gamma) * 255.0), 0, 255).astype(np.uint8)
+
+
+class GammaStage:
+    """Gamma correction through a precomputed LUT, applied to the whole stack at once"""
+
+    def __init__(self, gamma: float = 1.5):
+        self.gamma = gamma
+        self.lut = gamma_lut(gamma)
+
+    def __call__(self, batch: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        out = _batch_out(batch, out, np.uint8)
+        n, height, width = batch.shape
+        # One LUT call over the stack viewed as a single (N*H) x W image
+        cv2.LUT(np.ascontiguousarray(batch).reshape(n * height, width), self.lut,
+                dst=out.reshape(n * height, width))
+        return out
+
+
+class ClaheStage:
+    """Contrast-limited adaptive histogram equalization per crop"""
+
+    def __init__(self, clip_limit: float = 2.0, tile_grid: Tuple[int, int] = (8, 8)):
+        self.clip_limit = clip_limit
+        self.tile_grid = tile_grid
+        self.clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=tile_grid)
+
+    def __call__(self, batch: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        out = _batch_out(batch, out, np.uint8)
+        for i in range(batch.shape[0]):
+            # CLAHE cannot run in place; apply returns a new crop-sized image
+            out[i] = self.clahe.apply(batch[i])
+        return out
+
+
+class EqualizeStage:
+    """Global histogram equalization, as used by the recognizer"""
+
+    def __call__(self, batch: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        return equalize_batch(batch, out)
+
+
+class AlignStage:
+    """Rotate each crop upright about its centre
+
+    ``angle_fn(crop)`` returns the roll angle in degrees (counter-clockwise
+    positive, as in ``cv2.getRotationMatrix2D``) or None to leave the crop
+    as it is.
+    """
+
+    def __init__(self, angle_fn: Callable[[np.ndarray], Optional[float]], min_angle: float = 1.0):
+        self.angle_fn = angle_fn
+        self.min_angle = min_angle
+
+    def __call__(self, batch: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        out = _batch_out(batch, out, np.uint8)
+        height, width = batch.shape[1:]
+        center = (width / 2.0, height / 2.0)
+        for i in range(batch.shape[0]):
+            angle = self.angle_fn(batch[i])
+            if angle is None or abs(angle) < self.min_angle:
+                if out is not batch:
+                    out[i] = batch[i]
+                continue
+            matrix = cv2.getRotationMatrix2D(center, angle, 1.0)
+            out[i] = cv2.warpAffine(batch[i], matrix, (width, height),
+                                    flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+        return out
+
+
+class FacePipeline:
+    """Composable uint8 stages followed by optional float normalization
+
+    Stages are callables ``stage(batch, out) -> out`` and run in place on
+    one working buffer, so a pipeline allocates at most its input stack and
+    the float output once per batch size.
+    """
+
+    def __init__(self,
+                 stages: Optional[List[Callable[[np.ndarray, Optional[np.ndarray]], np.ndarray]]] = None,
+                 target_size: Tuple[int, int] = (200, 200),
+                 normalize: bool = False):
+        self.stages = list(stages or [])
+        self.target_size = target_size
+        self.normalize = normalize
+        self._work: Optional[np.ndarray] = None
+        self._norm: Optional[np.ndarray] = None
+
+    def _buffer(self, attr: str, shape: Tuple[int, ...], dtype) -> np.ndarray:
+        buf = getattr(self, attr)
+        if buf is None or buf.shape != shape:
+            buf = np.empty(shape, dtype=dtype)
+            setattr(self, attr, buf)
+        return buf
+
+    def run(self, faces: Sequence[np.ndarray], copy: bool = True) -> np.ndarray:
+        """Process a list of crops; with ``copy=False`` the result is an internal
+        buffer that is overwritten by the next call"""
+        width, height = self.target_size
+        shape = (len(faces), height, width)
+        work = stack_faces(faces, self.target_size, self._buffer("_work", shape, np.uint8))
+        result = self.apply(work)
+        return result.copy() if copy else result
+
+    def apply(self, batch: np.ndarray) -> np.ndarray:
+        """Run the stages in place on a uint8 stack"""
+        for stage in self.stages:
+            stage(batch, batch)
+        if not self.normalize:
+            return batch
+        return normalize_batch(batch, self._buffer("_norm", batch.shape, np.float32))
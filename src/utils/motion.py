@@ -0,0 +1,83 @@
+"""Cheap change detection used to skip face detection on static scenes
+
+Frames are shrunk to a tiny blurred grayscale thumbnail and compared with
+the thumbnail of the last frame that went through detection. Detection
+runs only when enough of the scene changed, while faces are being
+tracked, or when the last detection is older than the refresh interval.
+"""
+import cv2
+import numpy as np
+import time
+from typing import Optional, Tuple
+
+
+class MotionGate:
+    """Decides per frame whether detection should run, with counters"""
+
+    def __init__(self,
+                 size: Tuple[int, int] = (64, 48),
+                 pixel_threshold: int = 18,
+                 area_threshold: float = 0.01,
+                 refresh_seconds: float = 2.0,
+                 idle_after: float = 5.0):
+        self.size = size
+        self.pixel_threshold = pixel_threshold
+        self.area_threshold = area_threshold
+        self.refresh_seconds = refresh_seconds
+        self.idle_after = idle_after
+        self.stats = {'processed': 0, 'gated': 0, 'motion': 0, 'refresh': 0, 'tracking': 0}
+        self._reference: Optional[np.ndarray] = None
+        self._thumb: Optional[np.ndarray] = None
+        self._last_detection = 0.0
+        self._last_activity = time.monotonic()
+
+    def _thumbnail(self, frame: np.ndarray) -> np.ndarray:
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        small = cv2.resize(gray, self.size, interpolation=cv2.INTER_AREA)
+        # Blur away sensor noise so it does not count as motion
+        return cv2.GaussianBlur(small, (5, 5), 0, dst=self._thumb)
+
+    def changed_fraction(self, thumb: np.ndarray) -> float:
+        if self._reference is None:
+            return 1.0
+        diff = cv2.absdiff(thumb, self._reference)
+        return float(np.count_nonzero(diff > self.pixel_threshold)) / diff.size
+
+    def should_detect(self, frame: np.ndarray, tracking: bool = False) -> bool:
+        """True if detection should run on this frame"""
+        now = time.monotonic()
+        thumb = self._thumbnail(frame)
+        if tracking:
+            reason = 'tracking'
+        elif self.changed_fraction(thumb) >= self.area_threshold:
+            reason = 'motion'
+        elif now - self._last_detection >= self.refresh_seconds:
+            reason = 'refresh'
+        else:
+            self.stats['gated'] += 1
+            self._thumb = thumb
+            return False
+
+        self.stats[reason] += 1
+        self.stats['processed'] += 1
+        self._last_detection = now
+        if reason != 'refresh':
+            self._last_activity = now
+        # Keep the thumbnail of the detected frame as the new reference and
+        # recycle the old reference buffer for the next thumbnail
+        self._reference, self._thumb = thumb, self._reference
+        return True
+
+    def mark_activity(self):
+        """Call when faces were found, so the scene counts as active"""
+        self._last_activity = time.monotonic()
+
+    @property
+    def idle(self) -> bool:
+        """No motion or faces for ``idle_after`` seconds"""
+        return time.monotonic() - self._last_activity >= self.idle_after
+
+    def reset(self):
+        self._reference = None
+        self._last_detection = 0.0
+        self._last_activity = time.monotonic()
@@ -0,0 +1,133 @@
+"""LBPH training with the histograms computed in worker processes
+
+``recognizer.train`` computes one LBP spatial histogram per face on a
+single core, and ``recognizer.save`` then writes them as text, which is
+slower still. Here the preprocessed faces are split into chunks; each
+worker trains an LBPH recognizer on its chunk and returns its histograms
+(``getHistograms``) and labels. The chunks are concatenated in input order,
+so the merged model is identical to one trained in a single call.
+
+OpenCV offers no way to load histograms into a recognizer other than
+``read``, so the merged model is written directly in the opencv_lbphfaces
+file format, with base64-packed matrices. ``MergedLBPH`` stands in for the
+recognizer until something needs it in memory: a training job only saves
+the model and publishes its path, so it never pays for reading it back.
+"""
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from src.utils.dataset import TrainingCancelled
+
+
+def _chunk_histograms(faces: List[np.ndarray], labels: np.ndarray,
+                      params: Dict[str, int]) -> Tuple[np.ndarray, np.ndarray]:
+    recognizer = cv2.face.LBPHFaceRecognizer_create(**params)
+    recognizer.train(faces, labels)
+    return np.vstack(recognizer.getHistograms()), recognizer.getLabels().ravel()
+
+
+def write_lbph_model(path: str, histograms: np.ndarray, labels: np.ndarray,
+                     params: Dict[str, int], threshold: float):
+    """Write a model ``LBPHFaceRecognizer.read`` loads, atomically"""
+    tmp = f"{path}.tmp"
+    fs = cv2.FileStorage(tmp, cv2.FILE_STORAGE_WRITE | cv2.FILE_STORAGE_BASE64)
+    try:
+        fs.startWriteStruct("opencv_lbphfaces", cv2.FileNode_MAP)
+        fs.write("threshold", float(threshold))
+        for key in ("radius", "neighbors", "grid_x", "grid_y"):
+            fs.write(key, int(params[key]))
+        fs.startWriteStruct("histograms", cv2.FileNode_SEQ)
+        for row in histograms:
+            fs.write("", row.reshape(1, -1))
+        fs.endWriteStruct()
+        fs.write("labels", np.asarray(labels, dtype=np.int32).reshape(-1, 1))
+        fs.startWriteStruct("labelsInfo", cv2.FileNode_SEQ)
+        fs.endWriteStruct()
+        fs.endWriteStruct()
+    finally:
+        fs.release()
+    os.replace(tmp, path)
+
+
+class MergedLBPH:
+    """Histograms of a parallel training run, usable where a recognizer is
+
+    ``save`` writes the histograms directly; anything else reads them into
+    a real LBPHFaceRecognizer once and delegates to it.
+    """
+
+    def __init__(self, histograms: np.ndarray, labels: np.ndarray,
+                 params: Dict[str, int], threshold: float):
+        self.histograms = histograms
+        self.labels = labels
+        self.params = dict(params)
+        self.threshold = threshold
+        self._recognizer = None
+
+    def save(self, path: str):
+        if self._recognizer is not None:
+            # Updated since training; the histograms are stale
+            self._recognizer.save(path)
+        else:
+            write_lbph_model(path, self.histograms, self.labels, self.params, self.threshold)
+
+    def materialize(self):
+        """The equivalent LBPHFaceRecognizer (read from a temporary file)"""
+        if self._recognizer is None:
+            fd, path = tempfile.mkstemp(suffix=".xml")
+            os.close(fd)
+            try:
+                write_lbph_model(path, self.histograms, self.labels, self.params, self.threshold)
+                recognizer = cv2.face.LBPHFaceRecognizer_create()
+                recognizer.read(path)
+            finally:
+                os.unlink(path)
+            self._recognizer = recognizer
+            self.histograms = None
+        return self._recognizer
+
+    def __getattr__(self, name):
+        # predict, update, getLabels, ... go to the real recognizer
+        return getattr(self.materialize(), name)
+
+
+def train_parallel(faces: Sequence[np.ndarray],
+                   labels: Sequence[int],
+                   params: Dict[str, int],
+                   threshold: float,
+                   workers: int = 0,
+                   chunk_size: int = 1000,
+                   cancel_event=None) -> MergedLBPH:
+    """Compute LBPH histograms over ``workers`` processes (0 = one per core)"""
+    workers = workers or os.cpu_count() or 1
+    labels = np.asarray(labels, dtype=np.int32)
+    chunks = [(list(faces[i:i + chunk_size]), labels[i:i + chunk_size])
+              for i in range(0, len(faces), chunk_size)]
+    start = time.perf_counter()
+    results = []
+    # Spawned, not forked: training runs on a thread of the Tk process
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks)),
+                             mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [pool.submit(_chunk_histograms, chunk, chunk_labels, params)
+                   for chunk, chunk_labels in chunks]
+        for future in futures:
+            if cancel_event is not None and cancel_event.is_set():
+                for pending in futures:
+                    pending.cancel()
+                raise TrainingCancelled()
+            results.append(future.result())
+    histograms = np.concatenate([h for h, _ in results])
+    merged_labels = np.concatenate([l for _, l in results])
+    logging.info(
+        f"Computed {len(histograms)} LBPH histograms in {len(chunks)} chunks on "
+        f"{min(workers, len(chunks))} processes in {(time.perf_counter() - start) * 1000:.0f}ms"
+    )
+    return MergedLBPH(histograms, merged_labels, params, threshold)
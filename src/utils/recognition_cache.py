@@ -0,0 +1,89 @@
+"""Short-lived cache of predictions for effectively unchanged face crops
+
+A student standing still yields nearly the same crop every frame. The
+cache keys predictions on a difference hash (dHash) of the crop plus its
+coarse box position, and returns the previous result while the hash stays
+within a few bits and the entry is younger than its TTL.
+"""
+import cv2
+import numpy as np
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+Prediction = Tuple[int, float]
+CacheKey = Tuple[Tuple[int, int, int], int]
+
+
+def dhash(gray: np.ndarray, hash_size: int = 8) -> int:
+    """64-bit difference hash: brightness changes between neighbouring pixels"""
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+class RecognitionCache:
+    """Bounded LRU of recent predictions with a TTL and near-match lookup"""
+
+    def __init__(self,
+                 max_entries: int = 64,
+                 ttl: float = 1.0,
+                 max_distance: int = 4,
+                 cell_size: int = 24):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_distance = max_distance
+        self.cell_size = cell_size
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0, 'hit_rate': 0.0}
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Prediction]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, gray_roi: np.ndarray, face_coords: Tuple[int, int, int, int]) -> CacheKey:
+        x, y, w, h = face_coords
+        # Box centre and size on a coarse grid so detector jitter maps to one cell
+        cell = (
+            int(x + w / 2) // self.cell_size,
+            int(y + h / 2) // self.cell_size,
+            int(w) // self.cell_size,
+        )
+        return cell, dhash(gray_roi)
+
+    def _record(self, hit: bool):
+        self.stats['hits' if hit else 'misses'] += 1
+        total = self.stats['hits'] + self.stats['misses']
+        self.stats['hit_rate'] = round(self.stats['hits'] / total, 4)
+
+    def get(self, key: CacheKey) -> Optional[Prediction]:
+        cell, digest = key
+        now = time.monotonic()
+        with self._lock:
+            match = None
+            for entry_key in list(self._entries):
+                stored_at, prediction = self._entries[entry_key]
+                if now - stored_at > self.ttl:
+                    del self._entries[entry_key]
+                    self.stats['expired'] += 1
+                    continue
+                if entry_key[0] == cell and (entry_key[1] ^ digest).bit_count() <= self.max_distance:
+                    match = entry_key
+                    break
+            if match is None:
+                self._record(False)
+                return None
+            self._entries.move_to_end(match)
+            self._record(True)
+            return self._entries[match][1]
+
+    def put(self, key: CacheKey, prediction: Prediction):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), prediction)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def clear(self):
+        """Drop every entry, e.g. after a new model is loaded"""
+        with self._lock:
+            self._entries.clear()
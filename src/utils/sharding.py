@@ -0,0 +1,250 @@
+"""Recognizer models split into shards by course or by label hash
+
+LBPH ``predict`` compares a probe with every stored histogram, so a single
+model gets slower as the roster grows. Shards hold a subset of students
+each; a kiosk loads only the shards for the courses scheduled in its room
+and falls back to the full model when no shard is confident enough.
+
+Shards live next to the full model in ``data/models/shards`` with a
+``shards.json`` manifest recording which labels each one holds.
+"""
+import cv2
+import numpy as np
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.utils.face_utils import LBPH_PARAMS, MODEL_PATH
+
+SHARD_DIR = MODEL_PATH.parent / "shards"
+MANIFEST_FILE = "shards.json"
+SHARD_MODES = ("none", "course", "hash")
+UNASSIGNED = "unassigned"
+
+
+def course_shard(course: Optional[str]) -> str:
+    """Shard name for a course/section value"""
+    slug = re.sub(r"[^a-z0-9]+", "-", (course or "").strip().lower()).strip("-")
+    return f"course-{slug or UNASSIGNED}"
+
+
+def hash_shard(label: int, count: int) -> str:
+    return f"hash-{int(label) % max(1, count):03d}"
+
+
+def shard_assignments(cursor: sqlite3.Cursor,
+                      labels: Iterable[int],
+                      mode: str,
+                      hash_count: int = 16) -> Dict[int, str]:
+    """Map recognizer labels to shard names"""
+    labels = sorted(set(int(label) for label in labels))
+    if mode == "hash":
+        return {label: hash_shard(label, hash_count) for label in labels}
+    if mode != "course":
+        raise ValueError(f"Unknown shard mode: {mode}")
+    cursor.execute("""
+        SELECT l.label, s.course
+        FROM recognizer_labels l
+        JOIN students s ON s.id = l.student_pk
+    """)
+    courses = {row[0]: row[1] for row in cursor.fetchall()}
+    # Images whose label has no student row still need a home
+    return {label: course_shard(courses.get(label)) for label in labels}
+
+
+def active_shard_names(mode: str, active: str, hash_count: int) -> Optional[List[str]]:
+    """Shards a kiosk should load from the comma-separated config value
+
+    In course mode the value lists courses; in hash mode shard numbers.
+    Invalid entries are logged and skipped. None means every shard in the
+    manifest.
+    """
+    items = [item.strip() for item in active.split(",") if item.strip()]
+    if not items:
+        return None
+    if mode != "hash":
+        return [course_shard(item) for item in items]
+    names = []
+    for item in items:
+        try:
+            number = int(item)
+        except ValueError:
+            number = -1
+        if not 0 <= number < hash_count:
+            logging.warning(f"Ignoring active shard {item!r}: expected a number from 0 to {hash_count - 1}")
+            continue
+        names.append(hash_shard(number, hash_count))
+    return names
+
+
+def _write_manifest(shard_dir: Path, manifest: Dict):
+    tmp = shard_dir / f"{MANIFEST_FILE}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=4)
+    os.replace(tmp, shard_dir / MANIFEST_FILE)
+
+
+def read_manifest(shard_dir: Optional[Path] = None) -> Optional[Dict]:
+    path = Path(shard_dir or SHARD_DIR) / MANIFEST_FILE
+    if not path.exists():
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _save_recognizer(recognizer, path: Path):
+    tmp = f"{path}.tmp"
+    recognizer.save(tmp)
+    os.replace(tmp, path)
+
+
+def train_shards(faces: Sequence[np.ndarray],
+                 labels: Sequence[int],
+                 assignments: Dict[int, str],
+                 mode: str,
+                 preprocessing: str,
+                 threshold: float,
+                 shard_dir: Optional[Path] = None,
+                 cancel_event: Optional[threading.Event] = None) -> Dict:
+    """Train one LBPH model per shard from already preprocessed faces
+
+    Shard files from an earlier build that are no longer assigned are
+    removed, then the manifest is replaced last so readers never see it
+    point at a missing file.
+    """
+    shard_dir = Path(shard_dir or SHARD_DIR)
+    shard_dir.mkdir(parents=True, exist_ok=True)
+
+    members: Dict[str, List[int]] = {}
+    for index, label in enumerate(labels):
+        members.setdefault(assignments[int(label)], []).append(index)
+
+    labels_arr = np.asarray(labels, dtype=np.int32)
+    shards = {}
+    for name, indices in sorted(members.items()):
+        if cancel_event is not None and cancel_event.is_set():
+            from src.utils.dataset import TrainingCancelled
+            raise TrainingCancelled()
+        recognizer = cv2.face.LBPHFaceRecognizer_create(**LBPH_PARAMS, threshold=threshold)
+        recognizer.train([faces[i] for i in indices], labels_arr[indices])
+        _save_recognizer(recognizer, shard_dir / f"{name}.xml")
+        shards[name] = {
+            "labels": sorted({int(labels_arr[i]) for i in indices}),
+            "images": len(indices),
+        }
+
+    manifest = {"mode": mode, "preprocessing": preprocessing, "shards": shards}
+    _write_manifest(shard_dir, manifest)
+    for path in shard_dir.glob("*.xml"):
+        if path.stem not in shards:
+            path.unlink()
+    logging.info(f"Trained {len(shards)} {mode} shards for {len(labels)} faces")
+    return manifest
+
+
+def update_shards(faces: Sequence[np.ndarray],
+                  labels: Sequence[int],
+                  assignments: Dict[int, str],
+                  threshold: float,
+                  shard_dir: Optional[Path] = None) -> Optional[Dict]:
+    """Add newly enrolled faces to their shards (creating shards as needed)"""
+    shard_dir = Path(shard_dir or SHARD_DIR)
+    manifest = read_manifest(shard_dir)
+    if manifest is None:
+        return None
+
+    members: Dict[str, List[int]] = {}
+    for index, label in enumerate(labels):
+        members.setdefault(assignments[int(label)], []).append(index)
+
+    labels_arr = np.asarray(labels, dtype=np.int32)
+    for name, indices in members.items():
+        path = shard_dir / f"{name}.xml"
+        recognizer = cv2.face.LBPHFaceRecognizer_create(**LBPH_PARAMS, threshold=threshold)
+        if path.exists():
+            recognizer.read(str(path))
+            recognizer.update([faces[i] for i in indices], labels_arr[indices])
+        else:
+            recognizer.train([faces[i] for i in indices], labels_arr[indices])
+        _save_recognizer(recognizer, path)
+        entry = manifest["shards"].setdefault(name, {"labels": [], "images": 0})
+        entry["labels"] = sorted(set(entry["labels"]) | {int(labels_arr[i]) for i in indices})
+        entry["images"] += len(indices)
+
+    _write_manifest(shard_dir, manifest)
+    logging.info(f"Updated shards {sorted(members)} with {len(labels)} faces")
+    return manifest
+
+
+class ShardedModel:
+    """The shards loaded on one kiosk, searched before the full model
+
+    ``predict`` returns the most confident match across the loaded shards,
+    stopping early on a strong match. When the best confidence is below
+    the fallback threshold the caller-supplied full search is used.
+    """
+
+    def __init__(self, recognizers: Dict[str, "cv2.face.LBPHFaceRecognizer"], manifest: Dict):
+        self.recognizers = recognizers
+        self.manifest = manifest
+        self.stats = {'shard_hits': 0, 'fallbacks': 0}
+
+    @classmethod
+    def load(cls,
+             names: Optional[List[str]] = None,
+             preprocessing: Optional[str] = None,
+             shard_dir: Optional[Path] = None) -> Optional["ShardedModel"]:
+        shard_dir = Path(shard_dir or SHARD_DIR)
+        manifest = read_manifest(shard_dir)
+        if manifest is None:
+            logging.warning(f"No shard manifest in {shard_dir}")
+            return None
+        if preprocessing is not None and manifest.get("preprocessing") != preprocessing:
+            logging.warning("Shards were trained with different preprocessing; retrain to use them")
+            return None
+
+        wanted = names if names is not None else list(manifest["shards"])
+        recognizers = {}
+        for name in wanted:
+            path = shard_dir / f"{name}.xml"
+            if name not in manifest["shards"] or not path.exists():
+                logging.warning(f"Shard {name} not found, relying on fallback for its students")
+                continue
+            recognizer = cv2.face.LBPHFaceRecognizer_create()
+            recognizer.read(str(path))
+            recognizers[name] = recognizer
+        if not recognizers:
+            return None
+        images = sum(manifest["shards"][name]["images"] for name in recognizers)
+        logging.info(f"Loaded shards {sorted(recognizers)} ({images} images)")
+        return cls(recognizers, manifest)
+
+    def predict(self,
+                face: np.ndarray,
+                to_confidence: Callable[[float], float],
+                strong: float,
+                fallback_below: float,
+                fallback: Optional[Callable[[np.ndarray], Tuple[int, float]]] = None) -> Tuple[int, float]:
+        best_label, best_confidence = -1, 0.0
+        for recognizer in self.recognizers.values():
+            label, distance = recognizer.predict(face)
+            confidence = to_confidence(distance)
+            if label != -1 and confidence > best_confidence:
+                best_label, best_confidence = int(label), confidence
+                if confidence >= strong:
+                    break
+
+        if best_confidence >= fallback_below or fallback is None:
+            self.stats['shard_hits'] += 1
+            return best_label, best_confidence
+
+        self.stats['fallbacks'] += 1
+        label, confidence = fallback(face)
+        if confidence > best_confidence:
+            return label, confidence
+        return best_label, best_confidence
@@ -0,0 +1,217 @@
+"""One thumbnail per student, packed into atlas pages next to the manifest
+
+Each student gets a fixed slot in a grid of ``COLUMNS`` x ``COLUMNS`` tiles
+per PNG page under data/training_images/atlas/. The slot and the quality
+of the crop it holds are recorded in the manifest's ``thumbnails`` table.
+Enrollment writes the sharpest kept crop when it finishes, so views read
+one page for up to a hundred students instead of decoding originals.
+
+Students enrolled before the atlas existed are filled in with::
+
+    python -m src.utils.thumbnail_atlas build
+"""
+import argparse
+import logging
+import os
+import random
+import threading
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from src.config.db_config import DatabaseConnection
+from src.utils.image_store import TrainingImageStore, indexed
+
+ATLAS_DIR = "atlas"
+TILE = 96
+COLUMNS = 10
+PER_PAGE = COLUMNS * COLUMNS
+
+ATLAS_SQL = '''
+CREATE TABLE IF NOT EXISTS thumbnails (
+    label INTEGER PRIMARY KEY,
+    slot INTEGER NOT NULL UNIQUE,
+    quality REAL,
+    updated_at TEXT NOT NULL
+);
+'''
+
+
+def make_tile(image: np.ndarray) -> np.ndarray:
+    """BGR tile of the atlas size"""
+    if image.ndim == 2:
+        image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+    return cv2.resize(image, (TILE, TILE), interpolation=cv2.INTER_AREA)
+
+
+class ThumbnailAtlas:
+    """Per-student thumbnails in shared PNG pages"""
+
+    def __init__(self, store: TrainingImageStore, cached_pages: int = 4):
+        self.store = store
+        self.directory = store.root / ATLAS_DIR
+        self.cached_pages = cached_pages
+        self._pages: "OrderedDict[int, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        with DatabaseConnection(store.db_path) as cursor:
+            cursor.executescript(ATLAS_SQL)
+
+    def page_path(self, page: int) -> Path:
+        return self.directory / f"page_{page:04d}.png"
+
+    def _load_page(self, page: int) -> np.ndarray:
+        image = self._pages.get(page)
+        if image is None:
+            path = self.page_path(page)
+            image = cv2.imread(str(path)) if path.exists() else None
+            if image is None:
+                image = np.zeros((TILE * COLUMNS, TILE * COLUMNS, 3), dtype=np.uint8)
+            self._pages[page] = image
+            while len(self._pages) > self.cached_pages:
+                self._pages.popitem(last=False)
+        self._pages.move_to_end(page)
+        return image
+
+    def _save_page(self, page: int, image: np.ndarray):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.page_path(page)
+        tmp = path.with_name(f"{path.stem}.tmp.png")
+        # Fast compression: pages are rewritten on every enrollment
+        if not cv2.imwrite(str(tmp), image, [cv2.IMWRITE_PNG_COMPRESSION, 1]):
+            raise IOError(f"cv2.imwrite returned False for {tmp}")
+        # Readers never see a half-written page
+        os.replace(tmp, path)
+
+    @staticmethod
+    def _tile_view(page_image: np.ndarray, slot: int) -> np.ndarray:
+        row, col = divmod(slot % PER_PAGE, COLUMNS)
+        return page_image[row * TILE:(row + 1) * TILE, col * TILE:(col + 1) * TILE]
+
+    def put(self, label: int, image: np.ndarray, quality: Optional[float] = None,
+            only_if_better: bool = True) -> bool:
+        """Set a student's thumbnail; returns False if the current one is sharper"""
+        return self.put_many([(label, image, quality)], only_if_better) == 1
+
+    def put_many(self, entries: Iterable[Tuple[int, np.ndarray, Optional[float]]],
+                 only_if_better: bool = True) -> int:
+        """Set several thumbnails, writing each touched page once"""
+        now = datetime.now().isoformat(timespec="seconds")
+        with self._lock, DatabaseConnection(self.store.db_path) as cursor:
+            cursor.execute("SELECT label, slot, quality FROM thumbnails")
+            current = {label: (slot, quality) for label, slot, quality in cursor.fetchall()}
+            cursor.execute("SELECT coalesce(max(slot) + 1, 0) FROM thumbnails")
+            next_slot = cursor.fetchone()[0]
+
+            by_page: Dict[int, List[Tuple[int, np.ndarray]]] = defaultdict(list)
+            rows = []
+            for label, image, quality in entries:
+                slot, old_quality = current.get(label, (None, None))
+                if (only_if_better and slot is not None and old_quality is not None
+                        and (quality is None or quality <= old_quality)):
+                    continue
+                if slot is None:
+                    slot, next_slot = next_slot, next_slot + 1
+                current[label] = (slot, quality)
+                by_page[slot // PER_PAGE].append((slot, make_tile(image)))
+                rows.append((label, slot, quality, now))
+
+            for page, tiles in by_page.items():
+                page_image = self._load_page(page)
+                for slot, tile in tiles:
+                    self._tile_view(page_image, slot)[:] = tile
+                self._save_page(page, page_image)
+            cursor.executemany(
+                "INSERT OR REPLACE INTO thumbnails (label, slot, quality, updated_at) VALUES (?, ?, ?, ?)",
+                rows
+            )
+        return len(rows)
+
+    def slots(self, labels: Optional[Iterable[int]] = None) -> Dict[int, int]:
+        """label -> slot for all students or some of them"""
+        with DatabaseConnection(self.store.db_path) as cursor:
+            cursor.execute("SELECT label, slot FROM thumbnails")
+            slots = dict(cursor.fetchall())
+        if labels is None:
+            return slots
+        return {label: slots[label] for label in labels if label in slots}
+
+    def get_many(self, labels: Iterable[int]) -> Dict[int, np.ndarray]:
+        """Thumbnails of the given students that have one"""
+        slots = self.slots(labels)
+        thumbs = {}
+        with self._lock:
+            for label, slot in sorted(slots.items(), key=lambda kv: kv[1]):
+                thumbs[label] = self._tile_view(self._load_page(slot // PER_PAGE), slot).copy()
+        return thumbs
+
+    def get(self, label: int) -> Optional[np.ndarray]:
+        return self.get_many([label]).get(label)
+
+    def page_count(self) -> int:
+        with DatabaseConnection(self.store.db_path) as cursor:
+            cursor.execute("SELECT coalesce(max(slot), -1) FROM thumbnails")
+            return cursor.fetchone()[0] // PER_PAGE + 1
+
+    def page(self, page: int) -> List[Tuple[int, np.ndarray]]:
+        """(label, thumbnail) pairs stored on one page, in slot order"""
+        with DatabaseConnection(self.store.db_path) as cursor:
+            cursor.execute(
+                "SELECT label, slot FROM thumbnails WHERE slot >= ? AND slot < ? ORDER BY slot",
+                (page * PER_PAGE, (page + 1) * PER_PAGE)
+            )
+            rows = cursor.fetchall()
+        with self._lock:
+            page_image = self._load_page(page)
+            return [(label, self._tile_view(page_image, slot).copy()) for label, slot in rows]
+
+    def sample(self, count: int, rng: Optional[random.Random] = None) -> List[Tuple[int, np.ndarray]]:
+        """Random thumbnails from one random page, so only one page is decoded"""
+        rng = rng or random.Random()
+        pages = self.page_count()
+        if not pages:
+            return []
+        tiles = self.page(rng.randrange(pages))
+        return rng.sample(tiles, min(count, len(tiles)))
+
+    def build(self, rebuild: bool = False) -> int:
+        """Thumbnail every student from their sharpest manifest image"""
+        have = set() if rebuild else set(self.slots())
+        entries = []
+        for label in self.store.student_stats():
+            if label in have:
+                continue
+            best = self.store.best_image(label)
+            if best is None:
+                continue
+            path, quality = best
+            image = cv2.imread(str(path))
+            if image is None:
+                logging.warning(f"Could not read {path} for the thumbnail atlas")
+                continue
+            entries.append((label, image, quality))
+        added = self.put_many(entries, only_if_better=not rebuild) if entries else 0
+        logging.info(f"Thumbnail atlas: added {added} students, {self.page_count()} pages")
+        return added
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Per-student thumbnail atlas of the training images")
+    parser.add_argument("--data-dir", default=None, help="Training images directory")
+    parser.add_argument("command", choices=["build", "rebuild"])
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    store = TrainingImageStore(args.data_dir, create=False)
+    if not indexed(store.root):
+        print(f"{store.root} has no manifest; run python -m src.utils.image_store migrate first")
+        return
+    atlas = ThumbnailAtlas(store)
+    print(f"Thumbnailed {atlas.build(rebuild=args.command == 'rebuild')} students")
+
+
+if __name__ == "__main__":
+    main()
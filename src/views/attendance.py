@@ -1,11 +1,15 @@
 import customtkinter as ctk
 from datetime import datetime
-import pandas as pd
 from tkinter import ttk, messagebox
 import logging
+import queue
+import threading
 
 from src.core.base_window import BaseWindow
+from src.core.paged_tree import PagedTreeLoader
 from src.config.db_config import DatabaseConnection
+from src.config.config_manager import ConfigManager
+from src.db.export import export_rows, default_filename
 
 class AttendanceView(BaseWindow):
     def __init__(self, root=None):
@@ -31,11 +35,16 @@ class AttendanceView(BaseWindow):
         ).pack(side="left", padx=5)
 
         # Export button
-        ctk.CTkButton(
+        self.export_btn = ctk.CTkButton(
             toolbar,
             text="Export CSV",
             command=self.export_csv
-        ).pack(side="right", padx=5)
+        )
+        self.export_btn.pack(side="right", padx=5)
+        self._export_updates = queue.Queue()
+
+        self.count_label = ctk.CTkLabel(toolbar, text="")
+        self.count_label.pack(side="left", padx=10)
 
         # Create treeview
         self.tree = ttk.Treeview(self.container, columns=(
@@ -51,51 +60,107 @@ class AttendanceView(BaseWindow):
 
         # Add scrollbar
         scrollbar = ttk.Scrollbar(self.container, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
+
+        # Rows are loaded a page at a time as the user scrolls
+        self.loader = PagedTreeLoader(
+            self.container,
+            self.tree,
+            scrollbar,
+            # load_attendance() installs the query for the chosen date
+            page_size=ConfigManager().config.performance.page_size,
+            on_error=self._on_load_error,
+            on_page=self._on_page_loaded
+        )
 
         # Pack elements
         self.tree.pack(fill="both", expand=True, padx=10, pady=5)
         scrollbar.pack(side="right", fill="y")
 
+    def on_show(self):
+        """Refresh when the cached view is shown again"""
+        self.load_attendance()
+
     def load_attendance(self):
         """Load attendance data from database"""
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        try:
-            with DatabaseConnection() as cursor:
-                cursor.execute("""
-                    SELECT a.student_id, s.name, a.time, a.date, a.status
+        date = self.date_var.get()
+        self.count_label.configure(text="Loading...")
+        self.loader.reset(lambda cursor, limit: self._fetch_page(date, cursor, limit))
+
+    def _fetch_page(self, date, cursor, limit):
+        """Fetch one page of attendance (runs on a worker thread)
+
+        Keyset pagination on (time, id) keeps every page an index range scan
+        instead of an ever-growing OFFSET.
+        """
+        with DatabaseConnection() as db:
+            if cursor is None:
+                db.execute("""
+                    SELECT a.id, s.student_id, s.name, a.time, a.date, a.status
                     FROM attendance a
-                    JOIN students s ON a.student_id = s.student_id
+                    JOIN students s ON s.id = a.student_pk
                     WHERE a.date = ?
-                    ORDER BY a.time DESC
-                """, (self.date_var.get(),))
-                
-                for row in cursor.fetchall():
-                    self.tree.insert("", "end", values=row)
+                    ORDER BY a.time DESC, a.id DESC
+                    LIMIT ?
+                """, (date, limit))
+            else:
+                db.execute("""
+                    SELECT a.id, s.student_id, s.name, a.time, a.date, a.status
+                    FROM attendance a
+                    JOIN students s ON s.id = a.student_pk
+                    WHERE a.date = ? AND (a.time, a.id) < (?, ?)
+                    ORDER BY a.time DESC, a.id DESC
+                    LIMIT ?
+                """, (date, cursor[0], cursor[1], limit))
+            rows = db.fetchall()
+
+        next_cursor = (rows[-1][3], rows[-1][0]) if len(rows) == limit else None
+        return [row[1:] for row in rows], next_cursor
+
+    def _on_page_loaded(self, rows_loaded, exhausted):
+        suffix = "" if exhausted else "+"
+        self.count_label.configure(text=f"{rows_loaded}{suffix} records")
 
-        except Exception as e:
-            logging.error(f"Error loading attendance: {e}")
-            messagebox.showerror("Error", f"Could not load attendance: {str(e)}")
+    def _on_load_error(self, error):
+        self.count_label.configure(text="")
+        messagebox.showerror("Error", f"Could not load attendance: {str(error)}")
 
     def export_csv(self):
-        """Export attendance data to CSV"""
+        """Export the selected day's attendance to CSV in the background"""
+        date = self.date_var.get()
+        filename = default_filename("attendance", date, date, "csv")
+        self.export_btn.configure(state="disabled")
+
+        def run():
+            try:
+                rows = export_rows(
+                    filename, date, date,
+                    chunk_size=ConfigManager().config.performance.export_chunk_size,
+                    progress=lambda done, total: self._export_updates.put(("progress", done, total))
+                )
+                self._export_updates.put(("done", rows, filename))
+            except Exception as e:
+                self._export_updates.put(("error", e, None))
+
+        # Streams straight from SQLite, so it covers every row for the day
+        threading.Thread(target=run, name="csv-export", daemon=True).start()
+        self.container.after(100, self._poll_export)
+
+    def _poll_export(self):
+        """Apply export progress reported by the worker thread"""
         try:
-            data = []
-            for item in self.tree.get_children():
-                data.append(self.tree.item(item)["values"])
-
-            df = pd.DataFrame(
-                data,
-                columns=["Student ID", "Name", "Time", "Date", "Status"]
-            )
-
-            filename = f"attendance_{self.date_var.get()}.csv"
-            df.to_csv(filename, index=False)
-            messagebox.showinfo("Success", f"Exported to {filename}")
-
-        except Exception as e:
-            logging.error(f"Error exporting CSV: {e}")
-            messagebox.showerror("Error", f"Could not export CSV: {str(e)}")
+            while True:
+                kind, a, b = self._export_updates.get_nowait()
+                if kind == "progress":
+                    self.count_label.configure(text=f"Exporting {a}/{b}...")
+                    continue
+                self.export_btn.configure(state="normal")
+                if kind == "done":
+                    self.count_label.configure(text=f"Exported {a} records")
+                    messagebox.showinfo("Success", f"Exported to {b}")
+                else:
+                    logging.error(f"Error exporting CSV: {a}")
+                    messagebox.showerror("Error", f"Could not export CSV: {str(a)}")
+                return
+        except queue.Empty:
+            pass
+        self.container.after(100, self._poll_export)
@@ -1,14 +1,19 @@
 import customtkinter as ctk
 import cv2
 from PIL import Image, ImageTk
-from datetime import datetime
 import logging
 from tkinter import messagebox
 import time  # Add this import at the top
 
 from src.core.base_window import BaseWindow
+from src.core.training_jobs import TrainingJobManager
+from src.config.config_manager import ConfigManager
 from src.utils.face_utils import FaceDetector
+from src.utils.motion import MotionGate
 from src.config.db_config import DatabaseConnection
+from src.db.students import label_directory
+from src.core.event_bus import AttendanceMarked, event_bus
+from src.core.profiler import profiler
 
 class RecognitionView(BaseWindow):
     def __init__(self, root=None):
@@ -21,6 +26,20 @@ class RecognitionView(BaseWindow):
         self.is_recognizing = False
         self._current_image = None
         self.recognition_times = []  # Add this line
+        self.config_manager = ConfigManager()
+        self.frame_index = 0
+        self.last_faces = []
+        # Skips detection while the scene is static and nobody is tracked
+        self.motion_gate = MotionGate()
+        self.face_detector.performance_stats['motion'] = self.motion_gate.stats
+        # Pick up models published by background training jobs
+        self.job_manager = TrainingJobManager()
+        self.job_manager.subscribe(self.on_model_published)
+        # Attendance goes through the event bus so slow sinks never stall the camera loop
+        self.event_bus = event_bus()
+        # Reload shards when this kiosk's shard settings change
+        self._shard_settings = self._shard_key(self.config_manager.config)
+        self.config_manager.subscribe(self.on_config_changed)
         self.setup_ui()
         self.container.bind("<Destroy>", lambda e: self.cleanup())
 
@@ -78,6 +97,8 @@ class RecognitionView(BaseWindow):
         """Start face recognition"""
         if not self.is_recognizing:
             self.cap = cv2.VideoCapture(0)
+            self.motion_gate.reset()
+            self.last_faces = []
             self.is_recognizing = True
             self.start_btn.configure(state="disabled")
             self.stop_btn.configure(state="normal")
@@ -95,20 +116,35 @@ class RecognitionView(BaseWindow):
     def update_video_feed(self):
         """Update video feed and perform recognition"""
         if self.is_recognizing and self.cap is not None:
-            ret, frame = self.cap.read()
+            with profiler.span("frame.read"):
+                ret, frame = self.cap.read()
             if ret:
                 # Start timer
                 start_time = time.perf_counter()
                 
-                # Detect faces
-                faces = self.face_detector.detect_faces(frame)
+                # Read per frame so settings changes apply without restarting
+                config = self.config_manager.config
+                
+                # Detect faces, reusing the last boxes on skipped frames
+                run_detection = self.frame_index % (config.detection.frame_skip + 1) == 0
+                if run_detection and config.motion.enabled:
+                    self._configure_motion_gate(config.motion)
+                    run_detection = self.motion_gate.should_detect(frame, tracking=len(self.last_faces) > 0)
+                if run_detection:
+                    with profiler.span("frame.detect"):
+                        self.last_faces = self.face_detector.detect_faces(frame)
+                    if len(self.last_faces):
+                        self.motion_gate.mark_activity()
+                self.frame_index += 1
+                faces = self.last_faces
                 
                 for face_coords in faces:
                     # Get predictions
-                    student_id, confidence = self.face_detector.predict_face(frame, face_coords)
+                    with profiler.span("frame.predict"):
+                        label, confidence = self.face_detector.predict_face(frame, face_coords)
                     
                     # Adjusted confidence threshold and display
-                    if confidence > 40:  # More permissive threshold
+                    if confidence > config.recognition.confidence_threshold:
                         recognition_time = (time.perf_counter() - start_time) * 1000
                         self.recognition_times.append(recognition_time)
                         avg_time = sum(self.recognition_times[-10:]) / min(len(self.recognition_times), 10)
@@ -116,20 +152,18 @@ class RecognitionView(BaseWindow):
                         
                         try:
                             # Get student info from database
-                            with DatabaseConnection() as cursor:
-                                cursor.execute(
-                                    "SELECT name FROM students WHERE student_id=?", 
-                                    (student_id,)
-                                )
-                                result = cursor.fetchone()
-                                name = result[0] if result else "Unknown"
+                            with profiler.span("frame.db"), DatabaseConnection() as cursor:
+                                # Recognizer label -> integer students.id
+                                student = label_directory.lookup(cursor, label)
+                                name = student[1] if student else "Unknown"
                                 
                                 # Mark attendance
-                                self.mark_attendance(student_id)
+                                if student is not None:
+                                    self.mark_attendance(student[0], name, label, confidence)
                                 
                                 # Enhanced display
                                 x, y, w, h = face_coords
-                                color = (0, 255, 0) if confidence > 60 else (0, 255, 255)
+                                color = (0, 255, 0) if confidence > config.recognition.strong_threshold else (0, 255, 255)
                                 cv2.rectangle(frame, (x, y), (x+w, y+h), color, 2)
                                 cv2.putText(frame, f"{name} ({confidence:.0f}%)", 
                                           (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, 
@@ -147,36 +181,70 @@ class RecognitionView(BaseWindow):
                                   cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 0, 255), 2)
                 
                 # Convert to CTkImage
-                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                pil_img = Image.fromarray(frame)
-                pil_img = pil_img.resize((640, 480), Image.Resampling.LANCZOS)
-                self._current_image = ctk.CTkImage(light_image=pil_img, size=(640, 480))
-                self.video_label.configure(image=self._current_image)
+                with profiler.span("frame.render"):
+                    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                    pil_img = Image.fromarray(frame)
+                    pil_img = pil_img.resize((640, 480), Image.Resampling.LANCZOS)
+                    self._current_image = ctk.CTkImage(light_image=pil_img, size=(640, 480))
+                    self.video_label.configure(image=self._current_image)
                 
             if self.is_recognizing:  # Check if still recognizing before scheduling next update
-                self.container.after(10, self.update_video_feed)
+                self.container.after(self._next_interval(), self.update_video_feed)
+
+    def _configure_motion_gate(self, motion):
+        gate = self.motion_gate
+        gate.area_threshold = motion.area_threshold
+        gate.pixel_threshold = motion.pixel_threshold
+        gate.refresh_seconds = motion.refresh_seconds
+        gate.idle_after = motion.idle_after
+
+    def _next_interval(self) -> int:
+        """Poll slowly while nothing has moved for a while"""
+        motion = self.config_manager.config.motion
+        idle = motion.enabled and not len(self.last_faces) and self.motion_gate.idle
+        status = self.status_label.cget("text")
+        if idle and status != "Idle":
+            self.status_label.configure(text="Idle")
+        elif not idle and status == "Idle":
+            self.status_label.configure(text="Watching")
+        return motion.idle_interval_ms if idle else motion.active_interval_ms
+
+    def on_hide(self):
+        """Release the camera when navigating away"""
+        if self.is_recognizing:
+            self.stop_recognition()
 
-    def mark_attendance(self, student_id):
-        """Record attendance in database"""
+    def mark_attendance(self, student_pk: int, name: str = "", label: int = None, confidence: float = 0.0):
+        """Publish an attendance event; sinks (SQLite, journal, ...) write it"""
         try:
-            with DatabaseConnection() as cursor:
-                now = datetime.now()
-                cursor.execute("""
-                    INSERT INTO attendance (student_id, date, time, status)
-                    VALUES (?, ?, ?, ?)
-                """, (
-                    student_id,
-                    now.strftime("%Y-%m-%d"),
-                    now.strftime("%H:%M:%S"),
-                    "Present"
-                ))
+            self.event_bus.publish(AttendanceMarked(student_pk, name, label, float(confidence)))
             
         except Exception as e:
             logging.error(f"Error marking attendance: {e}")
             self.status_label.configure(text="Error marking attendance")
 
+    def on_model_published(self, model_path, version):
+        """Swap in a newly trained model (runs on the training thread)"""
+        # load_trained_model reads into a fresh recognizer and then swaps the
+        # reference, so the video loop never sees a half-loaded model
+        self.face_detector.load_trained_model(model_path)
+        logging.info(f"Recognition switched to model version {version}")
+
+    @staticmethod
+    def _shard_key(config):
+        return (config.sharding.mode, config.sharding.active_shards, config.sharding.hash_shards)
+
+    def on_config_changed(self, config):
+        """Load a different set of shards if the room's courses changed"""
+        key = self._shard_key(config)
+        if key != self._shard_settings:
+            self._shard_settings = key
+            self.face_detector.load_shards()
+
     def cleanup(self):
         """Cleanup resources"""
+        self.job_manager.unsubscribe(self.on_model_published)
+        self.config_manager.unsubscribe(self.on_config_changed)
         self.is_recognizing = False
         if self.cap:
             self.cap.release()
@@ -1,11 +1,12 @@
 import customtkinter as ctk
 from datetime import datetime, timedelta
-import pandas as pd
 from tkinter import ttk, messagebox
-import logging
 
 from src.core.base_window import BaseWindow
+from src.core.paged_tree import PagedTreeLoader
 from src.config.db_config import DatabaseConnection
+from src.config.config_manager import ConfigManager
+from src.db.rollups import attendance_report
 
 class ReportsView(BaseWindow):
     def __init__(self, root=None):
@@ -64,7 +65,14 @@ class ReportsView(BaseWindow):
             orient="vertical",
             command=self.tree.yview
         )
-        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.loader = PagedTreeLoader(
+            self.report_frame,
+            self.tree,
+            scrollbar,
+            # No query until Generate Report installs one with reset()
+            page_size=ConfigManager().config.performance.page_size,
+            on_error=self._on_load_error
+        )
         
         # Pack elements
         self.tree.pack(side="left", fill="both", expand=True)
@@ -73,41 +81,40 @@ class ReportsView(BaseWindow):
     def generate_report(self):
         """Generate attendance report"""
         try:
-            # Clear existing items
-            for item in self.tree.get_children():
-                self.tree.delete(item)
-            
-            with DatabaseConnection() as cursor:
-                cursor.execute("""
-                    SELECT 
-                        s.student_id,
-                        s.name,
-                        COUNT(DISTINCT a.date) as days_present,
-                        (julianday(?) - julianday(?)) as total_days
-                    FROM students s
-                    LEFT JOIN attendance a ON s.student_id = a.student_id
-                    AND a.date BETWEEN ? AND ?
-                    GROUP BY s.student_id, s.name
-                """, (
-                    self.end_date.get(),
-                    self.start_date.get(),
-                    self.start_date.get(),
-                    self.end_date.get()
-                ))
-                
-                for row in cursor.fetchall():
-                    student_id, name, days_present, total_days = row
-                    total_days = int(total_days) + 1
-                    attendance_pct = (days_present / total_days) * 100 if total_days > 0 else 0
-                    
-                    self.tree.insert("", "end", values=(
-                        student_id,
-                        name,
-                        total_days,
-                        days_present,
-                        f"{attendance_pct:.1f}%"
-                    ))
-                    
-        except Exception as e:
-            logging.error(f"Error generating report: {e}")
-            messagebox.showerror("Error", f"Could not generate report: {str(e)}")
+            start_date = self.start_date.get()
+            end_date = self.end_date.get()
+            total_days = (
+                datetime.strptime(end_date, "%Y-%m-%d")
+                - datetime.strptime(start_date, "%Y-%m-%d")
+            ).days + 1
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid date range: {str(e)}")
+            return
+
+        self.loader.reset(
+            lambda cursor, limit: self._fetch_page(start_date, end_date, total_days, cursor, limit)
+        )
+
+    def _fetch_page(self, start_date, end_date, total_days, cursor, limit):
+        """Fetch one page of report rows (runs on a worker thread)"""
+        with DatabaseConnection() as db:
+            # Aggregated from daily rollups, cached per date range
+            rows = attendance_report(db, start_date, end_date)
+
+        offset = cursor or 0
+        page = []
+        for student_id, name, days_present in rows[offset:offset + limit]:
+            attendance_pct = (days_present / total_days) * 100 if total_days > 0 else 0
+            page.append((
+                student_id,
+                name,
+                total_days,
+                days_present,
+                f"{attendance_pct:.1f}%"
+            ))
+
+        next_cursor = offset + limit if offset + limit < len(rows) else None
+        return page, next_cursor
+
+    def _on_load_error(self, error):
+        messagebox.showerror("Error", f"Could not generate report: {str(error)}")
@@ -1,17 +1,15 @@
 import customtkinter as ctk
-import json
-import os
-from pathlib import Path
 from tkinter import messagebox
 import logging
 
 from src.core.base_window import BaseWindow
+from src.config.config_manager import ConfigManager
+from src.core.profiler import profiler
 
 class SettingsView(BaseWindow):
     def __init__(self, root=None):
         super().__init__(root, "Settings")
-        self.settings_file = Path(__file__).parent.parent.parent / "config" / "settings.json"
-        self.load_settings()
+        self.config_manager = ConfigManager()
         self.setup_ui()
         
     def setup_ui(self):
@@ -20,6 +18,8 @@ class SettingsView(BaseWindow):
         sections = [
             ("General", self.create_general_section),
             ("Recognition", self.create_recognition_section),
+            ("Performance", self.create_performance_section),
+            ("Profiling", self.create_profiling_section),
             ("Database", self.create_database_section)
         ]
         
@@ -46,7 +46,7 @@ class SettingsView(BaseWindow):
         
         # Theme selection
         ctk.CTkLabel(frame, text="Theme:").pack(anchor="w", padx=5, pady=5)
-        self.theme_var = ctk.StringVar(value=self.settings.get("theme", "system"))
+        self.theme_var = ctk.StringVar(value=self.config_manager.get("ui.theme"))
         theme_menu = ctk.CTkOptionMenu(
             frame,
             values=["light", "dark", "system"],
@@ -56,7 +56,7 @@ class SettingsView(BaseWindow):
         
         # Language selection
         ctk.CTkLabel(frame, text="Language:").pack(anchor="w", padx=5, pady=5)
-        self.lang_var = ctk.StringVar(value=self.settings.get("language", "en"))
+        self.lang_var = ctk.StringVar(value=self.config_manager.get("ui.language"))
         lang_menu = ctk.CTkOptionMenu(
             frame,
             values=["en", "es", "fr"],
@@ -71,16 +71,97 @@ class SettingsView(BaseWindow):
         
         # Confidence threshold
         ctk.CTkLabel(frame, text="Confidence Threshold:").pack(anchor="w", padx=5, pady=5)
-        self.confidence_var = ctk.StringVar(value=str(self.settings.get("confidence_threshold", 85)))
+        self.confidence_var = ctk.StringVar(value=str(self.config_manager.get("recognition.confidence_threshold")))
         confidence_entry = ctk.CTkEntry(frame, textvariable=self.confidence_var)
         confidence_entry.pack(anchor="w", padx=5, pady=5)
+
+        # Eye alignment (takes effect from the next full training)
+        self.align_var = ctk.BooleanVar(value=self.config_manager.get("recognition.align_faces"))
+        ctk.CTkCheckBox(frame, text="Align faces on eyes", variable=self.align_var).pack(anchor="w", padx=5, pady=5)
         
         # Face detection settings
         ctk.CTkLabel(frame, text="Min Face Size:").pack(anchor="w", padx=5, pady=5)
-        self.min_face_var = ctk.StringVar(value=str(self.settings.get("min_face_size", 30)))
+        self.min_face_var = ctk.StringVar(value=str(self.config_manager.get("detection.min_face_size")))
         min_face_entry = ctk.CTkEntry(frame, textvariable=self.min_face_var)
         min_face_entry.pack(anchor="w", padx=5, pady=5)
 
+    def create_performance_section(self, parent):
+        """Create performance tuning section"""
+        frame = ctk.CTkFrame(parent)
+        frame.pack(fill="both", expand=True, padx=10, pady=10)
+
+        self.performance_vars = {}
+        knobs = [
+            ("Detection Scale (0.25-1.0):", "detection.detection_scale"),
+            ("Detection Frame Skip:", "detection.frame_skip"),
+            ("Report Cache Size:", "performance.report_cache_size"),
+            ("Page Size:", "performance.page_size"),
+        ]
+        for label, key in knobs:
+            ctk.CTkLabel(frame, text=label).pack(anchor="w", padx=5, pady=2)
+            var = ctk.StringVar(value=str(self.config_manager.get(key)))
+            ctk.CTkEntry(frame, textvariable=var).pack(anchor="w", padx=5, pady=2)
+            self.performance_vars[key] = var
+
+    def create_profiling_section(self, parent):
+        """Create profiling section; captures start without a restart"""
+        frame = ctk.CTkFrame(parent)
+        frame.pack(fill="both", expand=True, padx=10, pady=10)
+
+        self.profiling_var = ctk.BooleanVar(value=self.config_manager.get("profiling.enabled"))
+        ctk.CTkCheckBox(
+            frame, text="Record stage timings (recognition, capture, training)", variable=self.profiling_var
+        ).pack(anchor="w", padx=5, pady=5)
+
+        ctk.CTkLabel(frame, text="Capture Mode:").pack(anchor="w", padx=5, pady=2)
+        self.profile_mode_var = ctk.StringVar(value=self.config_manager.get("profiling.mode"))
+        ctk.CTkOptionMenu(frame, values=["sample", "cprofile"], variable=self.profile_mode_var).pack(
+            anchor="w", padx=5, pady=2
+        )
+
+        ctk.CTkLabel(frame, text="Capture Seconds:").pack(anchor="w", padx=5, pady=2)
+        self.profile_seconds_var = ctk.StringVar(value=str(self.config_manager.get("profiling.capture_seconds")))
+        ctk.CTkEntry(frame, textvariable=self.profile_seconds_var).pack(anchor="w", padx=5, pady=2)
+
+        self.capture_btn = ctk.CTkButton(frame, text="Capture Profile", command=self.capture_profile)
+        self.capture_btn.pack(anchor="w", padx=5, pady=10)
+        self.profile_status = ctk.CTkLabel(frame, text="")
+        self.profile_status.pack(anchor="w", padx=5, pady=2)
+
+    def capture_profile(self):
+        """Profile the running app for a few seconds and write logs/profiles"""
+        try:
+            seconds = float(self.profile_seconds_var.get())
+        except ValueError:
+            messagebox.showerror("Error", "Capture seconds must be a number")
+            return
+        running = profiler.capture
+        capture = profiler.start_capture(seconds, self.profile_mode_var.get())
+        self.capture_btn.configure(state="disabled")
+        if capture is running:
+            # Someone else's capture (e.g. ATTENDANCE_PROFILE_SECONDS); it
+            # is theirs to stop, so only wait for its files
+            self.profile_status.configure(
+                text=f"A {capture.mode} capture is already running, waiting for it..."
+            )
+        else:
+            self.profile_status.configure(text=f"Capturing ({capture.mode}) for {capture.seconds:.0f}s...")
+            if capture.mode == "cprofile":
+                # Stopped on the Tk thread, which is the one cProfile watches
+                self.container.after(int(capture.seconds * 1000), lambda: profiler.stop_capture(capture))
+        self.container.after(500, self._poll_capture, capture)
+
+    def _poll_capture(self, capture):
+        if not capture.done.is_set():
+            self.container.after(500, self._poll_capture, capture)
+            return
+        self.capture_btn.configure(state="normal")
+        busiest = next(iter(profiler.summary().items()), None)
+        text = "Profile written to logs/profiles"
+        if busiest:
+            text += f" (most time in {busiest[0]}, mean {busiest[1]['mean_ms']:.1f} ms)"
+        self.profile_status.configure(text=text)
+
     def create_database_section(self, parent):
         """Create database settings section"""
         frame = ctk.CTkFrame(parent)
@@ -88,36 +169,29 @@ class SettingsView(BaseWindow):
         
         # Database path
         ctk.CTkLabel(frame, text="Database Path:").pack(anchor="w", padx=5, pady=5)
-        self.db_path_var = ctk.StringVar(value=self.settings.get("db_path", "data/face_recognition.db"))
+        self.db_path_var = ctk.StringVar(value=self.config_manager.get("database.path"))
         db_path_entry = ctk.CTkEntry(frame, textvariable=self.db_path_var)
         db_path_entry.pack(anchor="w", padx=5, pady=5)
 
-    def load_settings(self):
-        """Load settings from file"""
-        try:
-            if os.path.exists(self.settings_file):
-                with open(self.settings_file, 'r') as f:
-                    self.settings = json.load(f)
-            else:
-                self.settings = {}
-        except Exception as e:
-            logging.error(f"Error loading settings: {e}")
-            self.settings = {}
-
     def save_settings(self):
         """Save settings to file"""
         try:
             settings = {
-                "theme": self.theme_var.get(),
-                "language": self.lang_var.get(),
-                "confidence_threshold": float(self.confidence_var.get()),
-                "min_face_size": int(self.min_face_var.get()),
-                "db_path": self.db_path_var.get()
+                "ui.theme": self.theme_var.get(),
+                "ui.language": self.lang_var.get(),
+                "recognition.confidence_threshold": float(self.confidence_var.get()),
+                "recognition.align_faces": self.align_var.get(),
+                "profiling.enabled": self.profiling_var.get(),
+                "profiling.mode": self.profile_mode_var.get(),
+                "detection.min_face_size": int(self.min_face_var.get()),
+                "database.path": self.db_path_var.get()
             }
-            
-            os.makedirs(os.path.dirname(self.settings_file), exist_ok=True)
-            with open(self.settings_file, 'w') as f:
-                json.dump(settings, f, indent=4)
+            for key, var in self.performance_vars.items():
+                settings[key] = var.get()
+
+            # Applied immediately to running components; written once
+            self.config_manager.update(settings)
+            self.config_manager.flush()
                 
             messagebox.showinfo("Success", "Settings saved successfully")
             
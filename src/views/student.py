@@ -5,11 +5,17 @@ from PIL import Image, ImageTk
 import logging
 from tkinter import messagebox
 import os
-from pathlib import Path
 
 from src.core.base_window import BaseWindow
+from src.core.profiler import profiler
+from src.core.training_jobs import TrainingJobManager
 from src.utils.face_utils import FaceDetector
+from src.utils.enrollment import EnrollmentSession
+from src.utils.image_store import TrainingImageStore
+from src.utils.thumbnail_atlas import ThumbnailAtlas
 from src.config.db_config import DatabaseConnection
+from src.db.students import assign_label
+from src.config.config_manager import ConfigManager
 
 class StudentView(BaseWindow):
     def __init__(self, parent=None):
@@ -17,8 +23,7 @@ class StudentView(BaseWindow):
         self.face_detector = FaceDetector()
         self.cap = None
         self.is_capturing = False
-        self.capture_count = 0
-        self.max_captures = 100  # Changed to 100 images
+        self.enrollment = None
         self._current_image = None  # Add this line
         self.setup_ui()
         self.container.bind("<Destroy>", lambda e: self.cleanup())
@@ -59,6 +64,14 @@ class StudentView(BaseWindow):
         )
         self.save_btn.pack(side="right", padx=5)
 
+        # Incrementally retrain the recognizer once capture has finished
+        self.retrain_var = ctk.BooleanVar(value=ConfigManager().config.enrollment.auto_retrain)
+        ctk.CTkCheckBox(
+            form_frame,
+            text="Retrain model after capture",
+            variable=self.retrain_var
+        ).pack(anchor="w", padx=5, pady=5)
+
         # Progress indicators
         self.status_label = ctk.CTkLabel(
             form_frame,
@@ -104,13 +117,24 @@ class StudentView(BaseWindow):
                     student_data["email"],
                     student_data["course"]
                 ))
+                # Images and the recognizer are keyed by an integer label
+                label = assign_label(cursor, cursor.lastrowid, student_data["student_id"])
             
             # Start camera capture
             self.save_btn.configure(state="disabled")
             self.status_label.configure(text="Starting camera...")
             self.cap = cv2.VideoCapture(0)
             self.is_capturing = True
-            self.capture_count = 0
+            store = TrainingImageStore()
+            self.enrollment = EnrollmentSession(
+                label,
+                store.root,
+                # Read per session: the view is cached across hot reloads
+                target_count=ConfigManager().config.enrollment.target_images,
+                aligner=self.face_detector.aligner,
+                store=store,
+                atlas=ThumbnailAtlas(store)
+            )
             self.progress_bar.set(0)
             self.container.after(1000, self.auto_capture)  # Start after 1 second delay
             
@@ -120,52 +144,72 @@ class StudentView(BaseWindow):
 
     def auto_capture(self):
         """Automatically capture photos"""
-        if not self.is_capturing or self.capture_count >= self.max_captures:
+        if not self.is_capturing or self.enrollment is None or self.enrollment.complete:
+            kept = self.enrollment.kept if self.enrollment else 0
+            label = self.enrollment.label if self.enrollment else None
             self.cleanup()
-            self.status_label.configure(text="Photo capture completed")
+            self.status_label.configure(text=f"Photo capture completed ({kept} images)")
             self.save_btn.configure(state="normal")
+            if kept and self.retrain_var.get():
+                self.start_retrain(label)
             return
 
-        ret, frame = self.cap.read()
+        with profiler.span("capture.read"):
+            ret, frame = self.cap.read()
         if ret:
-            faces = self.face_detector.detect_faces(frame)
+            with profiler.span("capture.detect"):
+                faces = self.face_detector.detect_faces(frame)
             if len(faces) == 1:  # Only capture if exactly one face is detected
-                # Save the face image
-                x, y, w, h = faces[0]
-                face = frame[y:y+h, x:x+w]
-                
-                # Create directory for training data
-                data_dir = Path(__file__).parent.parent.parent / "data" / "training_images"
-                data_dir.mkdir(parents=True, exist_ok=True)
-
-                # Save face image
-                student_id = self.entries["student_id"].get()
-                filename = f"{data_dir}/user.{student_id}.{self.capture_count}.jpg"
-                cv2.imwrite(str(filename), face)
-
-                self.capture_count += 1
-                progress = self.capture_count / self.max_captures
+                # Scored crops are written by a background thread
+                with profiler.span("capture.offer"):
+                    result = self.enrollment.offer(frame, faces[0])
+
+                target = self.enrollment.target_count
+                progress = self.enrollment.kept / target
                 self.progress_bar.set(progress)
-                self.status_label.configure(
-                    text=f"Capturing photos: {self.capture_count}/{self.max_captures}"
-                )
+                if result.accepted:
+                    self.status_label.configure(
+                        text=f"Capturing photos: {self.enrollment.kept}/{target}"
+                    )
+                else:
+                    self.status_label.configure(
+                        text=f"Capturing photos: {self.enrollment.kept}/{target} "
+                             f"(skipped: {result.reason})"
+                    )
 
             # Update display with proper image handling
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            pil_img = Image.fromarray(frame)
-            # Resize image to fit label
-            pil_img = pil_img.resize((640, 480), Image.Resampling.LANCZOS)
-            self._current_image = ctk.CTkImage(light_image=pil_img, size=(640, 480))
-            self.camera_label.configure(image=self._current_image)
+            with profiler.span("capture.render"):
+                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                pil_img = Image.fromarray(frame)
+                # Resize image to fit label
+                pil_img = pil_img.resize((640, 480), Image.Resampling.LANCZOS)
+                self._current_image = ctk.CTkImage(light_image=pil_img, size=(640, 480))
+                self.camera_label.configure(image=self._current_image)
 
         # Schedule next capture
         if self.is_capturing:
             self.container.after(100, self.auto_capture)  # Capture every 100ms
 
+    def on_hide(self):
+        """Stop capturing when navigating away"""
+        if self.is_capturing:
+            self.cleanup()
+            self.status_label.configure(text="Photo capture stopped")
+            self.save_btn.configure(state="normal")
+
+    def start_retrain(self, label: int):
+        """Queue an incremental retrain for the newly enrolled student"""
+        job = TrainingJobManager().submit(incremental=True, student_ids=[label])
+        logging.info(f"Queued incremental training job {job.job_id} for label {label}")
+        self.status_label.configure(text="Photo capture completed, retraining in background")
+
     def cleanup(self):
         """Cleanup resources"""
         self.is_capturing = False
         if self.cap:
             self.cap.release()
             self.cap = None
+        if self.enrollment is not None:
+            self.enrollment.finish()
+            self.enrollment = None
         cv2.destroyAllWindows()
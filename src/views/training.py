@@ -1,6 +1,5 @@
 import customtkinter as ctk
 import cv2
-import os
 import numpy as np
 from PIL import Image
 import logging
@@ -8,15 +7,22 @@ from tkinter import messagebox
 from pathlib import Path
 from collections import Counter
 import random
-import time
+import queue
 
 from src.core.base_window import BaseWindow
+from src.core.training_jobs import TrainingJobManager
+from src.utils.dataset import TRAINING_DIR, list_flat_files, list_training_files
 from src.utils.face_utils import FaceDetector
+from src.utils.image_store import TrainingImageStore, indexed
+from src.utils.thumbnail_atlas import ThumbnailAtlas
 
 class TrainingView(BaseWindow):
     def __init__(self, root=None):
         super().__init__(root, "Model Training")
         self.face_detector = FaceDetector()
+        self.job_manager = TrainingJobManager()
+        self.current_job = None
+        self._job_updates = queue.Queue()
         self.setup_ui()
         
     def setup_ui(self):
@@ -41,11 +47,20 @@ class TrainingView(BaseWindow):
         btn_frame = ctk.CTkFrame(self.container)
         btn_frame.pack(pady=20)
         
-        ctk.CTkButton(
+        self.train_btn = ctk.CTkButton(
             btn_frame,
             text="Start Training",
             command=self.start_training
-        ).pack(side="left", padx=10)
+        )
+        self.train_btn.pack(side="left", padx=10)
+
+        self.cancel_btn = ctk.CTkButton(
+            btn_frame,
+            text="Cancel",
+            command=self.cancel_training,
+            state="disabled"
+        )
+        self.cancel_btn.pack(side="left", padx=10)
         
         ctk.CTkButton(
             btn_frame,
@@ -54,95 +69,84 @@ class TrainingView(BaseWindow):
         ).pack(side="left", padx=10)
 
     def start_training(self):
-        """Start the training process"""
+        """Start the training process in the background"""
+        if self.current_job is not None and not self.current_job.finished:
+            return
+
+        self.status_label.configure(text="Loading training data...")
+        self.progress.set(0)
+        self.train_btn.configure(state="disabled")
+        self.cancel_btn.configure(state="normal")
+
+        # Callbacks fire on the training thread; the UI drains the queue
+        self.current_job = self.job_manager.submit(
+            on_progress=self._job_updates.put,
+            on_done=self._job_updates.put
+        )
+        self.container.after(100, self._poll_job)
+
+    def cancel_training(self):
+        """Cancel the running training job"""
+        if self.current_job is not None:
+            self.current_job.cancel()
+            self.status_label.configure(text="Cancelling...")
+
+    def _poll_job(self):
+        """Apply progress updates from the training thread"""
+        job = None
         try:
-            self.status_label.configure(text="Loading training data...")
-            self.progress.set(0.2)
-            
-            start_time = time.perf_counter()
-            faces, ids = self._load_training_data()
-            load_time = (time.perf_counter() - start_time) * 1000
-            
-            if not faces:
-                raise ValueError("No training data found")
-                
-            self.status_label.configure(text="Training model...")
-            self.progress.set(0.6)
-            
-            # Train model
-            self.face_detector.train_recognizer(faces, ids)
-            training_time = self.face_detector.performance_stats.get('training', 0)
-            
+            while True:
+                job = self._job_updates.get_nowait()
+        except queue.Empty:
+            pass
+
+        try:
+            if job is not None:
+                self.status_label.configure(text=job.message)
+                self.progress.set(job.progress)
+
+            if self.current_job is not None and self.current_job.finished:
+                self._finish_job(self.current_job)
+            else:
+                self.container.after(100, self._poll_job)
+        except Exception:
+            # View was destroyed while the job was running
+            pass
+
+    def _finish_job(self, job):
+        """Report the outcome of a finished training job"""
+        self.train_btn.configure(state="normal")
+        self.cancel_btn.configure(state="disabled")
+        self.status_label.configure(text=job.message)
+
+        if job.state == "done":
+            self.progress.set(1.0)
+            self.face_detector.load_trained_model(job.model_path)
+            stats = job.stats
+            training_time = stats["training_time_ms"]
             if training_time > 0:  # Avoid division by zero
-                images_per_second = len(faces) / (training_time / 1000)
+                images_per_second = stats["images"] / (training_time / 1000)
             else:
                 images_per_second = 0
-                
+
             # Log detailed timing information
             performance_log = f"""
 Training Performance:
 -------------------
-Data Loading Time: {load_time:.2f}ms
+Data Loading Time: {stats["load_time_ms"]:.2f}ms
 Model Training Time: {training_time:.2f}ms
-Total Images: {len(faces)}
+Total Images: {stats["images"]}
 Images/Second: {images_per_second:.1f}
-Student IDs: {sorted(set(ids))}
-Images per Student: {Counter(ids)}
+Student IDs: {stats["students"]}
 -------------------
 """
             logging.info(performance_log)
-            
-            self.status_label.configure(text="Saving model...")
-            self.progress.set(0.8)
-            
-            # Save model
-            model_path = self.face_detector.save_trained_model()
-            logging.info(f"Model saved to: {model_path}")
-            
-            self.status_label.configure(text="Training completed successfully")
-            self.progress.set(1.0)
-            
-        except Exception as e:
-            error_msg = f"Training error: {str(e)}"
-            logging.error(error_msg)
-            self.status_label.configure(text=error_msg)
+            logging.info(f"Model saved to: {job.model_path}")
+        elif job.state == "failed":
+            self.progress.set(0)
+            messagebox.showerror("Error", job.message)
+        else:
             self.progress.set(0)
-            messagebox.showerror("Error", error_msg)
-
-    def _load_training_data(self):
-        """Load training images and prepare data"""
-        faces = []
-        ids = []
-        
-        data_dir = Path(__file__).parent.parent.parent / "data" / "training_images"
-        if not data_dir.exists():
-            raise ValueError("No training data directory found")
-        
-        # Get list of files first
-        files = [f for f in os.listdir(data_dir) if f.endswith(('.jpg', '.jpeg', '.png'))]
-        
-        # Add logging for data loading process
-        logging.info(f"Found {len(files)} training images")
-            
-        # Process each file
-        for image_file in files:
-            path = os.path.join(data_dir, image_file)
-            img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
-            try:
-                id_num = int(image_file.split('.')[1])
-                faces.append(img)
-                ids.append(id_num)
-            except:
-                logging.warning(f"Skipping invalid filename: {image_file}")
-                    
-        if not faces:
-            raise ValueError("No valid training images found")
-        
-        # Log statistics for each student
-        for id_num, count in Counter(ids).items():
-            logging.info(f"Student ID {id_num}: {count} images")
-        
-        return faces, ids
 
     def save_trained_model(self):
         """Save trained model to file"""
@@ -171,22 +175,34 @@ Images per Student: {Counter(ids)}
         stats_frame.pack(fill="x", padx=10, pady=10)
 
         try:
-            # Load data statistics
-            data_dir = Path(__file__).parent.parent.parent / "data" / "training_images"
-            if not data_dir.exists():
+            # With a manifest, counts come from its per-student summary and
+            # samples from the thumbnail atlas; otherwise list and decode.
+            # Flat files not migrated yet are counted either way.
+            flat = list_flat_files(TRAINING_DIR) if TRAINING_DIR.exists() else []
+            if indexed(TRAINING_DIR):
+                store = TrainingImageStore(TRAINING_DIR)
+                id_counts = Counter({label: s["images"] for label, s in store.student_stats().items()})
+                id_counts.update(label for _, label in flat)
+                samples = [(thumb, label) for label, thumb in ThumbnailAtlas(store).sample(6)]
+                if not samples:
+                    # Students enrolled before the atlas; python -m src.utils.thumbnail_atlas build
+                    samples = [(cv2.imread(str(path)), label) for path, label in store.sample(6)]
+                if not samples:
+                    samples = [(cv2.imread(str(path)), label) for path, label in random.sample(flat, min(6, len(flat)))]
+            else:
+                files = list_training_files(TRAINING_DIR)
+                id_counts = Counter(label for _, label in files)
+                samples = [(cv2.imread(str(path)), label) for path, label in random.sample(files, min(6, len(files)))]
+            total = sum(id_counts.values())
+            if not total:
                 raise ValueError("No training data found")
 
-            # Collect statistics
-            files = [f for f in os.listdir(data_dir) if f.endswith(('.jpg', '.jpeg', '.png'))]
-            student_ids = [int(f.split('.')[1]) for f in files if len(f.split('.')) > 2]
-            id_counts = Counter(student_ids)
-
             # Display statistics
             stats_text = f"""
             Training Dataset Statistics:
-            - Total images: {len(files)}
+            - Total images: {total}
             - Unique students: {len(id_counts)}
-            - Images per student (avg): {len(files)/len(id_counts):.1f}
+            - Images per student (avg): {total/len(id_counts):.1f}
             - Model status: {"Trained" if self.face_detector.model_loaded else "Not trained"}
             """
             
@@ -211,16 +227,11 @@ Images per Student: {Counter(ids)}
             grid_frame = ctk.CTkFrame(samples_frame)
             grid_frame.pack(fill="both", expand=True, padx=5, pady=5)
 
-            # Randomly select up to 6 sample images
-            sample_files = random.sample(files, min(6, len(files)))
-            
-            for i, file in enumerate(sample_files):
+            for i, (img, student_id) in enumerate(samples):
                 row = i // 3
                 col = i % 3
                 
-                # Load and display image
-                img_path = data_dir / file
-                img = cv2.imread(str(img_path))
+                # Display image
                 img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
                 img = cv2.resize(img, (160, 160))
                 pil_img = Image.fromarray(img)
@@ -238,7 +249,6 @@ Images per Student: {Counter(ids)}
                     text=""
                 ).pack(padx=5, pady=2)
                 
-                student_id = file.split('.')[1]
                 ctk.CTkLabel(
                     img_frame,
                     text=f"Student ID: {student_id}",
@@ -0,0 +1,43 @@
+import unittest
+import numpy as np
+
+from src.utils import assets
+from src.utils.alignment import EyeAligner, LEFT_EYE, RIGHT_EYE
+
+class FixedEyes:
+    """Stands in for the eye cascade with known detections"""
+    def __init__(self, eyes):
+        self.eyes = eyes
+
+    def detectMultiScale(self, image, **kwargs):
+        return np.array(self.eyes, dtype=np.int32).reshape(-1, 4)
+
+class TestEyeAligner(unittest.TestCase):
+    def test_eyes_land_on_fixed_points(self):
+        face = np.zeros((120, 120), dtype=np.uint8)
+        # Tilted eyes centred at (30, 40) and (90, 55)
+        face[38:43, 28:33] = 255
+        face[53:58, 88:93] = 255
+        aligner = EyeAligner((100, 100), FixedEyes([(25, 35, 10, 10), (85, 50, 10, 10)]))
+        self.assertAlmostEqual(aligner.angle(face), np.degrees(np.arctan2(15, 60)), places=5)
+
+        aligned = aligner.align(face)
+        self.assertEqual(aligned.shape, (100, 100))
+        ys, xs = np.nonzero(aligned[:, :50] > 128)
+        self.assertAlmostEqual(xs.mean(), LEFT_EYE[0] * 100, delta=1.5)
+        self.assertAlmostEqual(ys.mean(), LEFT_EYE[1] * 100, delta=1.5)
+        ys, xs = np.nonzero(aligned[:, 50:] > 128)
+        self.assertAlmostEqual(xs.mean() + 50, RIGHT_EYE[0] * 100, delta=1.5)
+        self.assertEqual(aligner.stats, {'aligned': 1, 'fallback': 0})
+
+    def test_falls_back_to_resize(self):
+        face = np.random.default_rng(0).integers(0, 255, (80, 80), dtype=np.uint8)
+        aligner = EyeAligner((100, 100), FixedEyes([(10, 10, 10, 10)]))
+        batch = aligner.preprocess_batch([face, face])
+        self.assertEqual(batch.shape, (2, 100, 100))
+        self.assertEqual(aligner.stats['fallback'], 2)
+
+    def test_default_classifier_is_not_shared(self):
+        first, second = EyeAligner(), EyeAligner()
+        self.assertIsNot(first.eye_cascade, second.eye_cascade)
+        self.assertIsNot(first.eye_cascade, assets.cascade("eye"))
@@ -0,0 +1,45 @@
+import unittest
+import http.client
+import json
+import threading
+
+from benchmarks.load_generator import multipart
+from src.api.server import RecognitionBatcher, RecognitionServer, split_multipart
+
+class TestRecognitionApi(unittest.TestCase):
+    def test_multipart_round_trip(self):
+        images = [b"\xff\xd8first", b"\xff\xd8second\r\n--not-a-boundary"]
+        body, content_type = multipart(images)
+        self.assertEqual(split_multipart(content_type, body), images)
+
+    def test_keep_alive_and_errors(self):
+        batcher = RecognitionBatcher(workers=1)
+        server = RecognitionServer(("127.0.0.1", 0), batcher)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            conn = http.client.HTTPConnection(*server.server_address[:2], timeout=10)
+            # Several requests over one persistent connection
+            for path, status in (("/health", 200), ("/missing", 404), ("/stats", 200), ("/report", 400),
+                                 ("/attendance?limit=ten", 400), ("/attendance?after_time=09:00&after_id=x", 400)):
+                conn.request("GET", path)
+                response = conn.getresponse()
+                payload = json.loads(response.read())
+                self.assertEqual(response.status, status, payload)
+            conn.request("POST", "/recognize", body=b"not an image", headers={"Content-Type": "image/jpeg"})
+            response = conn.getresponse()
+            self.assertEqual(response.status, 400)
+            response.read()
+
+            # An oversized body is not read, so the connection must not be reused
+            server.max_body = 16
+            conn.request("POST", "/recognize", body=b"x" * 64, headers={"Content-Type": "image/jpeg"})
+            response = conn.getresponse()
+            self.assertEqual(response.status, 413)
+            self.assertEqual(response.getheader("Connection"), "close")
+            response.read()
+            conn.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+            batcher.close()
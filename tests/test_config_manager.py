@@ -0,0 +1,65 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.config.config_manager import AppConfig, ConfigManager
+
+class TestAppConfig(unittest.TestCase):
+    def test_defaults_match_previous_literals(self):
+        config = AppConfig()
+        self.assertEqual(config.detection.scale_factor, 1.1)
+        self.assertEqual(config.detection.min_neighbors, 5)
+        self.assertEqual(config.detection.min_face_size, 30)
+        self.assertEqual(config.recognition.confidence_threshold, 40.0)
+        self.assertEqual(config.recognition.strong_threshold, 60.0)
+
+    def test_legacy_flat_settings_are_upgraded(self):
+        legacy = {
+            "theme": "dark",
+            "language": "fr",
+            "confidence_threshold": 85.0,
+            "min_face_size": 45,
+            "db_path": "data/other.db"
+        }
+        config = AppConfig.from_dict(ConfigManager._upgrade(legacy))
+        self.assertEqual(config.ui.theme, "dark")
+        self.assertEqual(config.ui.language, "fr")
+        self.assertEqual(config.detection.min_face_size, 45)
+        self.assertEqual(config.database.path, "data/other.db")
+
+    def test_values_are_coerced_and_unknown_keys_ignored(self):
+        config = AppConfig.from_dict({
+            "detection": {"frame_skip": "2", "bogus": 1},
+            "enrollment": {"auto_retrain": "false"},
+            "recognition": {"confidence_threshold": "not a number"}
+        })
+        self.assertEqual(config.detection.frame_skip, 2)
+        self.assertFalse(config.enrollment.auto_retrain)
+        self.assertEqual(config.recognition.confidence_threshold, 40.0)
+
+class TestConfigReload(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.manager = object.__new__(ConfigManager)
+        ConfigManager.__init__(self.manager)
+        self.manager.config_file = Path(self.tmp.name) / "settings.json"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_failed_reload_keeps_last_good_config(self):
+        self.manager.config_file.write_text(json.dumps({"recognition": {"confidence_threshold": 55.0}}))
+        self.assertTrue(self.manager.load_config())
+        # An editor's half-written save
+        self.manager.config_file.write_text('{"recognition": {"confidence_thr')
+        self.assertFalse(self.manager.load_config())
+        self.assertEqual(self.manager.config.recognition.confidence_threshold, 55.0)
+
+    def test_first_load_falls_back_to_defaults(self):
+        self.manager.config_file.write_text("{")
+        fresh = object.__new__(ConfigManager)
+        fresh.config_file = self.manager.config_file
+        fresh._lock = self.manager._lock
+        self.assertFalse(fresh.load_config())
+        self.assertEqual(fresh.config.recognition.confidence_threshold, 40.0)
@@ -0,0 +1,42 @@
+import unittest
+import numpy as np
+
+from src.utils.curation import curate, dedupe, farthest_point_subset
+
+def random_face(rng):
+    return rng.integers(0, 256, (64, 64), dtype=np.uint8)
+
+class TestCuration(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+
+    def test_near_duplicates_dropped(self):
+        base = random_face(self.rng)
+        faces = [base, base.copy(), random_face(self.rng), base.copy()]
+        faces, labels, report = curate(faces, [1, 1, 1, 1], max_per_student=0, balance=False)
+        self.assertEqual(len(faces), 2)
+        self.assertEqual(report["students"][1], {"images": 4, "duplicates": 2, "capped": 0, "kept": 2})
+
+    def test_cap_and_balance(self):
+        faces = [random_face(self.rng) for _ in range(40)]
+        labels = [1] * 30 + [2] * 5 + [3] * 5
+        _, kept, report = curate(faces, labels, max_per_student=20, dedupe_distance=-1)
+        # Median class size is 5, so balance lowers the cap from 20 to 10
+        self.assertEqual(report["cap"], 10)
+        self.assertEqual(kept.count(1), 10)
+        self.assertEqual(kept.count(2), 5)
+        self.assertEqual(report["capped"], 20)
+
+    def test_farthest_point_subset_prefers_spread(self):
+        hashes = np.array([0, 1, 3, 2**64 - 1, 2**32 - 1], dtype=np.uint64)
+        self.assertEqual(farthest_point_subset(hashes, 2), [0, 3])
+        self.assertEqual(dedupe(hashes, 2), [0, 3, 4])
+
+    def test_identical_crops_chosen_once(self):
+        self.assertEqual(farthest_point_subset(np.array([5] * 5, dtype=np.uint64), 3), [0, 1, 2])
+        base = random_face(self.rng)
+        faces = [base.copy() for _ in range(6)]
+        kept_faces, _, report = curate(faces, [1] * 6, max_per_student=4, dedupe_distance=-1, balance=False)
+        self.assertEqual(report["kept"], 4)
+        # Four different crops, not one crop four times
+        self.assertEqual(len({id(face) for face in kept_faces}), 4)
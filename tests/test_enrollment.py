@@ -0,0 +1,68 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from src.utils.enrollment import AsyncImageWriter, CropQualityScorer
+
+def frontal_face(seed, size=120):
+    # Sharp noise mirrored left to right, like a frontal face
+    rng = np.random.default_rng(seed)
+    half = rng.integers(0, 256, (size, size // 2), dtype=np.uint8)
+    return np.hstack([half, half[:, ::-1]])
+
+class TestCropQualityScorer(unittest.TestCase):
+    def setUp(self):
+        self.scorer = CropQualityScorer()
+
+    def test_accepts_sharp_frontal_crop(self):
+        result = self.scorer.score(frontal_face(0), [])
+        self.assertTrue(result.accepted, result)
+        self.assertGreater(result.symmetry, 0.9)
+
+    def test_rejections(self):
+        face = frontal_face(0)
+        blurry = cv2.GaussianBlur(face, (31, 31), 10)
+        off_pose = face.copy()
+        off_pose[:, :60] //= 4
+        for crop, reason in ((face[:50, :50], "too small"), (blurry, "blurry"), (off_pose, "off-pose")):
+            result = self.scorer.score(crop, [])
+            self.assertFalse(result.accepted)
+            self.assertEqual(result.reason, reason)
+
+    def test_duplicates_rejected(self):
+        kept = [self.scorer.thumbnail(frontal_face(0))]
+        self.assertEqual(self.scorer.score(frontal_face(0), kept).reason, "duplicate")
+        self.assertTrue(self.scorer.score(frontal_face(1), kept).accepted)
+
+class TestAsyncImageWriter(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_close_flushes_pending_writes(self):
+        written = []
+        writer = AsyncImageWriter(on_written=lambda path, image: written.append(path))
+        paths = [self.root / "1" / f"{n}.jpg" for n in range(10)]
+        for path in paths:
+            writer.submit(path, frontal_face(0))
+        writer.close()
+        self.assertEqual(writer.written, 10)
+        self.assertEqual(written, paths)
+        self.assertTrue(all(path.exists() for path in paths))
+
+    def test_failed_write_is_counted(self):
+        written = []
+        writer = AsyncImageWriter(on_written=lambda path, image: written.append(path))
+        writer.submit(self.root / "bad.unknown-extension", frontal_face(0))
+        writer.close()
+        self.assertEqual((writer.written, writer.failed), (0, 1))
+        self.assertEqual(written, [])
+
+if __name__ == '__main__':
+    unittest.main()
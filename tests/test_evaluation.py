@@ -0,0 +1,26 @@
+import unittest
+
+from src.utils.evaluation import error_curves, equal_error_rate, make_folds
+
+class TestEvaluationHarness(unittest.TestCase):
+    def test_folds_are_disjoint_and_hold_out_students(self):
+        labels = [1] * 10 + [2] * 10 + [3] * 10
+        folds = make_folds(labels, folds=5, unknown_per_fold=1, seed=1)
+        self.assertEqual(len(folds), 5)
+        for fold in folds:
+            self.assertFalse(set(fold["train"]) & set(fold["test"]))
+            self.assertEqual(len(fold["unknown"]), 1)
+            unknown = fold["unknown"][0]
+            self.assertTrue(all(labels[i] == unknown for i in fold["impostor"]))
+            self.assertFalse(any(labels[i] == unknown for i in fold["train"] + fold["test"]))
+
+    def test_error_curves(self):
+        # (true, predicted, confidence, latency)
+        genuine = [(1, 1, 80.0, 1.0), (2, 2, 50.0, 1.0), (1, 2, 45.0, 1.0)]
+        impostor = [(3, 1, 30.0, 1.0), (3, 2, 70.0, 1.0)]
+        curves = {c["threshold"]: c for c in error_curves(genuine, impostor)}
+        self.assertAlmostEqual(curves[40]["frr"], 1 / 3, places=3)
+        self.assertAlmostEqual(curves[40]["misid"], 1 / 3, places=3)
+        self.assertEqual(curves[40]["far"], 0.5)
+        self.assertEqual(curves[100]["far"], 0.0)
+        self.assertIsNotNone(equal_error_rate(list(curves.values())))
@@ -0,0 +1,89 @@
+import unittest
+import asyncio
+import csv
+import tempfile
+import time
+from pathlib import Path
+
+from src.config.db_config import DatabaseConnection, init_database
+from src.core.event_bus import (
+    AttendanceEventBus, AttendanceMarked, CsvJournalSink, DashboardSink, EventSink, SQLiteSink
+)
+
+class SlowSink(EventSink):
+    name = "slow"
+
+    def __init__(self, **kwargs):
+        super().__init__(max_batch=100, flush_ms=0, max_queue=2, **kwargs)
+        self.release = asyncio.Event()
+        self.seen = 0
+
+    async def write(self, events):
+        await self.release.wait()
+        self.seen += len(events)
+
+class TestAttendanceEventBus(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = str(Path(self.tmp.name) / "test.db")
+        init_database(self.db_path)
+        with DatabaseConnection(self.db_path) as cursor:
+            cursor.execute("INSERT INTO students (student_id, name) VALUES ('1', 'Alice')")
+        # A private bus instance rather than the process-wide singleton
+        self.bus = object.__new__(AttendanceEventBus)
+        AttendanceEventBus.__init__(self.bus)
+
+    def tearDown(self):
+        self.bus.stop()
+        self.tmp.cleanup()
+
+    def test_sinks_receive_batches(self):
+        dashboard = DashboardSink()
+        for sink in (SQLiteSink(self.db_path, flush_ms=20), CsvJournalSink(Path(self.tmp.name)), dashboard):
+            self.bus.add_sink(sink)
+        for _ in range(5):
+            self.bus.publish(AttendanceMarked(1, "Alice", 1, 80.0, timestamp="2025-01-02T09:00:00"))
+        self.bus.stop()
+
+        with DatabaseConnection(self.db_path) as cursor:
+            cursor.execute("SELECT COUNT(*), MIN(date), MIN(time) FROM attendance")
+            self.assertEqual(cursor.fetchone(), (5, "2025-01-02", "09:00:00"))
+        with open(Path(self.tmp.name) / "attendance_2025-01-02.csv") as f:
+            self.assertEqual(len(list(csv.reader(f))), 6)
+        self.assertEqual(dashboard.snapshot()["marks"], 5)
+
+    def test_slow_sink_does_not_block_publisher(self):
+        slow = SlowSink()
+        dashboard = DashboardSink()
+        self.bus.add_sink(slow)
+        self.bus.add_sink(dashboard)
+        start = time.perf_counter()
+        for _ in range(20):
+            self.bus.publish(AttendanceMarked(1))
+        self.assertLess(time.perf_counter() - start, 0.5)
+        # The fast sink keeps up while the slow one is stuck
+        deadline = time.time() + 2
+        while dashboard.snapshot()["marks"] < 20 and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(dashboard.snapshot()["marks"], 20)
+        self.assertEqual(slow.seen, 0)
+        self.bus._loop.call_soon_threadsafe(slow.release.set)
+        self.bus.stop()
+        self.assertEqual(slow.seen, 20)
+
+    def test_spill_is_bounded(self):
+        slow = SlowSink(max_spill=5)
+        dashboard = DashboardSink()
+        self.bus.add_sink(slow)
+        self.bus.add_sink(dashboard)
+        for _ in range(20):
+            self.bus.publish(AttendanceMarked(1))
+        deadline = time.time() + 2
+        while dashboard.snapshot()["marks"] < 20 and time.time() < deadline:
+            time.sleep(0.01)
+        # At most one batch in the sink, a full queue and a full spill
+        self.assertGreaterEqual(slow.stats['dropped'], 20 - 2 - 2 - 5)
+        self.bus._loop.call_soon_threadsafe(slow.release.set)
+        self.bus.stop()
+        self.assertEqual(slow.seen + slow.stats['dropped'], 20)
+        self.assertEqual(slow.stats['failed'], 0)
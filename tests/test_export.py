@@ -0,0 +1,75 @@
+import csv
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from src.config.db_config import DatabaseConnection, init_database
+from src.db.export import ExportCancelled, export_rows
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.reader(f))
+
+class TestExportRows(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.db_path = str(self.root / "test.db")
+        init_database(self.db_path)
+        with DatabaseConnection(self.db_path) as cursor:
+            cursor.executemany(
+                "INSERT INTO students (student_id, name) VALUES (?, ?)",
+                [("1", "Alice"), ("2", "Bob"), ("3", "Carol")]
+            )
+            rows = [(1 + n % 2, f"2025-05-0{1 + n % 3}", f"09:{n:02d}:00") for n in range(12)]
+            # A mark whose student row is gone is not exported
+            rows.append((99, "2025-05-01", "10:00:00"))
+            rows.append((1, "2025-06-01", "09:00:00"))
+            cursor.executemany(
+                "INSERT INTO attendance (student_pk, date, time, status) VALUES (?, ?, ?, 'Present')", rows
+            )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_attendance_in_chunks(self):
+        out = self.root / "out" / "attendance.csv"
+        calls = []
+        written = export_rows(str(out), "2025-05-01", "2025-05-31", chunk_size=5,
+                              progress=lambda done, total: calls.append((done, total)),
+                              db_path=self.db_path)
+        self.assertEqual(written, 12)
+        self.assertEqual(calls, [(5, 12), (10, 12), (12, 12)])
+        rows = read_csv(out)
+        self.assertEqual(rows[0], ["Student ID", "Name", "Time", "Date", "Status"])
+        self.assertEqual(len(rows), 13)
+        self.assertEqual(rows[1], ["1", "Alice", "09:00:00", "2025-05-01", "Present"])
+        self.assertFalse(out.with_name("attendance.csv.part").exists())
+
+    def test_cancel_removes_partial_file(self):
+        out = self.root / "attendance.csv"
+        cancel = threading.Event()
+        with self.assertRaises(ExportCancelled):
+            export_rows(str(out), "2025-05-01", "2025-05-31", chunk_size=5,
+                        progress=lambda done, total: cancel.set(), cancel_event=cancel,
+                        db_path=self.db_path)
+        self.assertEqual(list(self.root.glob("attendance.csv*")), [])
+
+    def test_report_kind(self):
+        out = self.root / "report.csv"
+        written = export_rows(str(out), "2025-05-01", "2025-05-31", kind="report", db_path=self.db_path)
+        self.assertEqual(written, 3)
+        rows = read_csv(out)
+        self.assertEqual(rows[0], ["Student ID", "Name", "Days Present", "Marks", "First Seen", "Last Seen"])
+        self.assertEqual([row[:4] for row in rows[1:]],
+                         [["1", "Alice", "3", "6"], ["2", "Bob", "3", "6"], ["3", "Carol", "0", "0"]])
+        self.assertEqual(rows[1][4:], ["2025-05-01 09:00:00", "2025-05-03 09:08:00"])
+
+    def test_unknown_kind(self):
+        with self.assertRaises(ValueError):
+            export_rows(str(self.root / "x.csv"), "2025-05-01", "2025-05-31", kind="students",
+                        db_path=self.db_path)
+
+if __name__ == '__main__':
+    unittest.main()
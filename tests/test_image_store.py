@@ -0,0 +1,84 @@
+import random
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from src.utils.dataset import list_flat_files, list_training_files, load_training_data
+from src.utils.enrollment import EnrollmentSession
+from src.utils.image_store import TrainingImageStore, indexed
+
+def write_face(path, seed):
+    rng = np.random.default_rng(seed)
+    cv2.imwrite(str(path), rng.integers(0, 256, (32, 32), dtype=np.uint8))
+
+class TestTrainingImageStore(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        for label in (1, 2):
+            for n in range(3):
+                write_face(self.root / f"user.{label}.{n}.jpg", label * 10 + n)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_migrate_flat_layout(self):
+        store = TrainingImageStore(self.root)
+        stats = store.migrate_flat(quality=False)
+        self.assertEqual(stats["moved"], 6)
+        self.assertTrue((self.root / "1" / "2.jpg").exists())
+        self.assertFalse(list(self.root.glob("user.*")))
+        self.assertEqual({k: v["images"] for k, v in store.student_stats().items()}, {1: 3, 2: 3})
+        self.assertEqual(store.next_index(2), 3)
+        self.assertEqual(len(store.files([2])), 3)
+
+    def test_loader_reads_both_layouts(self):
+        TrainingImageStore(self.root).migrate_flat(quality=False)
+        write_face(self.root / "user.3.0.jpg", 30)
+        self.assertTrue(indexed(self.root))
+        faces, labels = load_training_data(self.root)
+        self.assertEqual(sorted(labels), [1, 1, 1, 2, 2, 2, 3])
+        self.assertEqual(len(list_training_files(self.root, [1, 3])), 4)
+
+    def test_first_enrollment_keeps_flat_files_visible(self):
+        # The manifest is created by the first enrollment, before any migration
+        store = TrainingImageStore(self.root)
+        (self.root / "3").mkdir()
+        write_face(store.image_path(3, 0), 30)
+        store.add(3, store.image_path(3, 0))
+        self.assertEqual(list(store.student_stats()), [3])
+        self.assertEqual(sorted(label for _, label in list_flat_files(self.root)), [1, 1, 1, 2, 2, 2])
+        self.assertEqual(len(list_training_files(self.root)), 7)
+
+    def test_collisions_renumbered(self):
+        store = TrainingImageStore(self.root)
+        store.migrate_flat(quality=False)
+        # A second flat batch reusing indices 0-2 must not overwrite
+        for n in range(3):
+            write_face(self.root / f"user.1.{n}.jpg", 100 + n)
+        stats = store.migrate_flat(quality=False)
+        self.assertEqual(stats["renumbered"], 3)
+        self.assertEqual(store.student_stats()[1]["images"], 6)
+        self.assertEqual(sorted(p.name for p in (self.root / "1").iterdir()),
+                         [f"{n}.jpg" for n in range(6)])
+
+    def test_sample_prefers_distinct_students(self):
+        store = TrainingImageStore(self.root)
+        store.migrate_flat(quality=False)
+        picked = store.sample(2, random.Random(0))
+        self.assertEqual(sorted(label for _, label in picked), [1, 2])
+        self.assertEqual(len(store.sample(5)), 5)
+
+    def test_enrollment_appends_after_existing_images(self):
+        store = TrainingImageStore(self.root)
+        store.migrate_flat(quality=False)
+        session = EnrollmentSession(1, self.root, store=store)
+        self.assertEqual(session.first_index, 3)
+        self.assertEqual(store.image_path(1, session.first_index), self.root / "1" / "3.jpg")
+        session.finish()
+
+if __name__ == '__main__':
+    unittest.main()
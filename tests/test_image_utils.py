@@ -0,0 +1,39 @@
+import unittest
+import numpy as np
+
+from src.utils.image_utils import (
+    FacePipeline, GammaStage, EqualizeStage, normalize_batch, normalize_face, stack_faces
+)
+
+class TestBatchNormalization(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.faces = [rng.integers(0, 255, (side, side), dtype=np.uint8) for side in (90, 120, 160)]
+        self.faces.append(np.full((100, 100), 42, dtype=np.uint8))
+
+    def test_matches_scalar_normalization(self):
+        batch = stack_faces(self.faces, (160, 160))
+        normalized = normalize_batch(batch)
+        for i, face in enumerate(batch):
+            np.testing.assert_allclose(normalized[i], normalize_face(face), atol=1e-4)
+
+    def test_flat_crop_does_not_divide_by_zero(self):
+        flat = np.full((100, 100), 42, dtype=np.uint8)
+        self.assertFalse(np.isnan(normalize_face(flat)).any())
+        normalized = normalize_batch(stack_faces([flat], (50, 50)))
+        self.assertTrue(np.all(normalized == 0))
+
+    def test_in_place(self):
+        batch = stack_faces(self.faces, (64, 64)).astype(np.float32)
+        expected = normalize_batch(batch)
+        result = normalize_batch(batch, out=batch)
+        self.assertIs(result, batch)
+        np.testing.assert_allclose(result, expected)
+
+    def test_pipeline_reuses_buffers(self):
+        pipeline = FacePipeline([GammaStage(1.2), EqualizeStage()], (64, 64), normalize=True)
+        first = pipeline.run(self.faces, copy=False)
+        second = pipeline.run(self.faces, copy=False)
+        self.assertIs(first, second)
+        self.assertEqual(first.shape, (4, 64, 64))
+        self.assertEqual(first.dtype, np.float32)
@@ -0,0 +1,77 @@
+import unittest
+import tempfile
+from pathlib import Path
+
+from src.config.db_config import DatabaseConnection, init_database
+from src.core.event_bus import AttendanceEventBus, AttendanceMarked, SQLiteSink
+from src.core.journal import AttendanceJournal, read_segment, replay_journal, segment_paths
+
+class TestAttendanceJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name) / "journal"
+        self.db_path = str(Path(self.tmp.name) / "test.db")
+        init_database(self.db_path)
+        with DatabaseConnection(self.db_path) as cursor:
+            cursor.execute("INSERT INTO students (student_id, name) VALUES ('1', 'Alice')")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def count_attendance(self):
+        with DatabaseConnection(self.db_path) as cursor:
+            cursor.execute("SELECT COUNT(*) FROM attendance")
+            return cursor.fetchone()[0]
+
+    def test_replay_after_crash_is_idempotent(self):
+        journal = AttendanceJournal(self.dir, group_size=4, fsync_ms=10)
+        events = [AttendanceMarked(1, timestamp="2025-01-02T09:00:00") for _ in range(10)]
+        for event in events:
+            journal.append(event)
+        journal.sync()
+        # Crash: a half-written line and no close()
+        with open(journal.active_path, 'ab') as f:
+            f.write(b'{"event_id": "torn"')
+
+        records, torn = read_segment(journal.active_path)
+        self.assertEqual((len(records), torn), (10, 1))
+
+        # Some events already reached SQLite through the sink before the crash
+        SQLiteSink(self.db_path).write_batch(events[:3])
+        stats = replay_journal(segment_paths(self.dir), self.db_path)
+        self.assertEqual((stats['events'], stats['applied'], stats['torn']), (10, 7, 1))
+        self.assertEqual(self.count_attendance(), 10)
+        self.assertEqual(segment_paths(self.dir), [])
+
+    def test_bus_journals_and_applies_on_stop(self):
+        bus = object.__new__(AttendanceEventBus)
+        AttendanceEventBus.__init__(bus)
+        journal = AttendanceJournal(self.dir, segment_bytes=512)
+        bus.attach_journal(journal, checkpoint_seconds=3600, db_path=self.db_path)
+        for _ in range(20):
+            bus.publish(AttendanceMarked(1))
+
+        bus.stop()
+        self.assertEqual(self.count_attendance(), 20)
+        self.assertEqual(segment_paths(self.dir), [])
+
+    def test_live_writer_segments_are_not_replayed_by_others(self):
+        gui = AttendanceJournal(self.dir)
+        api = AttendanceJournal(self.dir)
+        gui.append(AttendanceMarked(1))
+        sealed = gui.rotate()
+        gui.append(AttendanceMarked(1))
+        api.append(AttendanceMarked(1))
+        self.assertNotEqual(gui.active_path, api.active_path)
+
+        # Our sealed segment is ours to replay; the other writer's files are not
+        self.assertEqual(gui.sealed_segments(), [sealed])
+        self.assertEqual(api.sealed_segments(), [])
+
+        gui.close()
+        # Once the writer's lock is released its segments are fair game
+        self.assertEqual(len(api.sealed_segments()), 2)
+        stats = replay_journal(api.sealed_segments(), self.db_path)
+        self.assertEqual(stats['applied'], 2)
+        api.close()
+        self.assertEqual(len(segment_paths(self.dir)), 1)
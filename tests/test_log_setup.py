@@ -0,0 +1,55 @@
+import unittest
+import logging
+import tempfile
+from pathlib import Path
+
+from src.core import log_setup
+from src.core.log_setup import JsonFormatter, RateLimitFilter, log_timing, read_timings
+
+class TestLogSetup(unittest.TestCase):
+    def make_record(self, msg, lineno=10):
+        return logging.LogRecord("app", logging.ERROR, "/src/views/recognition.py", lineno, msg, None, None)
+
+    def test_rate_limit_per_call_site(self):
+        limiter = RateLimitFilter(burst=3, window=60)
+        passed = [limiter.filter(self.make_record(f"Prediction error {i}")) for i in range(10)]
+        self.assertEqual(passed, [True] * 3 + [False] * 7)
+        # Another call site has its own budget
+        self.assertTrue(limiter.filter(self.make_record("Other", lineno=20)))
+
+    def test_repeats_are_dropped_and_counted(self):
+        limiter = RateLimitFilter(burst=5, window=60)
+        self.assertTrue(limiter.filter(self.make_record("Camera lost")))
+        self.assertFalse(limiter.filter(self.make_record("Camera lost")))
+        limiter.window = 0
+        record = self.make_record("Camera lost")
+        self.assertTrue(limiter.filter(record))
+        self.assertEqual(record.suppressed, 1)
+        self.assertIn("1 similar messages suppressed", record.getMessage())
+
+    def test_timing_records_round_trip_through_json_log(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = logging.getLogger()
+            saved = (list(root.handlers), root.level)
+            try:
+                log_setup.shutdown_logging()
+                log_setup.setup_logging("test", Path(tmp))
+                log_timing("training", 123.4567, faces=10)
+                logging.info("plain message")
+                log_setup.shutdown_logging()
+            finally:
+                for handler in list(root.handlers):
+                    root.removeHandler(handler)
+                for handler in saved[0]:
+                    root.addHandler(handler)
+                root.setLevel(saved[1])
+
+            timings = read_timings(Path(tmp) / "test.jsonl")
+            self.assertEqual(len(timings), 1)
+            self.assertEqual((timings[0]["name"], timings[0]["ms"], timings[0]["faces"]), ("training", 123.457, 10))
+
+    def test_json_formatter(self):
+        record = self.make_record("hello")
+        record.timing = {"name": "x", "ms": 1.0}
+        formatted = JsonFormatter().format(record)
+        self.assertIn('"timing": {"name": "x", "ms": 1.0}', formatted)
@@ -0,0 +1,49 @@
+import unittest
+import sqlite3
+import tempfile
+from pathlib import Path
+
+from src.config.db_config import DatabaseConnection, init_database
+from src.db.maintenance import archive_before, health_report, term_of
+from src.db.rollups import attendance_report
+
+class TestAttendanceMaintenance(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = str(Path(self.tmp.name) / "live.db")
+        self.archive_dir = Path(self.tmp.name) / "archive"
+        init_database(self.db_path)
+        with DatabaseConnection(self.db_path) as cursor:
+            cursor.execute("INSERT INTO students (student_id, name) VALUES ('1', 'Alice')")
+            cursor.executemany(
+                "INSERT INTO attendance (student_pk, date, time, status) VALUES (1, ?, '09:00:00', 'Present')",
+                [("2024-03-01",), ("2024-03-01",), ("2024-09-02",), ("2025-02-03",)]
+            )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_term_of(self):
+        self.assertEqual(term_of("2024-03-01"), ("2024H1", "2024-01-01", "2024-07-01"))
+        self.assertEqual(term_of("2024-12-31"), ("2024H2", "2024-07-01", "2025-01-01"))
+
+    def test_archive_moves_raw_rows_and_keeps_rollups(self):
+        archived = archive_before("2025-01-01", archive_dir=self.archive_dir, db_path=self.db_path)
+        self.assertEqual(archived, {"2024H1": 2, "2024H2": 1})
+
+        with DatabaseConnection(self.db_path) as cursor:
+            cursor.execute("SELECT date FROM attendance")
+            self.assertEqual(cursor.fetchall(), [("2025-02-03",)])
+            rows = attendance_report(cursor, "2024-01-01", "2025-12-31")
+        self.assertEqual(rows, [("1", "Alice", 3)])
+
+        archive = sqlite3.connect(str(self.archive_dir / "attendance_2024H1.db"))
+        self.assertEqual(archive.execute("SELECT COUNT(*) FROM attendance").fetchone()[0], 2)
+        archive.close()
+
+    def test_health_report_uses_indexes(self):
+        report = health_report(self.db_path)
+        self.assertGreater(report["size_bytes"], 0)
+        self.assertEqual(report["tables"]["attendance"], 4)
+        for name, query in report["queries"].items():
+            self.assertTrue(query["healthy"], f"{name}: {query['plan']}")
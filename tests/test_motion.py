@@ -0,0 +1,33 @@
+import unittest
+
+import numpy as np
+
+from src.utils.motion import MotionGate
+
+class TestMotionGate(unittest.TestCase):
+    def setUp(self):
+        self.gate = MotionGate(refresh_seconds=60, idle_after=60)
+        self.frame = np.full((480, 640, 3), 90, dtype=np.uint8)
+
+    def test_static_scene_is_gated(self):
+        self.assertTrue(self.gate.should_detect(self.frame))
+        for _ in range(5):
+            self.assertFalse(self.gate.should_detect(self.frame.copy()))
+        self.assertEqual(self.gate.stats['processed'], 1)
+        self.assertEqual(self.gate.stats['gated'], 5)
+
+    def test_motion_and_tracking_run_detection(self):
+        self.gate.should_detect(self.frame)
+        moved = self.frame.copy()
+        moved[100:300, 200:400] = 250
+        self.assertTrue(self.gate.should_detect(moved))
+        self.assertTrue(self.gate.should_detect(moved, tracking=True))
+        self.assertEqual(self.gate.stats['motion'], 2)
+        self.assertEqual(self.gate.stats['tracking'], 1)
+
+    def test_refresh_and_idle(self):
+        gate = MotionGate(refresh_seconds=0, idle_after=0)
+        gate.should_detect(self.frame)
+        self.assertTrue(gate.should_detect(self.frame))
+        self.assertEqual(gate.stats['refresh'], 1)
+        self.assertTrue(gate.idle)
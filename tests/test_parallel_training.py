@@ -0,0 +1,36 @@
+import os
+import tempfile
+import unittest
+
+import cv2
+import numpy as np
+
+from src.utils.face_utils import LBPH_PARAMS
+from src.utils.parallel_training import train_parallel
+
+class TestParallelTraining(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.faces = [rng.integers(0, 256, (64, 64), dtype=np.uint8) for _ in range(30)]
+        self.labels = np.arange(30, dtype=np.int32) % 4
+
+    def test_merged_model_matches_single_call(self):
+        serial = cv2.face.LBPHFaceRecognizer_create(**LBPH_PARAMS, threshold=90.0)
+        serial.train(self.faces, self.labels)
+        merged = train_parallel(self.faces, self.labels, LBPH_PARAMS, 90.0, workers=2, chunk_size=7)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "classifier.xml")
+            merged.save(path)
+            loaded = cv2.face.LBPHFaceRecognizer_create()
+            loaded.read(path)
+        self.assertEqual(loaded.getThreshold(), 90.0)
+        np.testing.assert_array_equal(loaded.getLabels(), serial.getLabels())
+        for a, b in zip(loaded.getHistograms(), serial.getHistograms()):
+            np.testing.assert_array_equal(a, b)
+
+        # Used as a recognizer, it reads itself in once
+        self.assertEqual(merged.predict(self.faces[5]), serial.predict(self.faces[5]))
+
+if __name__ == '__main__':
+    unittest.main()
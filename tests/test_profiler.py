@@ -0,0 +1,56 @@
+import unittest
+import json
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from src.core.profiler import Profiler, _NULL_SPAN
+
+def busy_stage(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.profiler = object.__new__(Profiler)
+        Profiler.__init__(self.profiler)
+        self.profiler.env_enabled = False
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_span_is_noop_when_disabled(self):
+        if self.profiler.config_manager.config.profiling.enabled:
+            self.skipTest("profiling enabled in settings")
+        self.assertIs(self.profiler.span("frame.detect"), _NULL_SPAN)
+        with self.profiler.span("frame.detect"):
+            pass
+        self.assertEqual(self.profiler.summary(), {})
+
+    def test_sampling_capture_writes_trace_and_folded_stacks(self):
+        stop = threading.Event()
+        worker = threading.Thread(target=busy_stage, args=(stop,), name="busy")
+        worker.start()
+        try:
+            capture = self.profiler.start_capture(0.3, "sample", Path(self.tmp.name))
+            for _ in range(3):
+                with self.profiler.span("frame.detect"):
+                    time.sleep(0.01)
+            self.assertTrue(capture.done.wait(5))
+        finally:
+            stop.set()
+            worker.join()
+
+        self.assertEqual(self.profiler.summary()["frame.detect"]["count"], 3)
+        trace_path = next(p for p in capture.paths if p.name.endswith(".trace.json"))
+        with open(trace_path) as f:
+            trace = json.load(f)
+        spans = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+        self.assertEqual(len(spans), 3)
+        self.assertGreaterEqual(spans[0]["dur"], 10000)
+
+        folded = next(p for p in capture.paths if p.suffix == ".folded").read_text()
+        self.assertIn("busy;", folded)
+        self.assertIn("busy_stage", folded)
@@ -0,0 +1,40 @@
+import unittest
+import time
+
+import numpy as np
+
+from src.utils.recognition_cache import RecognitionCache, dhash
+
+class TestRecognitionCache(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.face = rng.integers(0, 255, (120, 120), dtype=np.uint8)
+        self.box = (100, 80, 120, 120)
+
+    def test_near_identical_crop_hits(self):
+        cache = RecognitionCache(ttl=10)
+        cache.put(cache.key(self.face, self.box), (7, 82.0))
+        # Small brightness change and one pixel of box jitter
+        brighter = np.clip(self.face.astype(np.int16) + 5, 0, 255).astype(np.uint8)
+        self.assertEqual(cache.get(cache.key(brighter, (101, 80, 120, 120))), (7, 82.0))
+        self.assertEqual(cache.stats['hits'], 1)
+
+    def test_different_face_or_position_misses(self):
+        cache = RecognitionCache(ttl=10)
+        cache.put(cache.key(self.face, self.box), (7, 82.0))
+        self.assertIsNone(cache.get(cache.key(self.face.T.copy(), self.box)))
+        self.assertIsNone(cache.get(cache.key(self.face, (400, 80, 120, 120))))
+        self.assertEqual(cache.stats['hit_rate'], 0.0)
+
+    def test_ttl_and_lru_eviction(self):
+        cache = RecognitionCache(max_entries=2, ttl=0.05)
+        for i in range(3):
+            cache.put(((i, 0, 5), i), (i, 50.0))
+        self.assertEqual(cache.stats['evictions'], 1)
+        self.assertIsNone(cache.get(((0, 0, 5), 0)))
+        time.sleep(0.06)
+        self.assertIsNone(cache.get(((2, 0, 5), 2)))
+        self.assertEqual(cache.stats['expired'], 2)
+
+    def test_dhash_is_64_bits(self):
+        self.assertLess(dhash(self.face), 1 << 64)
@@ -0,0 +1,79 @@
+import unittest
+import tempfile
+from pathlib import Path
+
+from src.config.config_manager import ConfigManager
+from src.config.db_config import DatabaseConnection, init_database
+from src.db.rollups import attendance_report, rebuild_rollups, report_cache
+
+class TestAttendanceRollups(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = str(Path(self.tmp.name) / "test.db")
+        init_database(self.db_path)
+        report_cache.invalidate()
+        with DatabaseConnection(self.db_path) as cursor:
+            cursor.executemany(
+                "INSERT INTO students (student_id, name) VALUES (?, ?)",
+                [("1", "Alice"), ("2", "Bob")]
+            )
+            cursor.executemany(
+                "INSERT INTO attendance (student_pk, date, time, status) VALUES (?, ?, ?, 'Present')",
+                [
+                    (1, "2025-04-01", "09:00:00"),
+                    (1, "2025-04-01", "09:05:00"),
+                    (1, "2025-04-01", "08:55:00"),
+                    (1, "2025-04-02", "09:00:00"),
+                    (2, "2025-04-02", "10:00:00"),
+                ]
+            )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_trigger_maintains_daily_rows(self):
+        with DatabaseConnection(self.db_path) as cursor:
+            cursor.execute("""
+                SELECT first_seen, last_seen, marks FROM attendance_daily
+                WHERE student_pk = 1 AND date = '2025-04-01'
+            """)
+            self.assertEqual(cursor.fetchone(), ("08:55:00", "09:05:00", 3))
+
+    def test_report_counts_distinct_days(self):
+        with DatabaseConnection(self.db_path) as cursor:
+            rows = attendance_report(cursor, "2025-04-01", "2025-04-30")
+        self.assertEqual(rows, [("1", "Alice", 2), ("2", "Bob", 1)])
+
+    def test_report_cache_invalidated_by_new_writes(self):
+        with DatabaseConnection(self.db_path) as cursor:
+            attendance_report(cursor, "2025-04-01", "2025-04-30")
+            attendance_report(cursor, "2025-04-01", "2025-04-30")
+            self.assertEqual(report_cache.hits, 1)
+
+            cursor.execute(
+                "INSERT INTO attendance (student_pk, date, time, status) "
+                "VALUES (2, '2025-04-03', '10:00:00', 'Present')"
+            )
+            rows = attendance_report(cursor, "2025-04-01", "2025-04-30")
+        self.assertEqual(rows[1], ("2", "Bob", 2))
+
+    def test_report_cache_follows_config(self):
+        manager = ConfigManager()
+        size = manager.config.performance.report_cache_size
+        try:
+            manager.config.performance.report_cache_size = 1
+            manager._notify()
+            self.assertEqual(report_cache.max_entries, 1)
+        finally:
+            manager.config.performance.report_cache_size = size
+            manager._notify()
+        self.assertEqual(report_cache.max_entries, size)
+
+    def test_rebuild_matches_trigger(self):
+        with DatabaseConnection(self.db_path) as cursor:
+            cursor.execute("SELECT * FROM attendance_daily ORDER BY student_pk, date")
+            before = cursor.fetchall()
+            cursor.execute("DELETE FROM attendance_daily")
+            rebuild_rollups(cursor)
+            cursor.execute("SELECT * FROM attendance_daily ORDER BY student_pk, date")
+            self.assertEqual(cursor.fetchall(), before)
@@ -0,0 +1,73 @@
+import unittest
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from src.config.db_config import DatabaseConnection, init_database
+from src.db.students import assign_label
+from src.utils.sharding import (
+    ShardedModel, active_shard_names, course_shard, shard_assignments, train_shards
+)
+
+def to_confidence(distance):
+    return 100 - min(100, distance)
+
+class TestShardedModel(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.shard_dir = Path(self.tmp.name) / "shards"
+        db_path = str(Path(self.tmp.name) / "test.db")
+        init_database(db_path)
+        with DatabaseConnection(db_path) as cursor:
+            for student_id, course in (("1", "CS 101"), ("2", "CS 101"), ("3", "Math-200")):
+                cursor.execute("INSERT INTO students (student_id, name, course) VALUES (?, ?, ?)",
+                               (student_id, f"Student {student_id}", course))
+                assign_label(cursor, cursor.lastrowid, student_id)
+            self.assignments = shard_assignments(cursor, [1, 2, 3, 4], "course")
+
+        rng = np.random.default_rng(0)
+        self.prototypes = {label: rng.integers(0, 255, (64, 64), dtype=np.uint8) for label in (1, 2, 3)}
+        self.faces, self.labels = [], []
+        for label, proto in self.prototypes.items():
+            for _ in range(3):
+                noise = rng.integers(-10, 10, proto.shape)
+                self.faces.append(np.clip(proto + noise, 0, 255).astype(np.uint8))
+                self.labels.append(label)
+        train_shards(self.faces, self.labels, self.assignments, "course", "equalize", 1e9, self.shard_dir)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_assignments_follow_course(self):
+        self.assertEqual(self.assignments[1], course_shard("cs 101"))
+        self.assertEqual(self.assignments[3], "course-math-200")
+        # Label without a student row
+        self.assertEqual(self.assignments[4], "course-unassigned")
+        self.assertEqual(active_shard_names("course", "CS 101, Math-200", 16),
+                         ["course-cs-101", "course-math-200"])
+
+    def test_invalid_hash_entries_are_skipped(self):
+        self.assertEqual(active_shard_names("hash", "3, x, 16, -1, 15", 16), ["hash-003", "hash-015"])
+        self.assertEqual(active_shard_names("hash", "seven", 16), [])
+
+    def test_room_loads_only_its_shards(self):
+        model = ShardedModel.load(active_shard_names("course", "CS 101", 16), "equalize", self.shard_dir)
+        self.assertEqual(list(model.recognizers), ["course-cs-101"])
+        label, _ = model.predict(self.prototypes[2], to_confidence, 101, 0)
+        self.assertEqual(label, 2)
+
+    def test_fallback_on_low_confidence(self):
+        model = ShardedModel.load(["course-cs-101"], "equalize", self.shard_dir)
+        calls = []
+
+        def full_search(face):
+            calls.append(face)
+            return 3, 99.0
+
+        label, confidence = model.predict(self.prototypes[3], to_confidence, 101, 100, full_search)
+        self.assertEqual((label, confidence), (3, 99.0))
+        self.assertEqual(model.stats['fallbacks'], 1)
+
+    def test_preprocessing_mismatch_is_rejected(self):
+        self.assertIsNone(ShardedModel.load(None, "aligned", self.shard_dir))
@@ -0,0 +1,80 @@
+import unittest
+import sqlite3
+import tempfile
+from pathlib import Path
+
+from src.config.db_config import DatabaseConnection, init_database
+from src.db.students import assign_label, LabelDirectory
+
+class TestStudentKeyMigration(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = str(Path(self.tmp.name) / "legacy.db")
+
+        # Schema as created by earlier releases
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript("""
+            CREATE TABLE students (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                student_id TEXT UNIQUE,
+                name TEXT,
+                email TEXT,
+                course TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE TABLE attendance (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                student_id TEXT,
+                date DATE,
+                time TIME,
+                status TEXT,
+                FOREIGN KEY (student_id) REFERENCES students(student_id)
+            );
+            INSERT INTO students (student_id, name) VALUES ('546464', 'Pranshu');
+            INSERT INTO students (student_id, name) VALUES ('A-17', 'Karan');
+            INSERT INTO attendance (student_id, date, time, status)
+                VALUES ('546464', '2025-04-03', '09:00:00', 'Present');
+            INSERT INTO attendance (student_id, date, time, status)
+                VALUES ('A-17', '2025-04-03', '09:01:00', 'Present');
+            INSERT INTO attendance (student_id, date, time, status)
+                VALUES ('999', '2025-04-03', '09:02:00', 'Present');
+            INSERT INTO attendance (student_id, date, time, status)
+                VALUES (NULL, '2025-04-03', '09:03:00', 'Present');
+        """)
+        conn.commit()
+        conn.close()
+        init_database(self.db_path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_attendance_references_integer_keys(self):
+        with DatabaseConnection(self.db_path) as cursor:
+            cursor.execute("SELECT student_pk, typeof(student_pk) FROM attendance ORDER BY id")
+            self.assertEqual(cursor.fetchall(), [(1, "integer"), (2, "integer")])
+            cursor.execute("SELECT student_id FROM attendance_unmatched ORDER BY id")
+            self.assertEqual(cursor.fetchall(), [("999",), (None,)])
+            cursor.execute("SELECT student_pk, marks FROM attendance_daily ORDER BY student_pk")
+            self.assertEqual(cursor.fetchall(), [(1, 1), (2, 1)])
+
+    def test_no_rows_lost(self):
+        with DatabaseConnection(self.db_path) as cursor:
+            cursor.execute("SELECT (SELECT COUNT(*) FROM attendance) + (SELECT COUNT(*) FROM attendance_unmatched)")
+            self.assertEqual(cursor.fetchone()[0], 4)
+            cursor.execute("SELECT time FROM attendance_unmatched WHERE student_id IS NULL")
+            self.assertEqual(cursor.fetchall(), [("09:03:00",)])
+
+    def test_numeric_student_ids_keep_their_label(self):
+        with DatabaseConnection(self.db_path) as cursor:
+            cursor.execute("SELECT label, student_pk FROM recognizer_labels")
+            self.assertEqual(cursor.fetchall(), [(546464, 1)])
+            # Non-numeric IDs get the next free label
+            self.assertEqual(assign_label(cursor, 2, "A-17"), 546465)
+            self.assertEqual(assign_label(cursor, 2, "A-17"), 546465)
+            self.assertEqual(LabelDirectory().lookup(cursor, 546465), (2, "Karan"))
+
+    def test_init_is_idempotent(self):
+        init_database(self.db_path)
+        with DatabaseConnection(self.db_path) as cursor:
+            cursor.execute("SELECT COUNT(*) FROM attendance")
+            self.assertEqual(cursor.fetchone()[0], 2)
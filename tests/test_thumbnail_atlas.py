@@ -0,0 +1,50 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from src.utils.image_store import TrainingImageStore
+from src.utils.thumbnail_atlas import PER_PAGE, TILE, ThumbnailAtlas
+
+def face(value):
+    return np.full((50, 50, 3), value, dtype=np.uint8)
+
+class TestThumbnailAtlas(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.store = TrainingImageStore(self.root)
+        self.atlas = ThumbnailAtlas(self.store)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_put_keeps_sharpest(self):
+        self.assertTrue(self.atlas.put(1, face(100), quality=50.0))
+        self.assertFalse(self.atlas.put(1, face(200), quality=10.0))
+        thumb = ThumbnailAtlas(self.store).get(1)
+        self.assertEqual(thumb.shape, (TILE, TILE, 3))
+        self.assertTrue(abs(int(thumb.mean()) - 100) <= 1)
+        self.assertIsNone(self.atlas.get(2))
+
+    def test_pages(self):
+        self.atlas.put_many([(label, face(label % 256), None) for label in range(PER_PAGE + 5)])
+        self.assertEqual(self.atlas.page_count(), 2)
+        second = ThumbnailAtlas(self.store).page(1)
+        self.assertEqual([label for label, _ in second], list(range(PER_PAGE, PER_PAGE + 5)))
+        self.assertEqual(len(self.atlas.sample(3)), 3)
+
+    def test_build_from_manifest(self):
+        (self.root / "3").mkdir()
+        for n, value in enumerate((40, 80)):
+            path = self.store.image_path(3, n)
+            cv2.imwrite(str(path), face(value))
+            self.store.add(3, path, quality=float(value))
+        self.assertEqual(self.atlas.build(), 1)
+        self.assertTrue(abs(int(self.atlas.get(3).mean()) - 80) <= 1)
+        self.assertEqual(self.atlas.build(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
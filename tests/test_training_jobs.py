@@ -0,0 +1,87 @@
+import shutil
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from src.core.training_jobs import TrainingJobManager
+
+def write_faces(root, label, count, seed):
+    rng = np.random.default_rng(seed)
+    for n in range(count):
+        cv2.imwrite(str(root / f"user.{label}.{n}.jpg"), rng.integers(0, 256, (64, 64), dtype=np.uint8))
+
+def read_labels(path):
+    recognizer = cv2.face.LBPHFaceRecognizer_create()
+    recognizer.read(path)
+    return sorted(recognizer.getLabels().ravel().tolist())
+
+class TestTrainingJobManager(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.data_dir = self.root / "images"
+        self.data_dir.mkdir()
+        self.model_path = str(self.root / "models" / "classifier.xml")
+        self.manager = TrainingJobManager()
+        self.published = []
+        self.manager.subscribe(self.on_publish)
+
+    def tearDown(self):
+        self.manager.unsubscribe(self.on_publish)
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def on_publish(self, path, version):
+        self.published.append((path, version))
+
+    def run_job(self, **kwargs):
+        done = threading.Event()
+        job = self.manager.submit(on_done=lambda job: done.set(), data_dir=self.data_dir,
+                                  model_path=self.model_path, **kwargs)
+        self.assertTrue(done.wait(30))
+        self.assertTrue(job.finished)
+        return job
+
+    def test_full_training_publishes_model(self):
+        write_faces(self.data_dir, 1, 3, 1)
+        write_faces(self.data_dir, 2, 3, 2)
+        job = self.run_job()
+        self.assertEqual(job.state, "done", job.error)
+        self.assertEqual(job.stats["students"], [1, 2])
+        self.assertEqual(read_labels(self.model_path), [1, 1, 1, 2, 2, 2])
+        self.assertEqual(self.published, [(self.model_path, self.manager.model_version)])
+
+    def test_cancel(self):
+        write_faces(self.data_dir, 1, 5, 1)
+        job = self.run_job(on_progress=lambda job: job.cancel())
+        self.assertEqual(job.state, "cancelled")
+        self.assertEqual(self.published, [])
+
+    def test_incremental_without_model_runs_full(self):
+        write_faces(self.data_dir, 1, 3, 1)
+        write_faces(self.data_dir, 2, 3, 2)
+        job = self.run_job(incremental=True, student_ids=[2])
+        self.assertEqual(job.state, "done", job.error)
+        self.assertFalse(job.stats["incremental"])
+        self.assertEqual(read_labels(self.model_path), [1, 1, 1, 2, 2, 2])
+
+    def test_incremental_adds_only_new_student(self):
+        write_faces(self.data_dir, 1, 3, 1)
+        self.run_job()
+        write_faces(self.data_dir, 2, 2, 2)
+        job = self.run_job(incremental=True, student_ids=[2])
+        self.assertTrue(job.stats["incremental"])
+        self.assertEqual(read_labels(self.model_path), [1, 1, 1, 2, 2])
+
+    def test_incremental_for_known_student_retrains(self):
+        write_faces(self.data_dir, 1, 3, 1)
+        self.run_job()
+        write_faces(self.data_dir, 1, 5, 1)  # re-enrollment: indices 0-2 again plus 3-4
+        job = self.run_job(incremental=True, student_ids=[1])
+        self.assertFalse(job.stats["incremental"])
+        self.assertEqual(read_labels(self.model_path), [1] * 5)
+
+if __name__ == '__main__':
+    unittest.main()